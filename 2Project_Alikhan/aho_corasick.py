@@ -0,0 +1,85 @@
+from collections import deque
+from typing import Dict, Generic, Hashable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar('T', bound=Hashable)
+
+
+class AhoCorasick(Generic[T]):
+    def __init__(self):
+        """
+        Aho-Corasick automaton finding every occurrence of many patterns in one pass over a text.
+
+        Patterns are added with add() and the automaton is compiled by build();
+        afterwards search() runs in time linear in the length of the text plus
+        the number of matches, however many patterns there are.
+        """
+        # Trie nodes: outgoing edges, failure link and values of the patterns ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, T]]] = [[]]
+        self._patterns = 0
+        self._built = False
+
+    def __len__(self) -> int:
+        return self._patterns
+
+    def add(self, pattern: str, value: T):
+        """
+        Add a pattern to the automaton.
+
+        Args:
+            pattern: Text to look for
+            value: Value reported when the pattern is found
+        """
+        if not pattern:
+            return
+        if self._built:
+            raise RuntimeError("Patterns can't be added after build()")
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), value))
+        self._patterns += 1
+
+    def build(self):
+        """Compute the failure links; must be called once after all patterns are added"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # A node also reports the patterns ending at its failure target
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def search(self, text: str) -> Iterator[Tuple[int, int, T]]:
+        """
+        Find all pattern occurrences in a text, overlapping ones included.
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Iterator of (start, end, value) tuples, where text[start:end] is the matched pattern
+        """
+        if not self._built:
+            raise RuntimeError("build() must be called before search()")
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in output[node]:
+                yield index + 1 - length, index + 1, value
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from db_manager import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    def __init__(self, db: DatabaseManager, max_workers: int = 4):
+        """
+        Async facade over DatabaseManager for use inside aiogram handlers.
+
+        Every public DatabaseManager method is available under the same name
+        as a coroutine that runs the query on a bounded thread pool, so a slow
+        query or a write lock held by the scraper only occupies one worker
+        instead of stalling the event loop and every other chat with it.
+
+        Args:
+            db: Database manager to run the queries on
+            max_workers: Maximum number of queries running at the same time (default: 4)
+        """
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking callable on the database thread pool.
+
+        Args:
+            func: Callable to run
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            Return value of the callable
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    def close(self):
+        """Wait for running queries to finish and close the database"""
+        self._executor.shutdown(wait=True)
+        self.db.close()
+        logging.info("Async database facade closed")
@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from stand_in import make_vacancies
+from db_manager import DatabaseManager
+from async_db import AsyncDatabaseManager
+
+
+async def handler_latencies(db: DatabaseManager, adb: AsyncDatabaseManager, use_async: bool, args):
+    """
+    Run one slow query next to several quick /latest queries on one event loop.
+
+    Returns:
+        Milliseconds until each quick query finished, measured from the start
+    """
+    def slow_query():
+        # Stands in for a query waiting on the scraper's write lock
+        time.sleep(args.slow)
+        return db.count_vacancies()
+
+    async def call(func, *call_args):
+        if use_async:
+            return await adb.run(func, *call_args)
+        return func(*call_args)
+
+    started = time.perf_counter()
+
+    async def quick():
+        await call(db.get_latest_vacancies, 5)
+        return (time.perf_counter() - started) * 1000
+
+    _, *latencies = await asyncio.gather(call(slow_query), *(quick() for _ in range(args.handlers)))
+    return latencies
+
+
+if __name__ == "__main__":
+    # How long quick bot queries wait behind a slow one, called directly vs through the async facade
+    parser = argparse.ArgumentParser(description='Benchmark handler latency with a slow query in flight')
+    parser.add_argument('--slow', type=float, default=2.0, help='Duration of the slow query in seconds')
+    parser.add_argument('--handlers', type=int, default=5, help='Number of concurrent quick queries')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "latency.db"))
+        db.bulk_upsert_vacancies(make_vacancies(1000))
+        adb = AsyncDatabaseManager(db)
+        try:
+            for use_async in (False, True):
+                latencies = asyncio.run(handler_latencies(db, adb, use_async, args))
+                label = 'async facade' if use_async else 'direct calls'
+                print(f"{label}: {args.handlers} quick queries done after "
+                      f"{min(latencies):.1f}-{max(latencies):.1f} ms")
+        finally:
+            adb.close()
+            db.close()
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+import urllib.request
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from stand_in import start_server
+from stand_in_telegram import make_app
+from notifier import NotificationFanout
+
+# Token in the format aiogram validates, never sent anywhere but the stand-in
+TOKEN = '123456:benchmark'
+
+
+def make_bot(base_url: str) -> Bot:
+    return Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+
+
+def server_stats(base_url: str, path: str = 'stats') -> dict:
+    with urllib.request.urlopen(f"{base_url}/{path}") as response:
+        return json.load(response)
+
+
+def run_fanout(base_url: str, deliveries) -> int:
+    """Send through NotificationFanout on one event loop; returns the number of chats fully delivered"""
+    async def deliver():
+        bot = make_bot(base_url)
+        try:
+            return await NotificationFanout(bot).deliver(deliveries)
+        finally:
+            await bot.session.close()
+
+    return sum(asyncio.run(deliver()).values())
+
+
+def run_old_loop(base_url: str, deliveries) -> int:
+    """
+    Send the way notify_subscribers used to, one asyncio.run per message.
+
+    A fresh bot session per message keeps it from failing with 'Event loop is
+    closed' after the first message, which the original code did.
+    """
+    async def send(chat_id, text):
+        bot = make_bot(base_url)
+        try:
+            await bot.send_message(chat_id, text)
+        finally:
+            await bot.session.close()
+
+    delivered = 0
+    for chat_id, messages in deliveries.items():
+        try:
+            for message in messages:
+                asyncio.run(send(chat_id, message['text']))
+            delivered += 1
+        except Exception:
+            pass
+    return delivered
+
+
+if __name__ == "__main__":
+    # Notification throughput against a Bot API stand-in with latency and Telegram's global rate limit
+    parser = argparse.ArgumentParser(description='Benchmark the notification fan-out')
+    parser.add_argument('--chats', type=int, default=200, help='Number of subscribed chats')
+    parser.add_argument('--messages', type=int, default=5, help='Messages per chat')
+    parser.add_argument('--delay', type=float, default=0.1, help='Latency of the stand-in Bot API in seconds')
+    parser.add_argument('--old', action='store_true',
+                        help='Also time the old one-event-loop-per-message path (slow: ~0.4 s per message)')
+    args = parser.parse_args()
+    # Retries after a 429 are expected here, only failures are worth printing
+    logging.basicConfig(level=logging.ERROR)
+
+    base_url = start_server(make_app(args.delay))
+    deliveries = {chat_id: [{'text': f"Vacancy {i}"} for i in range(args.messages)]
+                  for chat_id in range(1, args.chats + 1)}
+    paths = [('fan-out', run_fanout)] + ([('old loop', run_old_loop)] if args.old else [])
+    for label, run in paths:
+        server_stats(base_url, 'reset')
+        started = time.perf_counter()
+        delivered = run(base_url, deliveries)
+        elapsed = time.perf_counter() - started
+        stats = server_stats(base_url)
+        gap = f"{stats['min_chat_gap']:.2f}s" if stats['min_chat_gap'] is not None else "n/a"
+        print(f"{label:>8}: {stats['ok']} messages to {delivered}/{args.chats} chats in {elapsed:.1f}s "
+              f"({stats['ok'] / elapsed:.1f} msg/sec), {stats['too_many_requests']} answered 429, "
+              f"shortest gap between messages to one chat {gap}")
@@ -0,0 +1,37 @@
+import argparse
+import time
+
+from stand_in import start_server
+from stand_in_hh import make_app
+from web_hh_scrapping import HHScraper, FETCH_MODES
+
+
+def fetch_time(base_url: str, fetch_mode: str, pages: int, args) -> float:
+    """Fetch pages search result pages in one fetch mode; returns the elapsed seconds"""
+    scraper = HHScraper("Python", pages_to_scrape=pages, fetch_mode=fetch_mode, max_concurrency=args.concurrency,
+                        requests_per_second=args.rate, burst=args.burst, use_cache=False)
+    scraper.base_url = f"{base_url}/search/vacancy"
+    try:
+        started = time.perf_counter()
+        results = scraper.fetch_pages(list(range(pages)))
+        elapsed = time.perf_counter() - started
+    finally:
+        scraper.close()
+    assert all(html for html, _ in results), "some pages failed to fetch"
+    return elapsed
+
+
+if __name__ == "__main__":
+    # Fetch time of the search result pages against a local stand-in with hh.kz-like latency
+    parser = argparse.ArgumentParser(description='Benchmark the page fetch modes')
+    parser.add_argument('--pages', type=int, default=10, help='Number of result pages to fetch')
+    parser.add_argument('--delay', type=float, default=0.2, help='Latency of the stand-in server in seconds')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum requests in flight (async mode)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Requests per second allowed (async mode)')
+    parser.add_argument('--burst', type=int, default=4, help='Requests sent at once before rate limiting')
+    args = parser.parse_args()
+
+    base_url = start_server(make_app(args.delay))
+    for fetch_mode in FETCH_MODES:
+        elapsed = fetch_time(base_url, fetch_mode, args.pages, args)
+        print(f"{fetch_mode:>10}: {args.pages} pages in {elapsed:.2f}s ({args.pages / elapsed:.1f} pages/sec)")
@@ -0,0 +1,106 @@
+import argparse
+import random
+import re
+import time
+
+import stand_in  # noqa: F401  (puts the project on the import path)
+from subscription_matcher import SubscriptionMatcher, normalize_location
+from vacancy_utils import normalize_text
+
+KEYWORDS = ['python', 'django', 'flask', 'fastapi', 'data engineer', 'backend', 'ml', 'golang', 'java', 'devops',
+            'senior', 'junior', 'middle', 'аналитик', 'разработчик', 'postgres', 'docker', 'kubernetes', 'react',
+            'sql'] + [f"kw{i}" for i in range(2000)]
+SKILLS = ['Django', 'Docker', 'PostgreSQL', 'REST API', 'Git', 'Linux', 'Kafka', 'Redis', 'AWS', 'SQL'] + \
+         [f"Skill{i}" for i in range(300)]
+CITIES = ['Алматы', 'Астана', 'Шымкент', 'Караганда', 'Актобе']
+
+
+def random_subscription(rng: random.Random, user_id: int) -> dict:
+    """Subscription with a random mix of the /subscribe filters"""
+    subscription = {'user_id': user_id}
+    if rng.random() < 0.7:
+        subscription['keywords'] = rng.sample(KEYWORDS, rng.randint(1, 3))
+    if rng.random() < 0.3:
+        subscription['skills'] = rng.sample(SKILLS, rng.randint(1, 2))
+    if rng.random() < 0.3:
+        subscription['min_salary'] = rng.choice([200000, 300000, 500000, 800000])
+    if rng.random() < 0.4:
+        subscription['locations'] = rng.sample(CITIES, rng.randint(1, 2))
+    return subscription
+
+
+def random_vacancy(rng: random.Random, vacancy_id: int) -> dict:
+    """Vacancy with a title of common and rare keywords, five skills and an hh.kz-style salary"""
+    low = rng.choice([200, 300, 400, 500, 700]) * 1000
+    return {
+        'id': str(vacancy_id),
+        'title': ' '.join(rng.sample(KEYWORDS[:20], 3) + rng.sample(KEYWORDS[20:], 2)).title(),
+        'skills': rng.sample(SKILLS, 5),
+        'location': rng.choice(CITIES) + ', район',
+        'salary': rng.choice([f"от {low:,} ₸", f"{low:,} – {low * 2:,} ₸", 'Not specified']).replace(',', ' ')
+    }
+
+
+class SubscriptionLoop:
+    """Checks every subscription in turn with precompiled keyword regexes, the approach the matcher replaces"""
+
+    def __init__(self, subscriptions):
+        self.subscriptions = []
+        for subscription in subscriptions:
+            filters = SubscriptionMatcher._normalize(subscription)
+            keywords = [re.compile(r'(?<!\w)' + re.escape(keyword) + r'(?!\w)') for keyword in filters['keywords']]
+            self.subscriptions.append((subscription['user_id'], keywords, set(filters['skills']),
+                                       set(filters['locations']), filters['min_salary']))
+
+    def match(self, vacancy):
+        skills = {SubscriptionMatcher._normalize_skill(skill) for skill in vacancy['skills']}
+        text = '\n'.join([normalize_text(vacancy['title'])] + sorted(skills))
+        location = normalize_location(vacancy['location'])
+        salary = SubscriptionMatcher._salary_ceiling(vacancy)
+
+        user_ids = []
+        for user_id, keywords, required_skills, locations, min_salary in self.subscriptions:
+            if keywords and not any(keyword.search(text) for keyword in keywords):
+                continue
+            if not skills.issuperset(required_skills):
+                continue
+            if locations and location not in locations:
+                continue
+            if min_salary is not None and (salary is None or salary < min_salary):
+                continue
+            user_ids.append(user_id)
+        return user_ids
+
+
+if __name__ == "__main__":
+    # Matching a batch of new vacancies against many random subscriptions
+    parser = argparse.ArgumentParser(description='Benchmark the subscription matcher')
+    parser.add_argument('--subscriptions', type=int, default=100000, help='Number of subscriptions')
+    parser.add_argument('--vacancies', type=int, default=500, help='Vacancies in the batch')
+    parser.add_argument('--compare', type=int, default=20,
+                        help='Vacancies also matched by the per-subscription loop (0 to skip it)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    subscriptions = [random_subscription(rng, user_id) for user_id in range(args.subscriptions)]
+    vacancies = [random_vacancy(rng, vacancy_id) for vacancy_id in range(args.vacancies)]
+
+    started = time.perf_counter()
+    matcher = SubscriptionMatcher(subscriptions)
+    built = time.perf_counter() - started
+    started = time.perf_counter()
+    matches = [matcher.match(vacancy) for vacancy in vacancies]
+    matched = time.perf_counter() - started
+    print(f"matcher: {args.subscriptions} subscriptions x {args.vacancies} vacancies: build {built:.2f}s, "
+          f"match {matched:.2f}s, {sum(map(len, matches))} pairs")
+
+    if args.compare:
+        compared = vacancies[:args.compare]
+        loop = SubscriptionLoop(subscriptions)
+        started = time.perf_counter()
+        expected = [loop.match(vacancy) for vacancy in compared]
+        looped = time.perf_counter() - started
+        assert [sorted(user_ids) for user_ids in matches[:len(compared)]] == expected, "results differ"
+        print(f"   loop: {len(compared)} vacancies in {looped:.2f}s, about "
+              f"{looped / len(compared) * args.vacancies:.0f}s for {args.vacancies}; same results")
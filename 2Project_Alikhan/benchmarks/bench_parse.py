@@ -0,0 +1,36 @@
+import argparse
+import time
+
+import stand_in  # noqa: F401  (puts the project on the import path)
+from stand_in_hh import search_page
+from web_hh_scrapping import HHScraper, PARSER_BACKENDS
+
+
+if __name__ == "__main__":
+    # Parse throughput of every backend on search result pages shaped like hh.kz ones
+    parser = argparse.ArgumentParser(description='Benchmark the HTML parser backends')
+    parser.add_argument('--pages', type=int, default=50, help='Number of pages parsed per backend')
+    parser.add_argument('--items', type=int, default=50, help='Vacancies per page')
+    args = parser.parse_args()
+
+    pages = [search_page("Python", page, args.items) for page in range(args.pages)]
+    outputs = {}
+    for backend in PARSER_BACKENDS:
+        scraper = HHScraper("Python", parser_backend=backend, use_cache=False)
+        try:
+            started = time.perf_counter()
+            outputs[backend] = [scraper.parse_vacancies(html) for html in pages]
+            elapsed = time.perf_counter() - started
+        finally:
+            scraper.close()
+        print(f"{backend:>11}: {args.pages} pages in {elapsed:.2f}s ({args.pages / elapsed:.1f} pages/sec)")
+
+    # Timestamps differ between runs, everything else must be the same
+    def comparable(pages_vacancies):
+        return [[{k: v for k, v in vacancy.items() if k != 'created_at'} for vacancy in vacancies]
+                for vacancies in pages_vacancies]
+
+    reference = comparable(outputs[PARSER_BACKENDS[0]])
+    assert all(len(vacancies) == args.items for vacancies in reference), "vacancies missing from the output"
+    assert all(comparable(output) == reference for output in outputs.values()), "backends disagree"
+    print(f"All backends produced the same {args.pages * args.items} vacancies")
@@ -0,0 +1,40 @@
+import argparse
+import os
+import tempfile
+import time
+
+from stand_in import make_vacancies
+from db_manager import DatabaseManager
+
+
+def upsert_rate(method: str, vacancies, directory: str) -> float:
+    """Write vacancies to a fresh database with one of the upsert paths; returns rows per second"""
+    db = DatabaseManager(os.path.join(directory, f"{method}_{len(vacancies)}.db"))
+    try:
+        started = time.perf_counter()
+        if method == 'bulk':
+            assert db.bulk_upsert_vacancies(vacancies) is not None, "bulk upsert rolled back"
+        else:
+            for vacancy in vacancies:
+                db.upsert_vacancy(vacancy)
+        elapsed = time.perf_counter() - started
+        assert db.count_vacancies() == len(vacancies), "rows missing from the database"
+    finally:
+        db.close()
+    return len(vacancies) / elapsed
+
+
+if __name__ == "__main__":
+    # Write throughput of one transaction per row vs one per batch on a file database
+    parser = argparse.ArgumentParser(description='Benchmark the per-row and bulk vacancy upserts')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Batch sizes to write')
+    parser.add_argument('--per-row-max', type=int, default=10000,
+                        help='Largest batch also written row by row (that path is slow)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            vacancies = make_vacancies(size)
+            methods = ['per-row', 'bulk'] if size <= args.per_row_max else ['bulk']
+            for method in methods:
+                print(f"{method:>7} n={size}: {upsert_rate(method, vacancies, directory):,.0f} rows/sec")
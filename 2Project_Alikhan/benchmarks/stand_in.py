@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+import threading
+from typing import Dict, List
+
+from aiohttp import web
+
+# Benchmarks import the project modules from the directory above this one
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+
+def start_server(app: web.Application, port: int = 0) -> str:
+    """
+    Serve an aiohttp application on its own event loop in a daemon thread.
+
+    Args:
+        app: Application to serve
+        port: Port to listen on (default: 0 = any free port)
+
+    Returns:
+        Base URL of the server, e.g. http://127.0.0.1:8765
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}"
+
+
+def make_vacancies(count: int, prefix: str = '') -> List[Dict]:
+    """
+    Build vacancies shaped like the scraper's output.
+
+    Args:
+        count: Number of vacancies
+        prefix: Prefix of the vacancy IDs, to build distinct batches (default: none)
+
+    Returns:
+        List of vacancy dictionaries
+    """
+    return [{
+        'id': f"{prefix}{i}",
+        'title': f"Python Developer {i}",
+        'company': f"Company {i % 50}",
+        'link': f"https://hh.kz/vacancy/{prefix}{i}",
+        'skills': ['Python', 'Django', f"Skill{i % 30}"],
+        'salary': f"от {i % 5 + 3}00 000 ₸",
+        'experience': '1-3 года',
+        'location': ['Алматы', 'Астана', 'Шымкент'][i % 3],
+        'publication_date': '1 day ago'
+    } for i in range(count)]
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+
+from aiohttp import web
+
+LOCATIONS = ['Алматы', 'Астана', 'Шымкент']
+
+# Markup around the results that a real page has plenty of and a parser has to skip
+FILLER = '<div class="noise">' + '<span>x</span>' * 2000 + '</div>'
+
+
+def vacancy_block(vacancy_id: int, query: str) -> str:
+    """Search result block shaped like the ones on hh.kz"""
+    return f'''<div class="vacancy-serp-item-body"><div>
+<a class="serp-item__title" href="https://hh.kz/vacancy/{vacancy_id}?from=serp">{query} Developer {vacancy_id}</a>
+<a data-qa="vacancy-serp__vacancy-employer" href="#">Company {vacancy_id % 7}</a>
+<div data-qa="vacancy-serp__vacancy_snippet_requirement">Опыт работы с Python от 3 лет, Django, postgres, REST API. Знание Docker</div>
+<span data-qa="vacancy-serp__vacancy-compensation">от {vacancy_id % 5 + 3}00 000 ₸ до вычета налогов</span>
+<div data-qa="vacancy-serp__vacancy-address">{LOCATIONS[vacancy_id % 3]}</div>
+<span data-qa="vacancy-serp__vacancy-date">1 day ago</span>
+</div></div>'''
+
+
+def search_page(query: str, page: int, items_on_page: int = 50, total: int = 3000) -> str:
+    """Full search result page with a result count header and items_on_page vacancies"""
+    first_id = 100000 + page * items_on_page
+    blocks = ''.join(vacancy_block(first_id + i, query) for i in range(items_on_page))
+    header = f'<h1 data-qa="vacancies-search-header">Найдено {total} вакансий</h1>'
+    return f'<html><body>{FILLER}{header}{blocks}{FILLER}</body></html>'
+
+
+def make_app(delay: float = 0.2, total: int = 3000) -> web.Application:
+    """
+    Stand-in for the hh.kz search and vacancy pages.
+
+    Every response is delayed by delay seconds to model the network and
+    server time of the real site. Search pages carry an ETag and answer
+    If-None-Match with 304; /stats returns the number of requests served.
+
+    Args:
+        delay: Latency of every response in seconds (default: 0.2)
+        total: Number of results the search header reports (default: 3000)
+
+    Returns:
+        aiohttp application
+    """
+    stats = {'requests': 0}
+
+    async def search(request):
+        stats['requests'] += 1
+        await asyncio.sleep(delay)
+        query = request.query.get('text', 'Python')
+        page = int(request.query.get('page', 0))
+        items_on_page = int(request.query.get('items_on_page', 50))
+        etag = f'"{query}-{page}-{items_on_page}-{request.query.get("area", "")}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=search_page(query, page, items_on_page, total), content_type='text/html',
+                            headers={'ETag': etag})
+
+    async def vacancy(request):
+        stats['requests'] += 1
+        await asyncio.sleep(delay)
+        vacancy_id = request.match_info['vacancy_id']
+        return web.Response(content_type='text/html', text=f'''<html><body>
+<h1 data-qa="vacancy-title">Vacancy {vacancy_id}</h1>
+<div data-qa="vacancy-salary"><span>от 500 000 до 800 000 ₸ на руки</span></div>
+<p data-qa="vacancy-experience">1–3 года</p>
+<p data-qa="vacancy-view-employment-mode">Полная занятость, полный день</p>
+<div data-qa="vacancy-description"><p>Описание вакансии {vacancy_id}</p></div>
+<div class="bloko-tag-list"><span data-qa="skills-element"><span class="bloko-tag__section_text">Python</span></span>
+<span data-qa="skills-element"><span class="bloko-tag__section_text">PostgreSQL</span></span></div>
+</body></html>''')
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get('/search/vacancy', search)
+    app.router.add_get('/vacancy/{vacancy_id}', vacancy)
+    app.router.add_get('/stats', get_stats)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve stand-in hh.kz pages locally')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--delay', type=float, default=0.2, help='Latency of every response in seconds')
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay), host='127.0.0.1', port=args.port)
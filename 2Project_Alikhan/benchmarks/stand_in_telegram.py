@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import collections
+import time
+
+from aiohttp import web
+
+
+def make_app(delay: float = 0.1, global_limit: int = 30) -> web.Application:
+    """
+    Stand-in for the sendMessage method of the Telegram Bot API.
+
+    Every response is delayed by delay seconds. Beyond global_limit messages
+    in the last second the server answers 429 with retry_after=1, the way
+    Telegram does. /stats returns the number of messages accepted and
+    rejected and the shortest gap between two messages to the same chat;
+    /reset clears them.
+
+    Args:
+        delay: Latency of every response in seconds (default: 0.1)
+        global_limit: Messages accepted per second across all chats (default: 30)
+
+    Returns:
+        aiohttp application
+    """
+    accepted = collections.deque()
+    sent_to = collections.defaultdict(list)
+    stats = {'ok': 0, 'too_many_requests': 0}
+
+    async def send_message(request):
+        if request.content_type == 'application/json':
+            data = await request.json()
+        else:
+            data = await request.post()
+        chat_id = int(data['chat_id'])
+        await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        while accepted and now - accepted[0] > 1:
+            accepted.popleft()
+        if len(accepted) >= global_limit:
+            stats['too_many_requests'] += 1
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1}
+            }, status=429)
+
+        accepted.append(now)
+        sent_to[chat_id].append(now)
+        stats['ok'] += 1
+        return web.json_response({'ok': True, 'result': {
+            'message_id': stats['ok'],
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': data.get('text', '')
+        }})
+
+    async def get_stats(request):
+        gaps = [later - earlier for times in sent_to.values() for earlier, later in zip(times, times[1:])]
+        return web.json_response(dict(stats, chats=len(sent_to), min_chat_gap=min(gaps, default=None)))
+
+    async def reset(request):
+        accepted.clear()
+        sent_to.clear()
+        stats.update(ok=0, too_many_requests=0)
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/sendMessage', send_message)
+    app.router.add_get('/stats', get_stats)
+    app.router.add_get('/reset', reset)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve a stand-in Telegram Bot API locally')
+    parser.add_argument('--port', type=int, default=8081, help='Port to listen on')
+    parser.add_argument('--delay', type=float, default=0.1, help='Latency of every response in seconds')
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay), host='127.0.0.1', port=args.port)
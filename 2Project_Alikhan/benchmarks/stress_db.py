@@ -0,0 +1,71 @@
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from stand_in import make_vacancies
+from db_manager import DatabaseManager
+
+
+class ErrorCounter(logging.Handler):
+    """Collects the errors DatabaseManager logs instead of raising"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+if __name__ == "__main__":
+    # Writer threads upserting while reader threads query, the way the scraper and the bot share the database
+    parser = argparse.ArgumentParser(description='Stress the database with concurrent writers and readers')
+    parser.add_argument('--writers', type=int, default=4, help='Number of writer threads')
+    parser.add_argument('--readers', type=int, default=8, help='Number of reader threads')
+    parser.add_argument('--batches', type=int, default=20, help='Batches upserted by every writer')
+    parser.add_argument('--batch-size', type=int, default=200, help='Vacancies per batch')
+    args = parser.parse_args()
+
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+    writing = threading.Event()
+    writing.set()
+    read_rounds = []
+
+    def write(writer):
+        for batch in range(args.batches):
+            db.bulk_upsert_vacancies(make_vacancies(args.batch_size, prefix=f"{writer}-{batch}-"))
+
+    def read():
+        rounds = 0
+        while writing.is_set():
+            db.get_latest_vacancies(5)
+            db.get_vacancies_by_keyword('python', 10)
+            db.get_stats()
+            rounds += 1
+        read_rounds.append(rounds)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "stress.db"))
+        writers = [threading.Thread(target=write, args=(writer,)) for writer in range(args.writers)]
+        readers = [threading.Thread(target=read) for _ in range(args.readers)]
+        started = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        writing.clear()
+        for thread in readers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        expected = args.writers * args.batches * args.batch_size
+        print(f"{expected} vacancies written by {args.writers} threads in {elapsed:.1f}s, "
+              f"{sum(read_rounds)} read rounds by {args.readers} threads")
+        print(f"{db.count_vacancies()} vacancies in the database, {len(errors.messages)} errors")
+        for message in errors.messages[:5]:
+            print(f"  {message}")
+        db.close()
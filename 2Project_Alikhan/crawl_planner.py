@@ -0,0 +1,220 @@
+import logging
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from web_hh_scrapping import HHScraper, ITEMS_ON_PAGE, RESULT_CAP
+
+# Search filters that split the results of a query into disjoint parts, tried in this order:
+# every vacancy has exactly one experience level and one work schedule
+DEFAULT_FACETS = [
+    ('experience', ['noExperience', 'between1And3', 'between3And6', 'moreThan6']),
+    ('schedule', ['fullDay', 'shift', 'flexible', 'remote', 'flyInFlyOut'])
+]
+
+class CrawlPlanner:
+    def __init__(self, scraper: HHScraper, query: Optional[str] = None, areas: Optional[List[str]] = None,
+                 facets: Optional[List[Tuple[str, List[str]]]] = None, result_cap: int = RESULT_CAP,
+                 area: Optional[str] = None):
+        """
+        Crawls a broad query completely by splitting it into partitions that each stay under hh's result cap.
+
+        hh only shows the first result_cap results of a search, so paging
+        through a broad query silently loses the rest. The planner reads the
+        result count from the first page of the query and, while a partition
+        has more results than the cap, splits it by the next facet (a search
+        filter such as experience or area) into sub-queries. The pages of all
+        partitions are then fetched together through the scraper's shared rate
+        limiter and merged, deduplicating vacancies by ID.
+
+        The plan is kept for the following runs, which only fetch the first
+        pages of its partitions (needed for the crawl anyway); a partition is
+        split further only once its count grows past the cap.
+
+        Args:
+            scraper: Scraper whose fetching, parsing and storage are shared
+            query: Search query (default: the scraper's search_query)
+            areas: hh area IDs to split by before the other facets, e.g. ['160', '159'] for
+                Almaty and Astana; vacancies outside them are only found while the whole
+                search fits under the cap (default: no area split)
+            facets: (filter name, values) pairs to split by, each a partition of all vacancies
+                (default: DEFAULT_FACETS)
+            result_cap: Maximum number of results hh shows for one search (default: RESULT_CAP)
+            area: hh area ID every partition is limited to, e.g. '40' for Kazakhstan
+                (default: none, like the scraper's own search)
+        """
+        self.scraper = scraper
+        self.query = query or scraper.search_query
+        self.facets = list(facets if facets is not None else DEFAULT_FACETS)
+        if areas:
+            self.facets.insert(0, ('area', list(areas)))
+        self.result_cap = result_cap
+        self.root_filters = {'area': area} if area else {}
+        self.last_coverage_report: Dict = {}
+        self._total: Optional[int] = None
+        # Filters and depth of the partitions planned by the last run
+        self._plan: Optional[List[Dict]] = None
+
+    @property
+    def store(self):
+        return self.scraper.store
+
+    @property
+    def all_vacancies_file(self) -> str:
+        return self.scraper.all_vacancies_file
+
+    def save_new_vacancies(self, new_vacancies: List[Dict]) -> Optional[str]:
+        return self.scraper.save_new_vacancies(new_vacancies)
+
+    def _fetch(self, requests: List[Tuple[Dict, int]]) -> List[Tuple[str, bool]]:
+        return self.scraper.fetch_requests([(self.query, page, partition['filters']) for partition, page in requests])
+
+    def plan(self) -> List[Dict]:
+        """
+        Split the query into partitions under the result cap, starting from the last run's plan.
+
+        The first page of every partition is fetched to read its result count
+        (all partitions of a level at once) and kept for the crawl.
+
+        Returns:
+            List of partition dictionaries with the 'filters', their result 'count',
+            whether they are still 'capped' and the 'first_page' HTML
+        """
+        if self._plan is None:
+            level = [{'filters': dict(self.root_filters), 'depth': 0}]
+        else:
+            level = [dict(partition) for partition in self._plan]
+        partitions = []
+        while level:
+            next_level = []
+            for partition, (html, not_modified) in zip(level, self._fetch([(partition, 0) for partition in level])):
+                partition['first_page'] = html
+                partition['not_modified'] = not_modified
+                partition['count'] = self.scraper.parse_result_count(html) if html else None
+                if partition['count'] is None:
+                    logging.warning(f"Couldn't read the result count of {self.describe(partition)}")
+
+                # Split by the next facet while there are more results than hh shows
+                capped = partition['count'] is not None and partition['count'] > self.result_cap
+                if capped and partition['depth'] < len(self.facets):
+                    name, values = self.facets[partition['depth']]
+                    for value in values:
+                        next_level.append({'filters': dict(partition['filters'], **{name: value}),
+                                           'depth': partition['depth'] + 1})
+                else:
+                    partition['capped'] = capped
+                    partitions.append(partition)
+            level = next_level
+
+        # The partitions split the query, so their counts add up to its total
+        counts = [partition['count'] for partition in partitions]
+        self._total = None if None in counts else sum(counts)
+        if self._plan is None or len(partitions) != len(self._plan):
+            logging.info(f"Planned {len(partitions)} partitions for query '{self.query}'")
+        self._plan = [{'filters': partition['filters'], 'depth': partition['depth']} for partition in partitions]
+        return partitions
+
+    def describe(self, partition: Dict) -> str:
+        """Describe a partition's filters for logs and reports"""
+        filters = {name: value for name, value in partition['filters'].items()
+                   if self.root_filters.get(name) != value}
+        return ', '.join(f"{name}={value}" for name, value in filters.items()) or 'all'
+
+    def iter_pages(self) -> Iterator[Dict]:
+        """
+        Plan the partitions and crawl them together, yielding every page as soon as it's processed.
+
+        Returns:
+            Iterator of dictionaries like HHScraper.iter_pages with the 'partition' filters added
+        """
+        scraper = self.scraper
+        partitions = self.plan()
+        seen_ids = set()
+
+        for partition in partitions:
+            # Without a result count the partition is crawled as deep as a plain crawl would go
+            if partition['count'] is None:
+                pages = scraper.pages_to_scrape
+            else:
+                pages = max(1, math.ceil(min(partition['count'], self.result_cap) / ITEMS_ON_PAGE))
+            partition.update(pages=pages, next_page=1, listed=0, new=0, known_streak=0, stop=False)
+
+        # The first pages were fetched while planning, the rest are fetched in waves across all partitions
+        pending = [(partition, 0, partition.pop('first_page'), partition.pop('not_modified')) for partition in partitions]
+        while pending:
+            for partition, page, html, not_modified in pending:
+                if not html:
+                    logging.warning(f"No HTML content received for page {page} of {self.describe(partition)}")
+                    continue
+
+                page_vacancies = scraper.parse_page(page, html, not_modified, self.query, partition['filters'])
+                partition['listed'] += len(page_vacancies)
+                page_new, page_updated = scraper.store_page(page_vacancies, seen_ids)
+                partition['new'] += len(page_new)
+
+                # An incremental crawl stops a partition at pages it already knows, like a single query
+                if page_vacancies and not page_new and not page_updated:
+                    partition['known_streak'] += 1
+                else:
+                    partition['known_streak'] = 0
+                if len(page_vacancies) < ITEMS_ON_PAGE or (
+                        scraper.incremental and partition['known_streak'] >= scraper.stop_after_known_pages):
+                    partition['stop'] = True
+
+                yield {
+                    'query': self.query,
+                    'partition': partition['filters'],
+                    'page': page,
+                    'vacancies': page_vacancies,
+                    'new': page_new,
+                    'updated': page_updated
+                }
+
+            # Fill the next wave breadth first across the partitions that still have pages
+            wave = []
+            active = [partition for partition in partitions if not partition['stop'] and partition['next_page'] < partition['pages']]
+            while active and len(wave) < scraper.max_concurrency:
+                partition = min(active, key=lambda partition: partition['next_page'])
+                wave.append((partition, partition['next_page']))
+                partition['next_page'] += 1
+                if partition['next_page'] >= partition['pages']:
+                    active.remove(partition)
+            pending = [(partition, page, html, not_modified)
+                       for (partition, page), (html, not_modified) in zip(wave, self._fetch(wave))]
+
+        self.last_coverage_report = {
+            'query': self.query,
+            'total': self._total,
+            'unique': len(seen_ids),
+            'partitions': [
+                {
+                    'filters': self.describe(partition),
+                    'count': partition['count'],
+                    'listed': partition['listed'],
+                    'new': partition['new'],
+                    'capped': partition['capped']
+                }
+                for partition in partitions
+            ]
+        }
+        scraper.store.maybe_compact()
+        logging.info(self.format_coverage(self.last_coverage_report))
+
+    @staticmethod
+    def format_coverage(report: Dict) -> str:
+        """
+        Format a coverage report as text.
+
+        Args:
+            report: Coverage report as in last_coverage_report
+
+        Returns:
+            Multi-line summary with one line per partition; capped partitions are marked
+        """
+        lines = [f"Coverage of '{report['query']}': {report['unique']} unique vacancies in {len(report['partitions'])} partitions"
+                 + (f", hh reports {report['total']}" if report['total'] is not None else "")]
+        for partition in report['partitions']:
+            lines.append(
+                f"  {partition['filters']}: {partition['listed']}/{partition['count']} listed, {partition['new']} new"
+                + (" - STILL CAPPED, results lost" if partition['capped'] else "")
+            )
+        return "\n".join(lines)
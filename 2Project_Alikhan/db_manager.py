@@ -1,332 +1,1472 @@
-import sqlite3
-import json
-import logging
-from datetime import datetime
-
-# Setup logging
-logging.basicConfig(
-    filename='db.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-class DatabaseManager:
-    def __init__(self, db_name="vacancies.db"):
-        """Initialize database connection and create tables if they don't exist"""
-        self.db_name = db_name
-        try:
-            self.conn = sqlite3.connect(db_name)
-            self.cursor = self.conn.cursor()
-            self.create_tables()
-            logging.info(f"Connected to database: {db_name}")
-        except Exception as e:
-            logging.error(f"Error connecting to database: {e}")
-            raise
-    
-    def create_tables(self):
-        """Create necessary tables if they don't exist"""
-        # Create vacancies table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS vacancies (
-            id TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            company TEXT NOT NULL,
-            link TEXT NOT NULL,
-            skills TEXT,
-            salary TEXT,
-            experience TEXT,
-            location TEXT,
-            publication_date TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Create subscriptions table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS subscriptions (
-            user_id INTEGER PRIMARY KEY,
-            keywords TEXT,
-            active INTEGER DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Create notifications table
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS notifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            vacancy_id TEXT,
-            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (vacancy_id) REFERENCES vacancies (id),
-            UNIQUE(user_id, vacancy_id)
-        )
-        ''')
-        
-        self.conn.commit()
-        logging.info("Database tables created or already exist")
-    
-    def add_vacancy(self, vacancy):
-        """Add a vacancy to the database if it doesn't exist"""
-        try:
-            # Convert skills list to JSON string if it exists
-            skills_json = json.dumps(vacancy.get('skills', []), ensure_ascii=False) if 'skills' in vacancy else None
-            
-            # Insert vacancy data
-            self.cursor.execute('''
-            INSERT OR IGNORE INTO vacancies (id, title, company, link, skills, salary, experience, location, publication_date, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                vacancy['id'],
-                vacancy['title'],
-                vacancy['company'],
-                vacancy['link'],
-                skills_json,
-                vacancy.get('salary', 'Not specified'),
-                vacancy.get('experience', 'Not specified'),
-                vacancy.get('location', 'Not specified'),
-                vacancy.get('publication_date', 'Unknown date'),
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ))
-            self.conn.commit()
-            
-            # Check if the vacancy was actually inserted
-            changes = self.cursor.rowcount
-            if changes > 0:
-                logging.info(f"Added vacancy to database: {vacancy['title']} at {vacancy['company']}")
-                return True
-            else:
-                logging.info(f"Vacancy already exists in database: {vacancy['title']}")
-                return False
-        except Exception as e:
-            logging.error(f"Error adding vacancy to database: {e}")
-            return False
-    
-    def add_multiple_vacancies(self, vacancies):
-        """Add multiple vacancies to the database"""
-        added_count = 0
-        for vacancy in vacancies:
-            if self.add_vacancy(vacancy):
-                added_count += 1
-        logging.info(f"Added {added_count} new vacancies to database")
-        return added_count
-    
-    def get_vacancy_by_id(self, vacancy_id):
-        """Get a vacancy by its ID"""
-        try:
-            self.cursor.execute('SELECT * FROM vacancies WHERE id = ?', (vacancy_id,))
-            vacancy = self.cursor.fetchone()
-            if vacancy:
-                return self._vacancy_to_dict(vacancy)
-            return None
-        except Exception as e:
-            logging.error(f"Error getting vacancy by ID: {e}")
-            return None
-    
-    def get_vacancies_by_keyword(self, keyword, limit=None):
-        """Get vacancies that match a keyword in title or skills"""
-        try:
-            query = '''
-            SELECT * FROM vacancies 
-            WHERE title LIKE ? OR skills LIKE ? 
-            ORDER BY created_at DESC
-            '''
-            
-            if limit:
-                query += f' LIMIT {limit}'
-                
-            self.cursor.execute(query, (f'%{keyword}%', f'%{keyword}%'))
-            vacancies = self.cursor.fetchall()
-            result = [self._vacancy_to_dict(vacancy) for vacancy in vacancies]
-            logging.info(f"Found {len(result)} vacancies matching keyword: {keyword}")
-            return result
-        except Exception as e:
-            logging.error(f"Error searching vacancies by keyword: {e}")
-            return []
-    
-    def get_latest_vacancies(self, limit=5):
-        """Get the latest vacancies added to the database"""
-        try:
-            self.cursor.execute('''
-            SELECT * FROM vacancies 
-            ORDER BY created_at DESC 
-            LIMIT ?
-            ''', (limit,))
-            vacancies = self.cursor.fetchall()
-            result = [self._vacancy_to_dict(vacancy) for vacancy in vacancies]
-            logging.info(f"Retrieved {len(result)} latest vacancies")
-            return result
-        except Exception as e:
-            logging.error(f"Error getting latest vacancies: {e}")
-            return []
-    
-    def _vacancy_to_dict(self, vacancy_tuple):
-        """Convert a vacancy tuple from the database to a dictionary"""
-        id, title, company, link, skills_json, salary, experience, location, publication_date, created_at = vacancy_tuple
-        
-        # Parse skills JSON if it exists
-        skills = json.loads(skills_json) if skills_json else []
-        
-        return {
-            'id': id,
-            'title': title,
-            'company': company,
-            'link': link,
-            'skills': skills,
-            'salary': salary,
-            'experience': experience,
-            'location': location,
-            'publication_date': publication_date,
-            'created_at': created_at
-        }
-    
-    def add_subscription(self, user_id, keywords=None):
-        """Add or update a user subscription"""
-        try:
-            keywords_json = json.dumps(keywords, ensure_ascii=False) if keywords else None
-            
-            self.cursor.execute('''
-            INSERT OR REPLACE INTO subscriptions (user_id, keywords, active, created_at)
-            VALUES (?, ?, 1, ?)
-            ''', (
-                user_id,
-                keywords_json,
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ))
-            self.conn.commit()
-            logging.info(f"User {user_id} subscribed to vacancy updates")
-            return True
-        except Exception as e:
-            logging.error(f"Error adding subscription: {e}")
-            return False
-    
-    def remove_subscription(self, user_id):
-        """Remove a user subscription by setting active to 0"""
-        try:
-            self.cursor.execute('''
-            UPDATE subscriptions SET active = 0 WHERE user_id = ?
-            ''', (user_id,))
-            self.conn.commit()
-            logging.info(f"User {user_id} unsubscribed from vacancy updates")
-            return True
-        except Exception as e:
-            logging.error(f"Error removing subscription: {e}")
-            return False
-    
-    def get_all_active_subscribers(self):
-        """Get all active subscribers"""
-        try:
-            self.cursor.execute('SELECT user_id, keywords FROM subscriptions WHERE active = 1')
-            subscribers = self.cursor.fetchall()
-            result = []
-            for user_id, keywords_json in subscribers:
-                keywords = json.loads(keywords_json) if keywords_json else None
-                result.append({'user_id': user_id, 'keywords': keywords})
-            logging.info(f"Retrieved {len(result)} active subscribers")
-            return result
-        except Exception as e:
-            logging.error(f"Error getting active subscribers: {e}")
-            return []
-    
-    def add_notification(self, user_id, vacancy_id):
-        """Record that a notification was sent to a user for a specific vacancy"""
-        try:
-            self.cursor.execute('''
-            INSERT OR IGNORE INTO notifications (user_id, vacancy_id, sent_at)
-            VALUES (?, ?, ?)
-            ''', (
-                user_id,
-                vacancy_id,
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            logging.error(f"Error adding notification record: {e}")
-            return False
-    
-    def get_unsent_vacancies_for_user(self, user_id, limit=5):
-        """Get vacancies that haven't been sent to the user yet"""
-        try:
-            self.cursor.execute('''
-            SELECT * FROM vacancies 
-            WHERE id NOT IN (
-                SELECT vacancy_id FROM notifications WHERE user_id = ?
-            )
-            ORDER BY created_at DESC
-            LIMIT ?
-            ''', (user_id, limit))
-            
-            vacancies = self.cursor.fetchall()
-            result = [self._vacancy_to_dict(vacancy) for vacancy in vacancies]
-            logging.info(f"Found {len(result)} unsent vacancies for user {user_id}")
-            return result
-        except Exception as e:
-            logging.error(f"Error getting unsent vacancies: {e}")
-            return []
-    
-    def count_vacancies(self):
-        """Count the total number of vacancies in the database"""
-        try:
-            self.cursor.execute('SELECT COUNT(*) FROM vacancies')
-            count = self.cursor.fetchone()[0]
-            logging.info(f"Total vacancies in database: {count}")
-            return count
-        except Exception as e:
-            logging.error(f"Error counting vacancies: {e}")
-            return 0
-    
-    def get_stats(self):
-        """Get various statistics about the database"""
-        try:
-            stats = {}
-            
-            # Total vacancies
-            self.cursor.execute('SELECT COUNT(*) FROM vacancies')
-            stats['total_vacancies'] = self.cursor.fetchone()[0]
-            
-            # Vacancies by company
-            self.cursor.execute('''
-            SELECT company, COUNT(*) as count 
-            FROM vacancies 
-            GROUP BY company 
-            ORDER BY count DESC 
-            LIMIT 5
-            ''')
-            stats['companies'] = [{'name': row[0], 'count': row[1]} for row in self.cursor.fetchall()]
-            
-            # Most common skills
-            self.cursor.execute('SELECT skills FROM vacancies')
-            all_skills = {}
-            for (skills_json,) in self.cursor.fetchall():
-                if skills_json:
-                    skills = json.loads(skills_json)
-                    for skill in skills:
-                        all_skills[skill] = all_skills.get(skill, 0) + 1
-            
-            stats['skills'] = [{'name': skill, 'count': count} 
-                              for skill, count in sorted(all_skills.items(), 
-                                                        key=lambda x: x[1], 
-                                                        reverse=True)[:10]]
-            
-            # Total subscribers
-            self.cursor.execute('SELECT COUNT(*) FROM subscriptions WHERE active = 1')
-            stats['active_subscribers'] = self.cursor.fetchone()[0]
-            
-            logging.info(f"Retrieved database statistics")
-            return stats
-        except Exception as e:
-            logging.error(f"Error getting database statistics: {e}")
-            return {'error': str(e)}
-    
-    def close(self):
-        """Close the database connection"""
-        if self.conn:
-            self.conn.close()
-            logging.info("Database connection closed")
-
-if __name__ == "__main__":
-    # Simple test
-    db = DatabaseManager()
-    print(f"Total vacancies in database: {db.count_vacancies()}")
-    db.close() 
+import sqlite3
+import json
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from vacancy_utils import vacancy_fingerprint, changed_fields, structured_fields, parse_salary, experience_bounds, SALARY_FILTER_CURRENCY
+from subscription_matcher import SubscriptionMatcher
+from skill_extractor import EXTRACTOR_VERSION, reextract_skills
+
+# Setup logging
+logging.basicConfig(
+    filename='db.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Numeric salary and experience columns derived from the salary and experience texts
+STRUCTURED_COLUMNS = ('salary_min', 'salary_max', 'salary_currency', 'salary_gross', 'experience_min', 'experience_max')
+
+# Columns of the vacancies table in the order _vacancy_to_dict expects them, fingerprint last
+VACANCY_COLUMNS = ('id, title, company, link, skills, salary, experience, location, publication_date, created_at, '
+                   + ', '.join(STRUCTURED_COLUMNS) + ', fingerprint')
+
+# SQL expressions compared by /find range filters, keyed by (field, operator); each one has an index.
+# A salary filter matches when the pay can reach the value, an experience filter when the required years can
+RANGE_EXPRESSIONS = {
+    'salary': {'high': 'COALESCE(salary_max, salary_min)', 'low': 'COALESCE(salary_min, salary_max)'},
+    'experience': {'high': 'COALESCE(experience_max, experience_min)', 'low': 'experience_min'}
+}
+
+# Condition every range filter of a field adds; salary filters are in tenge, so only tenge salaries
+# (or those without a recognized currency) can match them
+RANGE_CONDITIONS = {
+    'salary': f"COALESCE(salary_currency, '{SALARY_FILTER_CURRENCY}') = '{SALARY_FILTER_CURRENCY}'"
+}
+
+# Relative weights of the title, company, skills and location columns in search ranking
+FTS_RANK = 'bm25(10.0, 2.0, 5.0, 1.0)'
+
+class DatabaseManager:
+    def __init__(self, db_name="vacancies.db", busy_timeout=5.0):
+        """
+        Initialize database connections and create tables if they don't exist.
+        
+        All writes go through a single connection serialized by a lock, while
+        every thread reads through its own connection. In WAL mode readers
+        don't block the writer and see the last committed data, and
+        busy_timeout makes a connection wait for a lock instead of failing
+        with 'database is locked'.
+        """
+        self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self.fts_enabled = False
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        try:
+            self.conn = self._connect()
+            self.conn.execute('PRAGMA journal_mode = WAL')
+            # With WAL, NORMAL only syncs at checkpoints and is still safe against corruption
+            self.conn.execute('PRAGMA synchronous = NORMAL')
+            self.create_tables()
+            logging.info(f"Connected to database: {db_name}")
+        except Exception as e:
+            logging.error(f"Error connecting to database: {e}")
+            raise
+    
+    def _connect(self, **kwargs):
+        """Open a connection that can be shared across threads and waits on locks"""
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False, **kwargs)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+        return conn
+    
+    @contextmanager
+    def _write_transaction(self):
+        """Run statements in a transaction on the writer connection, committing on success"""
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            try:
+                yield cursor
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def _read_cursor(self):
+        """Get a cursor on the calling thread's reader connection"""
+        if self.db_name == ':memory:':
+            # Every connection to :memory: is a separate database, so reads share the writer
+            return self.conn.cursor()
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit, so every read sees the latest committed data
+            conn = self._connect(isolation_level=None)
+            conn.execute('PRAGMA query_only = ON')
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn.cursor()
+    
+    @property
+    def generation(self):
+        """
+        Data generation, incremented whenever an ingestion changes vacancies so caches know to drop their results.
+        
+        It's stored in the database and bumped in the ingestion's transaction,
+        so the bot also sees the ingestions of a separate scraper process.
+        """
+        try:
+            cursor = self._read_cursor()
+            cursor.execute("SELECT value FROM meta WHERE key = 'generation'")
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logging.error(f"Error reading data generation: {e}")
+            return None
+    
+    @staticmethod
+    def _bump_generation(cursor):
+        """Increment the data generation within a write transaction"""
+        cursor.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+    
+    def create_tables(self):
+        """Create necessary tables if they don't exist"""
+        with self._write_transaction() as cursor:
+            # Create counters and migration versions shared by every process using the database
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+            ''')
+            cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+            
+            # Create vacancies table
+            self._create_vacancies_table(cursor)
+            self._migrate_vacancies_table(cursor)
+            self._create_range_indexes(cursor)
+            
+            # Create vacancy change history table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vacancy_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                vacancy_id TEXT NOT NULL,
+                old_fingerprint TEXT,
+                new_fingerprint TEXT NOT NULL,
+                changes TEXT,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (vacancy_id) REFERENCES vacancies (id)
+            )
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_vacancy_changes_vacancy
+            ON vacancy_changes (vacancy_id, changed_at)
+            ''')
+            
+            # Create table of details fetched from vacancy pages
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vacancy_details (
+                vacancy_id TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                details TEXT NOT NULL,
+                fetched_at TIMESTAMP,
+                FOREIGN KEY (vacancy_id) REFERENCES vacancies (id)
+            )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_vacancy_details_fetched ON vacancy_details (fetched_at)')
+            
+            # Create table of the search queries that listed each vacancy
+            self._create_vacancy_queries_table(cursor)
+            
+            # Create full-text index over vacancies
+            self.fts_enabled = self._create_fts_index(cursor)
+            
+            # Create normalized skills and aggregate count tables
+            self._create_skill_tables(cursor)
+            self._migrate_skills(cursor)
+            
+            # Create subscriptions table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS subscriptions (
+                user_id INTEGER PRIMARY KEY,
+                keywords TEXT,
+                active INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                filters TEXT
+            )
+            ''')
+            cursor.execute('PRAGMA table_info(subscriptions)')
+            if 'filters' not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE subscriptions ADD COLUMN filters TEXT')
+                logging.info("Added filters column to subscriptions table")
+            
+            # Create notifications table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notifications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                vacancy_id TEXT,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (vacancy_id) REFERENCES vacancies (id),
+                UNIQUE(user_id, vacancy_id)
+            )
+            ''')
+            
+            # Create outbox of notifications waiting to be delivered
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                vacancy_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at TIMESTAMP NOT NULL,
+                lease_owner TEXT,
+                lease_until TIMESTAMP,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(user_id, vacancy_id)
+            )
+            ''')
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notification_outbox_ready
+            ON notification_outbox (status, available_at)
+            ''')
+            
+            # Create per-user watermarks and the indexes behind the unsent vacancy feed
+            self._create_watermark_table(cursor)
+        
+        logging.info("Database tables created or already exist")
+    
+    def _create_vacancies_table(self, cursor, table='vacancies'):
+        """
+        Create the vacancies table, or a table of the same schema to copy it into.
+        
+        row_id is an INTEGER PRIMARY KEY, so unlike the implicit rowid its values
+        survive VACUUM; the full-text index refers to vacancies by it.
+        """
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            row_id INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            company TEXT NOT NULL,
+            link TEXT NOT NULL,
+            skills TEXT,
+            salary TEXT,
+            experience TEXT,
+            location TEXT,
+            publication_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fingerprint TEXT,
+            salary_min INTEGER,
+            salary_max INTEGER,
+            salary_currency TEXT,
+            salary_gross INTEGER,
+            experience_min INTEGER,
+            experience_max INTEGER
+        )
+        ''')
+    
+    def _migrate_vacancies_table(self, cursor):
+        """Add the fingerprint and numeric salary/experience columns to databases created before them and backfill them"""
+        cursor.execute('PRAGMA table_info(vacancies)')
+        columns = {row[1] for row in cursor.fetchall()}
+        if 'fingerprint' not in columns:
+            cursor.execute('ALTER TABLE vacancies ADD COLUMN fingerprint TEXT')
+            logging.info("Added fingerprint column to vacancies table")
+        
+        missing = [column for column in STRUCTURED_COLUMNS if column not in columns]
+        for column in missing:
+            column_type = 'TEXT' if column == 'salary_currency' else 'INTEGER'
+            cursor.execute(f'ALTER TABLE vacancies ADD COLUMN {column} {column_type}')
+        if missing:
+            cursor.execute('SELECT id, salary, experience FROM vacancies')
+            rows = cursor.fetchall()
+            cursor.executemany(
+                f"UPDATE vacancies SET {', '.join(column + ' = ?' for column in STRUCTURED_COLUMNS)} WHERE id = ?",
+                [self._structured_params({'salary': salary, 'experience': experience}) + (vacancy_id,)
+                 for vacancy_id, salary, experience in rows]
+            )
+            logging.info(f"Added numeric salary and experience columns, backfilled {len(rows)} vacancies")
+        
+        cursor.execute(f'SELECT {VACANCY_COLUMNS} FROM vacancies WHERE fingerprint IS NULL')
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany(
+                'UPDATE vacancies SET fingerprint = ? WHERE id = ?',
+                [(vacancy_fingerprint(self._vacancy_to_dict(row)), row[0]) for row in rows]
+            )
+            logging.info(f"Backfilled fingerprints for {len(rows)} vacancies")
+        
+        if 'row_id' not in columns:
+            self._rekey_vacancies_table(cursor)
+    
+    def _rekey_vacancies_table(self, cursor):
+        """
+        Copy a vacancies table keyed on id alone into one with the row_id key.
+        
+        Rows keep their rowid as row_id. The full-text index kept on the old
+        rowid is dropped, so _create_fts_index builds it again over row_id, and
+        so is the notifications trigger reading vacancies, which would stop the
+        rename; create_tables creates them and the table's indexes again.
+        """
+        self._create_vacancies_table(cursor, 'vacancies_rekeyed')
+        cursor.execute(f'''
+        INSERT INTO vacancies_rekeyed (row_id, {VACANCY_COLUMNS})
+        SELECT rowid, {VACANCY_COLUMNS} FROM vacancies
+        ''')
+        rekeyed = cursor.rowcount
+        cursor.execute('DROP TRIGGER IF EXISTS notifications_watermark')
+        cursor.execute('DROP TABLE vacancies')
+        cursor.execute('ALTER TABLE vacancies_rekeyed RENAME TO vacancies')
+        cursor.execute('DROP TABLE IF EXISTS vacancies_fts')
+        logging.info(f"Rekeyed {rekeyed} vacancies on row_id")
+    
+    def _create_range_indexes(self, cursor):
+        """Create an index on every expression in RANGE_EXPRESSIONS, so range filters are index range scans"""
+        for field, expressions in RANGE_EXPRESSIONS.items():
+            for bound, expression in expressions.items():
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_vacancies_{field}_{bound} ON vacancies ({expression})')
+    
+    def _create_vacancy_queries_table(self, cursor):
+        """Create the table tagging vacancies with the search queries of the multi-query crawl that listed them"""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vacancy_queries (
+            vacancy_id TEXT NOT NULL,
+            query TEXT NOT NULL,
+            PRIMARY KEY (vacancy_id, query)
+        ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vacancy_queries_query ON vacancy_queries (query)')
+    
+    def _create_fts_index(self, cursor):
+        """
+        Create the FTS5 index over title, company, skills and location and the triggers keeping it in sync.
+        
+        The unicode61 tokenizer case-folds Cyrillic, so Russian and Kazakh text is
+        matched case-insensitively. Returns False if SQLite was built without FTS5.
+        """
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'vacancies_fts'")
+            exists = cursor.fetchone() is not None
+            
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+                title, company, skills, location,
+                content='vacancies',
+                content_rowid='row_id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS vacancies_fts_insert AFTER INSERT ON vacancies BEGIN
+                INSERT INTO vacancies_fts (rowid, title, company, skills, location)
+                VALUES (new.row_id, new.title, new.company, new.skills, new.location);
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS vacancies_fts_delete AFTER DELETE ON vacancies BEGIN
+                INSERT INTO vacancies_fts (vacancies_fts, rowid, title, company, skills, location)
+                VALUES ('delete', old.row_id, old.title, old.company, old.skills, old.location);
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS vacancies_fts_update AFTER UPDATE OF title, company, skills, location ON vacancies BEGIN
+                INSERT INTO vacancies_fts (vacancies_fts, rowid, title, company, skills, location)
+                VALUES ('delete', old.row_id, old.title, old.company, old.skills, old.location);
+                INSERT INTO vacancies_fts (rowid, title, company, skills, location)
+                VALUES (new.row_id, new.title, new.company, new.skills, new.location);
+            END
+            ''')
+            
+            if not exists:
+                # Persist the ranking function so ORDER BY rank can use it, and index existing rows
+                cursor.execute("INSERT INTO vacancies_fts (vacancies_fts, rank) VALUES ('rank', ?)", (FTS_RANK,))
+                cursor.execute("INSERT INTO vacancies_fts (vacancies_fts) VALUES ('rebuild')")
+                logging.info("Created full-text index over vacancies")
+            return True
+        except sqlite3.OperationalError as e:
+            logging.warning(f"FTS5 is not available, falling back to LIKE search: {e}")
+            return False
+    
+    def _create_skill_tables(self, cursor):
+        """
+        Create the vacancy_skills table and the skill/company count tables used by get_stats.
+        
+        The count tables are maintained incrementally by triggers on inserts,
+        updates and deletes, and are backfilled once for existing databases.
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE name IN ('vacancy_skills', 'company_counts')")
+        existing_tables = {row[0] for row in cursor.fetchall()}
+        
+        # source is 'card' for skills found in the search result and 'details' for key skills from the vacancy page
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vacancy_skills (
+            vacancy_id TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT 'card',
+            PRIMARY KEY (vacancy_id, skill)
+        ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vacancy_skills_skill ON vacancy_skills (skill)')
+        cursor.execute('PRAGMA table_info(vacancy_skills)')
+        if 'source' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE vacancy_skills ADD COLUMN source TEXT NOT NULL DEFAULT 'card'")
+            cursor.execute('''
+            UPDATE vacancy_skills SET source = 'details'
+            WHERE EXISTS (
+                SELECT 1 FROM vacancy_details, json_each(vacancy_details.details, '$.key_skills') AS key_skill
+                WHERE vacancy_details.vacancy_id = vacancy_skills.vacancy_id AND key_skill.value = vacancy_skills.skill
+            )
+            ''')
+            logging.info("Added source column to vacancy_skills table")
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS skill_counts (
+            skill TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_skill_counts_count ON skill_counts (count)')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS company_counts (
+            company TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_company_counts_count ON company_counts (count)')
+        
+        # Skill counts follow vacancy_skills
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS vacancy_skills_insert AFTER INSERT ON vacancy_skills BEGIN
+            INSERT INTO skill_counts (skill, count) VALUES (new.skill, 1)
+            ON CONFLICT (skill) DO UPDATE SET count = count + 1;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS vacancy_skills_delete AFTER DELETE ON vacancy_skills BEGIN
+            UPDATE skill_counts SET count = count - 1 WHERE skill = old.skill;
+            DELETE FROM skill_counts WHERE skill = old.skill AND count <= 0;
+        END
+        ''')
+        
+        # Company counts and skills follow vacancies
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS vacancies_counts_insert AFTER INSERT ON vacancies BEGIN
+            INSERT INTO company_counts (company, count) VALUES (new.company, 1)
+            ON CONFLICT (company) DO UPDATE SET count = count + 1;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS vacancies_counts_delete AFTER DELETE ON vacancies BEGIN
+            UPDATE company_counts SET count = count - 1 WHERE company = old.company;
+            DELETE FROM company_counts WHERE company = old.company AND count <= 0;
+            DELETE FROM vacancy_skills WHERE vacancy_id = old.id;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS vacancies_counts_update AFTER UPDATE OF company ON vacancies
+        WHEN old.company IS NOT new.company BEGIN
+            UPDATE company_counts SET count = count - 1 WHERE company = old.company;
+            DELETE FROM company_counts WHERE company = old.company AND count <= 0;
+            INSERT INTO company_counts (company, count) VALUES (new.company, 1)
+            ON CONFLICT (company) DO UPDATE SET count = count + 1;
+        END
+        ''')
+        
+        if 'company_counts' not in existing_tables:
+            cursor.execute('''
+            INSERT INTO company_counts (company, count)
+            SELECT company, COUNT(*) FROM vacancies GROUP BY company
+            ''')
+        if 'vacancy_skills' not in existing_tables:
+            cursor.execute('SELECT id, skills FROM vacancies')
+            rows = cursor.fetchall()
+            self._insert_skills(cursor, [(vacancy_id, json.loads(skills_json) if skills_json else []) for vacancy_id, skills_json in rows])
+            logging.info(f"Backfilled skills of {len(rows)} vacancies")
+    
+    def _migrate_skills(self, cursor):
+        """
+        Extract the skills of stored vacancies again when the skill extractor changed since they were stored.
+        
+        Vacancies stored before the dictionary-backed extractor have sentence
+        fragments as skills; the canonical skills are found in those fragments
+        and the title, and the key skills of enriched vacancies are kept.
+        VacancyStore migrates its records the same way, so their fingerprints
+        still agree with the database's afterwards.
+        """
+        cursor.execute("SELECT value FROM meta WHERE key = 'skills_version'")
+        row = cursor.fetchone()
+        if row and row[0] >= EXTRACTOR_VERSION:
+            return
+        
+        cursor.execute(f'SELECT {VACANCY_COLUMNS} FROM vacancies')
+        rows = cursor.fetchall()
+        cursor.execute('SELECT vacancy_id, details FROM vacancy_details')
+        key_skills = {vacancy_id: json.loads(details).get('key_skills') or [] for vacancy_id, details in cursor.fetchall()}
+        
+        updates, skills = [], []
+        for row in rows:
+            vacancy = self._vacancy_to_dict(row)
+            vacancy['skills'] = reextract_skills(vacancy)
+            updates.append((json.dumps(vacancy['skills'], ensure_ascii=False), vacancy_fingerprint(vacancy), vacancy['id']))
+            skills.append((vacancy['id'], vacancy['skills']))
+        cursor.executemany('UPDATE vacancies SET skills = ?, fingerprint = ? WHERE id = ?', updates)
+        cursor.execute('DELETE FROM vacancy_skills')
+        self._insert_skills(cursor, skills)
+        self._insert_skills(cursor, list(key_skills.items()), source='details')
+        
+        cursor.execute(
+            "INSERT INTO meta (key, value) VALUES ('skills_version', ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (EXTRACTOR_VERSION,)
+        )
+        if rows:
+            logging.info(f"Extracted the skills of {len(rows)} stored vacancies again")
+    
+    def _create_watermark_table(self, cursor):
+        """
+        Create the notification watermark table and the indexes used by the unsent vacancy feed.
+        
+        A user's watermark is the created_at of the newest vacancy ever sent to
+        them, kept up to date by a trigger on notifications, so the feed only
+        has to anti-join the vacancies added since then.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'notification_watermarks'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vacancies_created_at ON vacancies (created_at, id)')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_watermarks (
+            user_id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP NOT NULL
+        )
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS notifications_watermark AFTER INSERT ON notifications BEGIN
+            INSERT INTO notification_watermarks (user_id, created_at)
+            SELECT new.user_id, created_at FROM vacancies WHERE id = new.vacancy_id
+            ON CONFLICT (user_id) DO UPDATE SET created_at = MAX(created_at, excluded.created_at);
+        END
+        ''')
+        
+        if not exists:
+            cursor.execute('''
+            INSERT INTO notification_watermarks (user_id, created_at)
+            SELECT notifications.user_id, MAX(vacancies.created_at) FROM notifications
+            JOIN vacancies ON vacancies.id = notifications.vacancy_id
+            GROUP BY notifications.user_id
+            ''')
+    
+    def _insert_skills(self, cursor, vacancy_skills, source='card'):
+        """
+        Insert (vacancy_id, skills list) pairs into vacancy_skills.
+        
+        A key skill from the vacancy page takes over a skill already found on
+        the card, so replacing the card's skills keeps it.
+        """
+        conflict = "DO UPDATE SET source = 'details'" if source == 'details' else 'DO NOTHING'
+        cursor.executemany(
+            f'INSERT INTO vacancy_skills (vacancy_id, skill, source) VALUES (?, ?, ?) ON CONFLICT (vacancy_id, skill) {conflict}',
+            [(vacancy_id, skill, source) for vacancy_id, skills in vacancy_skills for skill in skills if skill]
+        )
+    
+    @staticmethod
+    def _fts_query(text):
+        """
+        Turn free text into an FTS5 query: every word must match, as a word prefix.
+        
+        Words are quoted so FTS5 operators and punctuation in the input are treated as plain text.
+        A word written with dots such as 'node.js' is matched as a phrase of its parts.
+        """
+        terms = []
+        for word in text.lower().split():
+            parts = re.findall(r'\w+', word)
+            if parts:
+                terms.append(f'"{" ".join(parts)}"*')
+        return ' '.join(terms)
+    
+    @staticmethod
+    def _symbol_words(text):
+        """
+        Get the words of a query with + or # such as 'c++' or 'c#'.
+        
+        The FTS5 tokenizer drops these characters, so 'c++' would match any
+        word starting with 'c'; such words are also matched with LIKE.
+        """
+        return [word.strip('.,;:!?()"\'') for word in text.lower().split() if re.search(r'\w[+#]', word)]
+    
+    @staticmethod
+    def _structured_params(vacancy):
+        """Build the STRUCTURED_COLUMNS values of a vacancy from its salary and experience texts"""
+        fields = structured_fields(vacancy)
+        if fields['salary_gross'] is not None:
+            fields['salary_gross'] = int(fields['salary_gross'])
+        return tuple(fields[column] for column in STRUCTURED_COLUMNS)
+    
+    def _vacancy_params(self, vacancy):
+        """Build the column values of a vacancy row (without id and created_at)"""
+        # Convert skills list to JSON string if it exists
+        skills_json = json.dumps(vacancy.get('skills', []), ensure_ascii=False) if 'skills' in vacancy else None
+        return (
+            vacancy['title'],
+            vacancy['company'],
+            vacancy['link'],
+            skills_json,
+            vacancy.get('salary', 'Not specified'),
+            vacancy.get('experience', 'Not specified'),
+            vacancy.get('location', 'Not specified'),
+            vacancy.get('publication_date', 'Unknown date')
+        ) + self._structured_params(vacancy) + (vacancy.get('fingerprint') or vacancy_fingerprint(vacancy),)
+    
+    def upsert_vacancy(self, vacancy):
+        """
+        Insert a vacancy or update it if its content fingerprint changed.
+        
+        Returns 'inserted', 'updated', 'unchanged', or None on error.
+        """
+        result = self.bulk_upsert_vacancies([vacancy])
+        if result is None:
+            return None
+        for status in ('inserted', 'updated', 'unchanged'):
+            if result[status]:
+                return status
+        return None
+    
+    def bulk_upsert_vacancies(self, vacancies, batch_size=500, notify=False):
+        """
+        Insert or update a batch of vacancies in a single transaction.
+        
+        Vacancies are processed in chunks of batch_size with executemany. New
+        vacancies are inserted; vacancies whose content fingerprint changed are
+        updated (keeping the original created_at) and their changed fields are
+        recorded in vacancy_changes. With notify, a notification of every new
+        vacancy to every active subscriber is queued in notification_outbox in
+        the same transaction.
+        
+        Returns a dict with 'inserted', 'updated' and 'unchanged' vacancy ID
+        lists, or None if the transaction was rolled back.
+        """
+        result = {'inserted': [], 'updated': [], 'unchanged': []}
+        
+        # The last occurrence of a vacancy wins if it's listed more than once
+        unique_vacancies = list({vacancy['id']: vacancy for vacancy in vacancies}.values())
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        try:
+            with self._write_transaction() as cursor:
+                for start in range(0, len(unique_vacancies), max(1, batch_size)):
+                    self._upsert_batch(cursor, unique_vacancies[start:start + batch_size], now, result)
+                if notify and result['inserted']:
+                    inserted = set(result['inserted'])
+                    self._enqueue_notifications(
+                        cursor, [vacancy for vacancy in unique_vacancies if vacancy['id'] in inserted], now
+                    )
+                if result['inserted'] or result['updated']:
+                    self._bump_generation(cursor)
+        except Exception as e:
+            logging.error(f"Error upserting vacancies: {e}")
+            return None
+        
+        logging.info(
+            f"Upserted {len(unique_vacancies)} vacancies: {len(result['inserted'])} inserted, "
+            f"{len(result['updated'])} updated, {len(result['unchanged'])} unchanged"
+        )
+        return result
+    
+    def _upsert_batch(self, cursor, batch, now, result):
+        """Upsert one chunk of vacancies inside the caller's transaction"""
+        placeholders = ','.join('?' * len(batch))
+        cursor.execute(
+            f'SELECT {VACANCY_COLUMNS} FROM vacancies WHERE id IN ({placeholders})',
+            [vacancy['id'] for vacancy in batch]
+        )
+        existing = {row[0]: row for row in cursor.fetchall()}
+        
+        inserts, updates, changes, skills = [], [], [], []
+        for vacancy in batch:
+            params = self._vacancy_params(vacancy)
+            fingerprint = params[-1]
+            row = existing.get(vacancy['id'])
+            
+            if row is None:
+                inserts.append(params + (vacancy['id'], now))
+                skills.append((vacancy['id'], vacancy.get('skills') or []))
+                result['inserted'].append(vacancy['id'])
+            elif row[-1] != fingerprint:
+                old_vacancy = self._vacancy_to_dict(row)
+                updates.append(params + (vacancy['id'],))
+                changes.append((
+                    vacancy['id'],
+                    old_vacancy['fingerprint'],
+                    fingerprint,
+                    json.dumps(changed_fields(old_vacancy, vacancy), ensure_ascii=False),
+                    now
+                ))
+                skills.append((vacancy['id'], vacancy.get('skills') or []))
+                result['updated'].append(vacancy['id'])
+            else:
+                result['unchanged'].append(vacancy['id'])
+        
+        if inserts:
+            cursor.executemany('''
+            INSERT INTO vacancies (title, company, link, skills, salary, experience, location, publication_date,
+                                   salary_min, salary_max, salary_currency, salary_gross, experience_min, experience_max,
+                                   fingerprint, id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', inserts)
+        if updates:
+            # Only the skills of the card are replaced, key skills from the vacancy page stay
+            cursor.executemany(
+                "DELETE FROM vacancy_skills WHERE vacancy_id = ? AND source = 'card'",
+                [(update[-1],) for update in updates]
+            )
+            cursor.executemany('''
+            UPDATE vacancies
+            SET title = ?, company = ?, link = ?, skills = ?, salary = ?, experience = ?,
+                location = ?, publication_date = ?, salary_min = ?, salary_max = ?, salary_currency = ?,
+                salary_gross = ?, experience_min = ?, experience_max = ?, fingerprint = ?
+            WHERE id = ?
+            ''', updates)
+            cursor.executemany('''
+            INSERT INTO vacancy_changes (vacancy_id, old_fingerprint, new_fingerprint, changes, changed_at)
+            VALUES (?, ?, ?, ?, ?)
+            ''', changes)
+            
+            # The card's salary and experience only fill in what the vacancy page doesn't give
+            updated_ids = [update[-1] for update in updates]
+            cursor.execute(
+                f"SELECT vacancy_id, details FROM vacancy_details WHERE vacancy_id IN ({','.join('?' * len(updated_ids))})",
+                updated_ids
+            )
+            self._apply_detail_bounds(cursor, [(vacancy_id, json.loads(details)) for vacancy_id, details in cursor.fetchall()])
+        if skills:
+            self._insert_skills(cursor, skills)
+    
+    def _enqueue_notifications(self, cursor, vacancies, now):
+        """Queue a notification of each vacancy for every subscriber whose filters it matches, inside the caller's transaction"""
+        cursor.execute('SELECT user_id, keywords, filters FROM subscriptions WHERE active = 1')
+        matcher = SubscriptionMatcher([self._subscription_to_dict(row) for row in cursor.fetchall()])
+        
+        rows = []
+        for vacancy in vacancies:
+            payload = json.dumps(dict(vacancy, created_at=now), ensure_ascii=False)
+            rows.extend((user_id, vacancy['id'], payload, now, now) for user_id in matcher.match(vacancy))
+        cursor.executemany('''
+        INSERT OR IGNORE INTO notification_outbox (user_id, vacancy_id, payload, available_at, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        logging.info(f"Queued {len(rows)} notifications about {len(vacancies)} new vacancies for {len(matcher)} subscribers")
+    
+    def add_vacancy(self, vacancy):
+        """Add a vacancy to the database, updating it if it changed; returns True if it was new"""
+        return self.upsert_vacancy(vacancy) == 'inserted'
+    
+    def add_vacancy_queries(self, records):
+        """Tag vacancies with the search queries that listed them from (vacancy_id, query) pairs"""
+        if not records:
+            return True
+        try:
+            with self._write_transaction() as cursor:
+                cursor.executemany(
+                    'INSERT OR IGNORE INTO vacancy_queries (vacancy_id, query) VALUES (?, ?)',
+                    records
+                )
+            return True
+        except Exception as e:
+            logging.error(f"Error tagging vacancies with queries: {e}")
+            return False
+    
+    def get_vacancy_queries(self, vacancy_id):
+        """Get the search queries that listed a vacancy"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('SELECT query FROM vacancy_queries WHERE vacancy_id = ? ORDER BY query', (vacancy_id,))
+            return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error getting vacancy queries: {e}")
+            return []
+    
+    def add_vacancy_details(self, vacancies):
+        """
+        Store the details of enriched vacancies (see VacancyEnricher) in one transaction.
+        
+        The key skills of a vacancy are added to its skills in vacancy_skills,
+        so skill statistics count them, and the exact salary and experience of
+        the page replace the numeric columns parsed from the search result.
+        Returns the number of vacancies stored, or None on error.
+        """
+        vacancies = [vacancy for vacancy in vacancies if vacancy.get('details')]
+        if not vacancies:
+            return 0
+        try:
+            with self._write_transaction() as cursor:
+                cursor.executemany('''
+                INSERT OR REPLACE INTO vacancy_details (vacancy_id, fingerprint, details, fetched_at)
+                VALUES (?, ?, ?, ?)
+                ''', [
+                    (vacancy['id'], vacancy.get('fingerprint'), json.dumps(vacancy['details'], ensure_ascii=False),
+                     vacancy['details'].get('fetched_at'))
+                    for vacancy in vacancies
+                ])
+                # Key skills replace those of an earlier fetch; skills also on the card go back to being card skills
+                ids = [(vacancy['id'],) for vacancy in vacancies]
+                cursor.executemany("DELETE FROM vacancy_skills WHERE vacancy_id = ? AND source = 'details'", ids)
+                cursor.executemany('''
+                INSERT OR IGNORE INTO vacancy_skills (vacancy_id, skill, source)
+                SELECT vacancies.id, card_skill.value, 'card' FROM vacancies, json_each(vacancies.skills) AS card_skill
+                WHERE vacancies.id = ?
+                ''', ids)
+                self._insert_skills(cursor, [(vacancy['id'], vacancy['details'].get('key_skills') or []) for vacancy in vacancies],
+                                    source='details')
+                self._apply_detail_bounds(cursor, [(vacancy['id'], vacancy['details']) for vacancy in vacancies])
+                self._bump_generation(cursor)
+        except Exception as e:
+            logging.error(f"Error storing vacancy details: {e}")
+            return None
+        
+        return len(vacancies)
+    
+    @staticmethod
+    def _apply_detail_bounds(cursor, vacancy_details):
+        """
+        Replace the numeric salary and experience columns with the exact values of (vacancy_id, details) pairs.
+        
+        Runs inside the caller's transaction; bounds the page doesn't give keep
+        their values from the search result.
+        """
+        updates = []
+        for vacancy_id, details in vacancy_details:
+            salary = parse_salary(details.get('salary'))
+            if salary['salary_gross'] is not None:
+                salary['salary_gross'] = int(salary['salary_gross'])
+            experience_min, experience_max = experience_bounds(details.get('experience'))
+            has_salary = salary['salary_min'] is not None or salary['salary_max'] is not None
+            updates.append(
+                (has_salary, salary['salary_min'], has_salary, salary['salary_max'],
+                 salary['salary_currency'], salary['salary_gross'],
+                 experience_min is not None, experience_min, experience_min is not None, experience_max,
+                 vacancy_id)
+            )
+        cursor.executemany('''
+        UPDATE vacancies
+        SET salary_min = CASE WHEN ? THEN ? ELSE salary_min END,
+            salary_max = CASE WHEN ? THEN ? ELSE salary_max END,
+            salary_currency = COALESCE(?, salary_currency),
+            salary_gross = COALESCE(?, salary_gross),
+            experience_min = CASE WHEN ? THEN ? ELSE experience_min END,
+            experience_max = CASE WHEN ? THEN ? ELSE experience_max END
+        WHERE id = ?
+        ''', updates)
+    
+    def get_vacancy_details(self, vacancy_id):
+        """Get the details fetched from a vacancy's page, or None if it wasn't enriched"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('SELECT details FROM vacancy_details WHERE vacancy_id = ?', (vacancy_id,))
+            row = cursor.fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logging.error(f"Error getting vacancy details: {e}")
+            return None
+    
+    def get_stale_vacancy_details(self, fetched_before, limit=20):
+        """
+        Get the enriched vacancies whose details were last fetched before a time, oldest first.
+        
+        Returns a list of dicts with the vacancy 'id' and its current 'fingerprint',
+        enough for VacancyEnricher.enrich to check the page again.
+        """
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('''
+            SELECT vacancies.id, vacancies.fingerprint FROM vacancy_details
+            JOIN vacancies ON vacancies.id = vacancy_details.vacancy_id
+            WHERE vacancy_details.fetched_at < ?
+            ORDER BY vacancy_details.fetched_at
+            LIMIT ?
+            ''', (fetched_before, limit))
+            return [{'id': vacancy_id, 'fingerprint': fingerprint} for vacancy_id, fingerprint in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error getting stale vacancy details: {e}")
+            return []
+    
+    def get_vacancy_changes(self, vacancy_id, limit=10):
+        """Get the most recent recorded changes of a vacancy"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('''
+            SELECT old_fingerprint, new_fingerprint, changes, changed_at
+            FROM vacancy_changes
+            WHERE vacancy_id = ?
+            ORDER BY changed_at DESC, id DESC
+            LIMIT ?
+            ''', (vacancy_id, limit))
+            return [
+                {
+                    'old_fingerprint': old_fingerprint,
+                    'new_fingerprint': new_fingerprint,
+                    'changes': json.loads(changes) if changes else {},
+                    'changed_at': changed_at
+                }
+                for old_fingerprint, new_fingerprint, changes, changed_at in cursor.fetchall()
+            ]
+        except Exception as e:
+            logging.error(f"Error getting vacancy changes: {e}")
+            return []
+    
+    def add_multiple_vacancies(self, vacancies, batch_size=500, notify=False):
+        """Add multiple vacancies to the database in one transaction; returns the number of new ones"""
+        result = self.bulk_upsert_vacancies(vacancies, batch_size=batch_size, notify=notify)
+        added_count = len(result['inserted']) if result else 0
+        logging.info(f"Added {added_count} new vacancies to database")
+        return added_count
+    
+    def get_vacancy_by_id(self, vacancy_id):
+        """Get a vacancy by its ID"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute(f'SELECT {VACANCY_COLUMNS} FROM vacancies WHERE id = ?', (vacancy_id,))
+            vacancy = cursor.fetchone()
+            if vacancy:
+                return self._vacancy_to_dict(vacancy)
+            return None
+        except Exception as e:
+            logging.error(f"Error getting vacancy by ID: {e}")
+            return None
+    
+    def get_vacancy_fingerprints(self):
+        """Get a dict of vacancy ID -> content fingerprint of every stored vacancy"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('SELECT id, fingerprint FROM vacancies')
+            return dict(cursor.fetchall())
+        except Exception as e:
+            logging.error(f"Error getting vacancy fingerprints: {e}")
+            return None
+    
+    def get_vacancies_by_keyword(self, keyword, limit=None):
+        """
+        Get vacancies matching all words of a query in title, company, skills or location.
+        
+        Uses the FTS5 index with BM25 ranking when available, words match as prefixes.
+        """
+        try:
+            cursor = self._read_cursor()
+            if self.fts_enabled:
+                fts_query = self._fts_query(keyword)
+                if not fts_query:
+                    return []
+                symbol_words = self._symbol_words(keyword)
+                cursor.execute(f'''
+                WITH matches AS (
+                    SELECT rowid, rank FROM vacancies_fts
+                    WHERE vacancies_fts MATCH ?{' AND (title LIKE ? OR skills LIKE ?)' * len(symbol_words)}
+                    ORDER BY rank
+                    LIMIT ?
+                )
+                SELECT {VACANCY_COLUMNS} FROM matches
+                JOIN vacancies ON vacancies.row_id = matches.rowid
+                ORDER BY matches.rank
+                ''', [fts_query] + [f'%{word}%' for word in symbol_words for _ in range(2)] + [limit or -1])
+            else:
+                cursor.execute(f'''
+                SELECT {VACANCY_COLUMNS} FROM vacancies 
+                WHERE title LIKE ? OR skills LIKE ? 
+                ORDER BY created_at DESC
+                LIMIT ?
+                ''', (f'%{keyword}%', f'%{keyword}%', limit or -1))
+            vacancies = cursor.fetchall()
+            result = [self._vacancy_to_dict(vacancy) for vacancy in vacancies]
+            logging.info(f"Found {len(result)} vacancies matching keyword: {keyword}")
+            return result
+        except Exception as e:
+            logging.error(f"Error searching vacancies by keyword: {e}")
+            return []
+    
+    def get_latest_vacancies(self, limit=5):
+        """Get the latest vacancies added to the database"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute(f'''
+            SELECT {VACANCY_COLUMNS} FROM vacancies 
+            ORDER BY created_at DESC 
+            LIMIT ?
+            ''', (limit,))
+            vacancies = cursor.fetchall()
+            result = [self._vacancy_to_dict(vacancy) for vacancy in vacancies]
+            logging.info(f"Retrieved {len(result)} latest vacancies")
+            return result
+        except Exception as e:
+            logging.error(f"Error getting latest vacancies: {e}")
+            return []
+    
+    def get_vacancies_page(self, keyword=None, key=None, backward=False, limit=5, ranges=None):
+        """
+        Get one page of vacancies, newest first, with keyset pagination on (created_at, id).
+        
+        key is the (created_at, id) of the last vacancy of the current page to
+        get the next page, or of its first vacancy with backward=True to get the
+        previous one; None gives the first page. Pages are seeked on the
+        created_at index rather than skipped with OFFSET, so a deep page costs
+        as much as the first. With a keyword only matching vacancies are paged,
+        as in get_vacancies_by_keyword but ordered by date instead of rank.
+        
+        ranges are (field, operator, value) filters from parse_range_filters,
+        e.g. ('salary', '>=', 600000) or ('experience', '<=', 3); each one is a
+        comparison of an indexed expression from RANGE_EXPRESSIONS, so SQLite
+        can answer it with an index range scan. Salary filters only match
+        salaries in SALARY_FILTER_CURRENCY.
+        
+        Returns a dict with the page's 'vacancies' and whether there are more
+        before ('has_prev') and after ('has_next') it.
+        """
+        page = {'vacancies': [], 'has_prev': False, 'has_next': False}
+        try:
+            conditions, params = [], []
+            if keyword and self.fts_enabled:
+                fts_query = self._fts_query(keyword)
+                if not fts_query:
+                    return page
+                conditions.append('row_id IN (SELECT rowid FROM vacancies_fts WHERE vacancies_fts MATCH ?)')
+                params.append(fts_query)
+                for word in self._symbol_words(keyword):
+                    conditions.append('(title LIKE ? OR skills LIKE ?)')
+                    params.extend([f'%{word}%', f'%{word}%'])
+            elif keyword:
+                conditions.append('(title LIKE ? OR skills LIKE ?)')
+                params.extend([f'%{keyword}%', f'%{keyword}%'])
+            for field, operator, value in ranges or []:
+                if field in RANGE_CONDITIONS and RANGE_CONDITIONS[field] not in conditions:
+                    conditions.append(RANGE_CONDITIONS[field])
+                expressions = RANGE_EXPRESSIONS[field]
+                if operator == '=':
+                    # The range of the vacancy contains the value
+                    conditions.append(f"{expressions['low']} <= ? AND {expressions['high']} >= ?")
+                    params.extend([value, value])
+                else:
+                    expression = expressions['high'] if operator in ('>', '>=') else expressions['low']
+                    conditions.append(f'{expression} {operator} ?')
+                    params.append(value)
+            if key:
+                conditions.append(f"(created_at, id) {'>' if backward else '<'} (?, ?)")
+                params.extend(key)
+            
+            cursor = self._read_cursor()
+            cursor.execute(f'''
+            SELECT {VACANCY_COLUMNS} FROM vacancies
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY created_at {'ASC' if backward else 'DESC'}, id {'ASC' if backward else 'DESC'}
+            LIMIT ?
+            ''', params + [limit + 1])
+            
+            # One extra row tells whether there is a page beyond this one
+            rows = cursor.fetchall()
+            more = len(rows) > limit
+            rows = rows[:limit]
+            if backward:
+                rows.reverse()
+                page.update(has_prev=more, has_next=key is not None)
+            else:
+                page.update(has_prev=key is not None, has_next=more)
+            page['vacancies'] = [self._vacancy_to_dict(row) for row in rows]
+            logging.info(f"Retrieved a page of {len(rows)} vacancies")
+            return page
+        except Exception as e:
+            logging.error(f"Error getting vacancies page: {e}")
+            return page
+    
+    def _vacancy_to_dict(self, vacancy_tuple):
+        """Convert a vacancy tuple from the database to a dictionary"""
+        (id, title, company, link, skills_json, salary, experience, location, publication_date, created_at,
+         salary_min, salary_max, salary_currency, salary_gross, experience_min, experience_max, fingerprint) = vacancy_tuple
+        
+        # Parse skills JSON if it exists
+        skills = json.loads(skills_json) if skills_json else []
+        
+        return {
+            'id': id,
+            'title': title,
+            'company': company,
+            'link': link,
+            'skills': skills,
+            'salary': salary,
+            'experience': experience,
+            'location': location,
+            'publication_date': publication_date,
+            'created_at': created_at,
+            'salary_min': salary_min,
+            'salary_max': salary_max,
+            'salary_currency': salary_currency,
+            'salary_gross': bool(salary_gross) if salary_gross is not None else None,
+            'experience_min': experience_min,
+            'experience_max': experience_max,
+            'fingerprint': fingerprint
+        }
+    
+    def add_subscription(self, user_id, keywords=None, skills=None, min_salary=None, locations=None):
+        """
+        Add or update a user subscription.
+        
+        A vacancy is sent to the user when it contains any of the keywords,
+        has all of the skills, pays at least min_salary and is in one of the
+        locations; filters left empty match every vacancy.
+        """
+        try:
+            keywords_json = json.dumps(keywords, ensure_ascii=False) if keywords else None
+            filters = {'skills': skills, 'min_salary': min_salary, 'locations': locations}
+            filters_json = json.dumps({key: value for key, value in filters.items() if value}, ensure_ascii=False)
+            
+            with self._write_transaction() as cursor:
+                cursor.execute('''
+                INSERT OR REPLACE INTO subscriptions (user_id, keywords, active, created_at, filters)
+                VALUES (?, ?, 1, ?, ?)
+                ''', (
+                    user_id,
+                    keywords_json,
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    filters_json
+                ))
+            logging.info(f"User {user_id} subscribed to vacancy updates")
+            return True
+        except Exception as e:
+            logging.error(f"Error adding subscription: {e}")
+            return False
+    
+    def remove_subscription(self, user_id):
+        """Remove a user subscription by setting active to 0"""
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute('''
+                UPDATE subscriptions SET active = 0 WHERE user_id = ?
+                ''', (user_id,))
+            logging.info(f"User {user_id} unsubscribed from vacancy updates")
+            return True
+        except Exception as e:
+            logging.error(f"Error removing subscription: {e}")
+            return False
+    
+    def get_all_active_subscribers(self):
+        """Get all active subscribers"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('SELECT user_id, keywords, filters FROM subscriptions WHERE active = 1')
+            result = [self._subscription_to_dict(row) for row in cursor.fetchall()]
+            logging.info(f"Retrieved {len(result)} active subscribers")
+            return result
+        except Exception as e:
+            logging.error(f"Error getting active subscribers: {e}")
+            return []
+    
+    def _subscription_to_dict(self, subscription_tuple):
+        """Convert a (user_id, keywords, filters) tuple from the database to a dictionary"""
+        user_id, keywords_json, filters_json = subscription_tuple
+        filters = json.loads(filters_json) if filters_json else {}
+        return {
+            'user_id': user_id,
+            'keywords': json.loads(keywords_json) if keywords_json else None,
+            'skills': filters.get('skills'),
+            'min_salary': filters.get('min_salary'),
+            'locations': filters.get('locations')
+        }
+    
+    def add_notification(self, user_id, vacancy_id):
+        """Record that a notification was sent to a user for a specific vacancy"""
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute('''
+                INSERT OR IGNORE INTO notifications (user_id, vacancy_id, sent_at)
+                VALUES (?, ?, ?)
+                ''', (
+                    user_id,
+                    vacancy_id,
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                ))
+            return True
+        except Exception as e:
+            logging.error(f"Error adding notification record: {e}")
+            return False
+    
+    def add_notifications(self, records):
+        """Record a batch of (user_id, vacancy_id) notifications in one transaction"""
+        try:
+            sent_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            with self._write_transaction() as cursor:
+                cursor.executemany('''
+                INSERT OR IGNORE INTO notifications (user_id, vacancy_id, sent_at)
+                VALUES (?, ?, ?)
+                ''', [(user_id, vacancy_id, sent_at) for user_id, vacancy_id in records])
+            logging.info(f"Recorded {len(records)} sent notifications")
+            return True
+        except Exception as e:
+            logging.error(f"Error adding notification records: {e}")
+            return False
+    
+    def lease_notifications(self, owner, max_users=50, lease_seconds=300, max_attempts=5):
+        """
+        Lease the queued notifications of up to max_users subscribers for delivery.
+        
+        All ready notifications of a subscriber are leased together, oldest
+        subscribers first. Until the lease expires no other worker can take
+        them, and a worker that dies mid-delivery simply lets it expire. A
+        notification whose lease expired after max_attempts attempts (e.g. one
+        that crashes every worker) is marked 'failed' instead of leased again.
+        
+        Returns a list of dicts with 'id', 'user_id', 'vacancy_id', 'payload' and 'attempts'.
+        """
+        now = datetime.now()
+        now_text = now.strftime('%Y-%m-%d %H:%M:%S')
+        lease_until = (now + timedelta(seconds=lease_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+        ready = '''
+            status = 'pending' AND available_at <= ?
+            AND (lease_until IS NULL OR lease_until <= ?)
+        '''
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute('''
+                UPDATE notification_outbox
+                SET status = 'failed', lease_owner = NULL, lease_until = NULL, last_error = 'lease expired'
+                WHERE status = 'pending' AND lease_until <= ? AND attempts >= ?
+                ''', (now_text, max_attempts))
+                cursor.execute(f'''
+                UPDATE notification_outbox
+                SET lease_owner = ?, lease_until = ?, attempts = attempts + 1
+                WHERE {ready} AND user_id IN (
+                    SELECT user_id FROM notification_outbox
+                    WHERE {ready}
+                    GROUP BY user_id
+                    ORDER BY MIN(id)
+                    LIMIT ?
+                )
+                ''', (owner, lease_until, now_text, now_text, now_text, now_text, max_users))
+                cursor.execute('''
+                SELECT id, user_id, vacancy_id, payload, attempts FROM notification_outbox
+                WHERE lease_owner = ? AND lease_until = ?
+                ORDER BY id
+                ''', (owner, lease_until))
+                rows = cursor.fetchall()
+            return [
+                {
+                    'id': id,
+                    'user_id': user_id,
+                    'vacancy_id': vacancy_id,
+                    'payload': json.loads(payload),
+                    'attempts': attempts
+                }
+                for id, user_id, vacancy_id, payload, attempts in rows
+            ]
+        except Exception as e:
+            logging.error(f"Error leasing notifications: {e}")
+            return []
+    
+    def complete_notifications(self, owner, ids):
+        """Move delivered notifications leased by owner from the outbox to the notifications table"""
+        params = [(id, owner) for id in ids]
+        try:
+            with self._write_transaction() as cursor:
+                cursor.executemany('''
+                INSERT OR IGNORE INTO notifications (user_id, vacancy_id, sent_at)
+                SELECT user_id, vacancy_id, ? FROM notification_outbox
+                WHERE id = ? AND lease_owner = ?
+                ''', [(datetime.now().strftime('%Y-%m-%d %H:%M:%S'),) + param for param in params])
+                cursor.executemany('DELETE FROM notification_outbox WHERE id = ? AND lease_owner = ?', params)
+            return True
+        except Exception as e:
+            logging.error(f"Error completing notifications: {e}")
+            return False
+    
+    def retry_notifications(self, owner, ids, error=None, max_attempts=5, retry_delay=60):
+        """
+        Release notifications that failed to deliver so they're retried later.
+        
+        The n-th retry waits retry_delay * 2^(n-1) seconds; after max_attempts
+        attempts a notification is marked 'failed' and no longer retried.
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with self._write_transaction() as cursor:
+                cursor.executemany('''
+                UPDATE notification_outbox
+                SET lease_owner = NULL, lease_until = NULL, last_error = ?,
+                    status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    available_at = datetime(?, '+' || (? << (attempts - 1)) || ' seconds')
+                WHERE id = ? AND lease_owner = ?
+                ''', [(error, max_attempts, now, retry_delay, id, owner) for id in ids])
+            return True
+        except Exception as e:
+            logging.error(f"Error releasing notifications for retry: {e}")
+            return False
+    
+    def drop_notifications(self, user_id, error=None):
+        """Mark every queued notification of a subscriber 'failed', e.g. after they blocked the bot"""
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute('''
+                UPDATE notification_outbox
+                SET status = 'failed', lease_owner = NULL, lease_until = NULL, last_error = ?
+                WHERE user_id = ? AND status = 'pending'
+                ''', (error, user_id))
+            return True
+        except Exception as e:
+            logging.error(f"Error dropping notifications: {e}")
+            return False
+    
+    def get_outbox_depth(self):
+        """Count queued notifications that are pending, leased by a worker, or failed for good"""
+        try:
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cursor = self._read_cursor()
+            cursor.execute('''
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'pending' AND (lease_until IS NULL OR lease_until <= ?)),
+                COUNT(*) FILTER (WHERE status = 'pending' AND lease_until > ?),
+                COUNT(*) FILTER (WHERE status = 'failed')
+            FROM notification_outbox
+            ''', (now, now))
+            pending, leased, failed = cursor.fetchone()
+            return {'pending': pending, 'leased': leased, 'failed': failed}
+        except Exception as e:
+            logging.error(f"Error getting outbox depth: {e}")
+            return {'pending': 0, 'leased': 0, 'failed': 0}
+    
+    def get_unsent_vacancies_for_user(self, user_id, limit=5):
+        """
+        Get the newest vacancies added since the last one sent to the user that haven't been sent yet.
+        
+        Only vacancies at or after the user's watermark are considered, walked
+        newest first on the created_at index and anti-joined against the
+        (user_id, vacancy_id) index of notifications.
+        """
+        try:
+            cursor = self._read_cursor()
+            cursor.execute(f'''
+            SELECT {VACANCY_COLUMNS} FROM vacancies
+            WHERE created_at >= COALESCE((SELECT created_at FROM notification_watermarks WHERE user_id = ?), '')
+            AND NOT EXISTS (
+                SELECT 1 FROM notifications
+                WHERE notifications.user_id = ? AND notifications.vacancy_id = vacancies.id
+            )
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            ''', (user_id, user_id, limit))
+            
+            vacancies = cursor.fetchall()
+            result = [self._vacancy_to_dict(vacancy) for vacancy in vacancies]
+            logging.info(f"Found {len(result)} unsent vacancies for user {user_id}")
+            return result
+        except Exception as e:
+            logging.error(f"Error getting unsent vacancies: {e}")
+            return []
+    
+    def get_unsent_vacancies_for_users(self, user_ids, limit=5):
+        """
+        Get the unsent vacancy feeds of many users in one query, for digest and fan-out jobs.
+        
+        Returns a dict of user_id -> up to limit vacancies, with the same
+        contents as get_unsent_vacancies_for_user for each user.
+        """
+        result = {user_id: [] for user_id in user_ids}
+        if not result:
+            return result
+        try:
+            cursor = self._read_cursor()
+            cursor.execute(f'''
+            WITH users (user_id) AS (
+                SELECT DISTINCT value FROM json_each(?)
+            )
+            SELECT users.user_id, {', '.join('vacancies.' + column.strip() for column in VACANCY_COLUMNS.split(','))}
+            FROM users, vacancies
+            WHERE vacancies.row_id IN (
+                -- Correlated per user, so every feed stops after limit rows like the single-user query
+                SELECT candidates.row_id FROM vacancies AS candidates
+                WHERE candidates.created_at >= COALESCE((
+                    SELECT created_at FROM notification_watermarks
+                    WHERE notification_watermarks.user_id = users.user_id
+                ), '')
+                AND NOT EXISTS (
+                    SELECT 1 FROM notifications
+                    WHERE notifications.user_id = users.user_id AND notifications.vacancy_id = candidates.id
+                )
+                ORDER BY candidates.created_at DESC, candidates.id DESC
+                LIMIT ?
+            )
+            ORDER BY users.user_id, vacancies.created_at DESC, vacancies.id DESC
+            ''', (json.dumps(list(result)), limit))
+            for row in cursor.fetchall():
+                result[row[0]].append(self._vacancy_to_dict(row[1:]))
+            logging.info(f"Found unsent vacancies for {sum(1 for feed in result.values() if feed)} of {len(result)} users")
+            return result
+        except Exception as e:
+            logging.error(f"Error getting unsent vacancies for users: {e}")
+            return result
+    
+    def count_vacancies(self):
+        """Count the total number of vacancies in the database"""
+        try:
+            cursor = self._read_cursor()
+            cursor.execute('SELECT COUNT(*) FROM vacancies')
+            count = cursor.fetchone()[0]
+            logging.info(f"Total vacancies in database: {count}")
+            return count
+        except Exception as e:
+            logging.error(f"Error counting vacancies: {e}")
+            return 0
+    
+    def get_stats(self):
+        """Get various statistics about the database"""
+        try:
+            cursor = self._read_cursor()
+            stats = {}
+            
+            # Total vacancies
+            cursor.execute('SELECT COUNT(*) FROM vacancies')
+            stats['total_vacancies'] = cursor.fetchone()[0]
+            
+            # Vacancies by company (maintained incrementally by triggers)
+            cursor.execute('''
+            SELECT company, count 
+            FROM company_counts 
+            ORDER BY count DESC 
+            LIMIT 5
+            ''')
+            stats['companies'] = [{'name': row[0], 'count': row[1]} for row in cursor.fetchall()]
+            
+            # Most common skills (maintained incrementally by triggers)
+            cursor.execute('''
+            SELECT skill, count 
+            FROM skill_counts 
+            ORDER BY count DESC 
+            LIMIT 10
+            ''')
+            stats['skills'] = [{'name': row[0], 'count': row[1]} for row in cursor.fetchall()]
+            
+            # Total subscribers
+            cursor.execute('SELECT COUNT(*) FROM subscriptions WHERE active = 1')
+            stats['active_subscribers'] = cursor.fetchone()[0]
+            
+            # Notifications waiting in the outbox
+            stats['outbox'] = self.get_outbox_depth()
+            
+            logging.info(f"Retrieved database statistics")
+            return stats
+        except Exception as e:
+            logging.error(f"Error getting database statistics: {e}")
+            return {'error': str(e)}
+    
+    def close(self):
+        """Close the writer and all reader connections"""
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        if self.conn:
+            with self._write_lock:
+                self.conn.close()
+            logging.info("Database connection closed")
+
+if __name__ == "__main__":
+    # Simple test
+    db = DatabaseManager()
+    print(f"Total vacancies in database: {db.count_vacancies()}")
+    db.close() 
@@ -0,0 +1,284 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str, ttl: int = 86400, max_size_bytes: int = 50 * 1024 * 1024,
+                 parsed_ttl: Optional[int] = None):
+        """
+        On-disk cache of HTTP responses used for conditional GET requests.
+
+        Every entry keeps the response validators (ETag / Last-Modified), a gzip
+        compressed copy of the body and, optionally, the vacancies parsed from
+        it, so a page answered with 304 Not Modified doesn't have to be parsed again.
+
+        A 304 doesn't make an entry younger: the body is downloaded again ttl
+        after it was stored, however often the server confirmed it. Parsed
+        vacancies expire parsed_ttl after they were parsed and are tagged with
+        the version of the parser that produced them, so a changed parser or
+        skill extractor doesn't keep serving old results.
+
+        Args:
+            cache_dir: Directory where cached responses are stored
+            ttl: Time in seconds after which an entry is dropped (default: 86400 = 1 day)
+            max_size_bytes: Maximum total size of the stored bodies and parsed vacancies (default: 50 MB)
+            parsed_ttl: Time in seconds parsed vacancies are reused (default: ttl)
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.parsed_ttl = ttl if parsed_ttl is None else parsed_ttl
+        self.max_size_bytes = max_size_bytes
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._index = self._load_index()
+
+    @staticmethod
+    def make_key(url: str, params: Dict = None) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            url: Request URL
+            params: Query parameters of the request
+
+        Returns:
+            Hex digest identifying the request
+        """
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha1(f"{url}?{query}".encode('utf-8')).hexdigest()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load the cache index from disk"""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading HTTP cache index, starting empty: {e}")
+        return {}
+
+    def _save_index(self):
+        """Atomically write the cache index to disk"""
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.html.gz")
+
+    def _parsed_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parsed.json")
+
+    def _is_expired(self, entry: Dict, now: float) -> bool:
+        return now - entry['stored_at'] > self.ttl
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get a fresh cache entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Entry metadata, or None if nothing usable is cached
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or self._is_expired(entry, time.time()):
+                return None
+            if not os.path.exists(self._body_path(key)):
+                return None
+            return dict(entry)
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """
+        Build If-None-Match / If-Modified-Since headers for a cached request.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Headers dictionary (empty if nothing is cached)
+        """
+        entry = self.get(key)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, key: str) -> str:
+        """
+        Read the cached body of a response.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Decompressed body, or an empty string if it can't be read
+        """
+        try:
+            with gzip.open(self._body_path(key), 'rt', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logging.error(f"Error reading cached response {key}: {e}")
+            return ""
+
+    def store(self, key: str, url: str, body: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None):
+        """
+        Store a full response in the cache.
+
+        Responses without validators are not cached since they can't be revalidated.
+
+        Args:
+            key: Cache key
+            url: Request URL (kept for debugging)
+            body: Response body
+            etag: Value of the ETag response header
+            last_modified: Value of the Last-Modified response header
+        """
+        if not etag and not last_modified:
+            return
+
+        try:
+            data = gzip.compress(body.encode('utf-8'))
+            tmp_file = self._body_path(key) + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self._body_path(key))
+
+            now = time.time()
+            with self._lock:
+                # Vacancies parsed from a previous body are no longer valid
+                self._remove_file(self._parsed_path(key))
+                self._index[key] = {
+                    'url': url,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'size': len(data),
+                    'stored_at': now,
+                    'accessed_at': now
+                }
+                self._evict(now)
+                self._save_index()
+        except Exception as e:
+            logging.error(f"Error storing response in HTTP cache: {e}")
+
+    def mark_not_modified(self, key: str):
+        """
+        Mark an entry as used after the server answered 304 Not Modified.
+
+        Only the least recently used eviction order changes; the entry still
+        expires ttl after its body was stored.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return
+            entry['accessed_at'] = time.time()
+            self._save_index()
+
+    def get_parsed(self, key: str, version: str = '') -> Optional[List[Dict]]:
+        """
+        Get the vacancies parsed from a cached response.
+
+        Args:
+            key: Cache key
+            version: Version of the parser the vacancies must come from
+
+        Returns:
+            List of vacancy dictionaries, or None if the body wasn't parsed by
+            that version within parsed_ttl
+        """
+        entry = self.get(key)
+        parsed = entry.get('parsed') if entry else None
+        if parsed is None or parsed['version'] != version or time.time() - parsed['parsed_at'] > self.parsed_ttl:
+            return None
+        try:
+            with open(self._parsed_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"Error reading parsed vacancies for {key}: {e}")
+            return None
+
+    def store_parsed(self, key: str, vacancies: List[Dict], version: str = ''):
+        """
+        Attach the parsed vacancies to a cached response.
+
+        Args:
+            key: Cache key
+            vacancies: Vacancies parsed from the body
+            version: Version of the parser that produced them
+        """
+        if key not in self._index:
+            return
+        try:
+            data = json.dumps(vacancies, ensure_ascii=False).encode('utf-8')
+            tmp_file = self._parsed_path(key) + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self._parsed_path(key))
+
+            now = time.time()
+            with self._lock:
+                entry = self._index.get(key)
+                if entry is None:
+                    # Evicted in the meantime
+                    self._remove_file(self._parsed_path(key))
+                    return
+                entry['parsed'] = {'version': version, 'parsed_at': now, 'size': len(data)}
+                self._evict(now)
+                self._save_index()
+        except Exception as e:
+            logging.error(f"Error storing parsed vacancies for {key}: {e}")
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used ones until under the size limit"""
+        for key in [key for key, entry in self._index.items() if self._is_expired(entry, now)]:
+            self._remove(key)
+
+        total_size = sum(self._entry_size(entry) for entry in self._index.values())
+        if total_size <= self.max_size_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]['accessed_at']):
+            if total_size <= self.max_size_bytes:
+                break
+            total_size -= self._entry_size(entry)
+            self._remove(key)
+
+    @staticmethod
+    def _entry_size(entry: Dict) -> int:
+        """Bytes an entry takes on disk, its body and its parsed vacancies"""
+        parsed = entry.get('parsed')
+        return entry['size'] + (parsed['size'] if parsed else 0)
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        self._remove_file(self._body_path(key))
+        self._remove_file(self._parsed_path(key))
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
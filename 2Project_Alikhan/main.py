@@ -1,105 +1,135 @@
-import os
-import logging
-import threading
-import time
-import argparse
-from datetime import datetime
-
-from web_hh_scrapping import HHScraper
-from db_manager import DatabaseManager
-import telegram_bot
-
-# Configure logging
-logging.basicConfig(
-    filename='main.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-def setup_directories():
-    """Setup necessary directories for the project"""
-    dirs = ['data', 'logs']
-    for dir_name in dirs:
-        if not os.path.exists(dir_name):
-            os.makedirs(dir_name)
-            logging.info(f"Created directory: {dir_name}")
-
-def run_scraper(search_query, pages, interval):
-    """Run the scraper in a separate thread"""
-    logging.info(f"Starting scraper for query '{search_query}' on {pages} pages with {interval}s interval")
-    
-    scraper = HHScraper(
-        search_query=search_query,
-        pages_to_scrape=pages,
-        update_interval=interval
-    )
-    
-    # Run the initial update
-    db = DatabaseManager()
-    all_vacancies, new_vacancies, updated_vacancies, all_file, new_file = scraper.run_once()
-    
-    if new_vacancies:
-        added_count = db.add_multiple_vacancies(new_vacancies)
-        logging.info(f"Added {added_count} new vacancies to the database")
-    
-    # Continue running scraper in a loop
-    scraper_thread = threading.Thread(target=scraper.run)
-    scraper_thread.daemon = True
-    scraper_thread.start()
-    
-    return scraper_thread
-
-def run_bot():
-    """Run the Telegram bot"""
-    logging.info("Starting Telegram bot")
-    bot_thread = threading.Thread(target=telegram_bot.asyncio.run, args=(telegram_bot.main(),))
-    bot_thread.daemon = True
-    bot_thread.start()
-    return bot_thread
-
-def main():
-    """Main function to run the application"""
-    parser = argparse.ArgumentParser(description='HH.kz Python job vacancy scraper and Telegram bot')
-    
-    parser.add_argument('--search', type=str, default='Python', help='Search query for vacancies')
-    parser.add_argument('--pages', type=int, default=3, help='Number of pages to scrape')
-    parser.add_argument('--interval', type=int, default=600, help='Interval between scraping runs in seconds')
-    parser.add_argument('--scraper-only', action='store_true', help='Run only the scraper without the bot')
-    parser.add_argument('--bot-only', action='store_true', help='Run only the bot without the scraper')
-    
-    args = parser.parse_args()
-    
-    # Setup directories
-    setup_directories()
-    
-    # Initialize the database
-    db = DatabaseManager()
-    db.create_tables()
-    
-    try:
-        # Start components based on arguments
-        if args.bot_only:
-            logging.info("Running in bot-only mode")
-            bot_thread = run_bot()
-            bot_thread.join()
-        elif args.scraper_only:
-            logging.info("Running in scraper-only mode")
-            scraper_thread = run_scraper(args.search, args.pages, args.interval)
-            scraper_thread.join()
-        else:
-            logging.info("Running both scraper and bot")
-            scraper_thread = run_scraper(args.search, args.pages, args.interval)
-            bot_thread = run_bot()
-            
-            # Keep the main thread alive
-            while True:
-                time.sleep(60)
-                logging.info(f"System running. Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                
-    except KeyboardInterrupt:
-        logging.info("Application stopped by user")
-    except Exception as e:
-        logging.error(f"Error in main application: {e}")
-        
-if __name__ == "__main__":
-    main() 
+import os
+import logging
+import asyncio
+import argparse
+
+from web_hh_scrapping import HHScraper
+from db_manager import DatabaseManager
+from orchestrator import CrawlOrchestrator
+from multi_query_crawler import MultiQueryCrawler
+from crawl_planner import CrawlPlanner
+from vacancy_enricher import VacancyEnricher
+from scheduler import Scheduler
+import telegram_bot
+
+# Configure logging
+logging.basicConfig(
+    filename='main.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+def setup_directories():
+    """Setup necessary directories for the project"""
+    dirs = ['data', 'logs']
+    for dir_name in dirs:
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+            logging.info(f"Created directory: {dir_name}")
+
+def scraper_options(args):
+    """Build HHScraper keyword arguments from the command-line options"""
+    return {
+        'fetch_mode': args.fetch_mode,
+        'max_concurrency': args.concurrency,
+        'requests_per_second': args.rate,
+        'parser_backend': args.parser,
+        'incremental': not args.full_crawl,
+        'max_pages': args.max_pages
+    }
+
+def build_orchestrator(args, db):
+    """Build the crawl pipeline writing to db from the command-line options"""
+    scraper = HHScraper(
+        search_query=args.search,
+        pages_to_scrape=args.pages,
+        update_interval=args.interval,
+        **scraper_options(args)
+    )
+    
+    # Detail pages are fetched through the scraper's session and rate limiter
+    enricher = VacancyEnricher(scraper, max_workers=args.concurrency) if args.enrich else None
+    
+    # Extra queries share the scraper's fetch pool and vacancy store
+    extra_queries = [query for query in (args.queries or '').split(',') if query.strip()]
+    if extra_queries:
+        crawler = MultiQueryCrawler(scraper, [args.search] + extra_queries, min_interval=args.interval)
+        return CrawlOrchestrator(crawler, db, enricher=enricher)
+    
+    # A partitioned crawl splits --search into sub-queries under hh's result cap
+    if args.partition:
+        areas = [area.strip() for area in (args.areas or '').split(',') if area.strip()]
+        # A single area limits the whole crawl, several are split by
+        planner = CrawlPlanner(scraper, areas=areas if len(areas) > 1 else None,
+                               area=areas[0] if len(areas) == 1 else None)
+        return CrawlOrchestrator(planner, db, enricher=enricher)
+    return CrawlOrchestrator(scraper, db, enricher=enricher)
+
+async def run_scraper(orchestrator, interval, jitter):
+    """Crawl on a schedule without the bot; notifications wait in the outbox until the bot runs"""
+    logging.info(f"Starting scraper with {interval}s interval")
+    
+    scheduler = Scheduler(max_workers=1)
+    scheduler.add_job('update', orchestrator.run_once, interval=interval, jitter=jitter, run_at_start=True)
+    scheduler.start()
+    try:
+        # Run until interrupted
+        await asyncio.Event().wait()
+    finally:
+        await scheduler.stop()
+
+def main():
+    """Main function to run the application"""
+    parser = argparse.ArgumentParser(description='HH.kz Python job vacancy scraper and Telegram bot')
+    
+    parser.add_argument('--search', type=str, default='Python', help='Search query for vacancies')
+    parser.add_argument('--queries', type=str, default='', help='Comma-separated search queries crawled in addition to --search')
+    parser.add_argument('--partition', action='store_true', help='Split --search by experience and schedule to get past the 2000 result cap')
+    parser.add_argument('--areas', type=str, default='', help='Comma-separated hh area IDs a partitioned crawl splits by first (e.g. 160,159), or a single one it is limited to (e.g. 40)')
+    parser.add_argument('--pages', type=int, default=3, help='Number of pages to scrape')
+    parser.add_argument('--interval', type=int, default=600, help='Interval between scraping runs in seconds')
+    parser.add_argument('--jitter', type=float, default=30, help='Maximum random seconds added to every interval')
+    parser.add_argument('--fetch-mode', choices=['async', 'sequential'], default='async', help='How search result pages are fetched')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of page requests in flight (async mode)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second sent to hh.kz (async mode)')
+    parser.add_argument('--parser', choices=['lxml', 'strainer', 'html.parser'], default='lxml', help='HTML parser backend used for result pages')
+    parser.add_argument('--enrich', action='store_true', help='Fetch the page of every new or changed vacancy for its key skills, description and exact salary')
+    parser.add_argument('--full-crawl', action='store_true', help='Always fetch every page instead of stopping at already known pages')
+    parser.add_argument('--max-pages', type=int, default=None, help='Deepest an incremental crawl may go after missed runs (default: 4 x --pages)')
+    parser.add_argument('--scraper-only', action='store_true', help='Run only the scraper without the bot')
+    parser.add_argument('--bot-only', action='store_true', help='Run only the bot without the scraper')
+    
+    args = parser.parse_args()
+    if args.partition and args.queries:
+        parser.error('--partition can only be used with a single --search query')
+    
+    # Setup directories
+    setup_directories()
+    
+    try:
+        # Start components based on arguments; a single crawl pipeline feeds the database
+        if args.bot_only:
+            logging.info("Running in bot-only mode")
+            asyncio.run(telegram_bot.main(update_interval=None))
+        elif args.scraper_only:
+            logging.info("Running in scraper-only mode")
+            orchestrator = build_orchestrator(args, DatabaseManager())
+            asyncio.run(run_scraper(orchestrator, args.interval, args.jitter))
+        else:
+            logging.info("Running both scraper and bot")
+            # The bot's scheduler owns the crawl cadence, so the bot's cache sees every ingestion
+            orchestrator = build_orchestrator(args, telegram_bot.db)
+            asyncio.run(telegram_bot.main(
+                initial_update=True,
+                update_interval=args.interval,
+                update_jitter=args.jitter,
+                crawl_orchestrator=orchestrator
+            ))
+                
+    except KeyboardInterrupt:
+        logging.info("Application stopped by user")
+    except Exception as e:
+        logging.error(f"Error in main application: {e}")
+        
+if __name__ == "__main__":
+    main() 
@@ -0,0 +1,186 @@
+import logging
+import time
+from typing import Dict, Iterator, List, Optional
+
+from web_hh_scrapping import HHScraper, ITEMS_ON_PAGE
+
+
+class MultiQueryCrawler:
+    def __init__(self, scraper: HHScraper, queries: List[str], min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None):
+        """
+        Crawls several search queries through one scraper's session, rate limiter, cache and vacancy store.
+
+        Pages of all due queries are fetched together in waves of up to the
+        scraper's max_concurrency requests, so no query waits for another and
+        the shared rate limiter bounds the total load on hh.kz. Vacancies are
+        deduplicated across queries by ID and tagged with every query whose
+        results listed them; a page whose vacancies were all seen under an
+        earlier query counts as known, so overlapping queries stop early.
+
+        Every query has its own refresh interval: it's halved (down to
+        min_interval) after a crawl that found new vacancies and doubled (up
+        to max_interval) after one that didn't, so busy queries are crawled
+        more often than quiet ones.
+
+        Args:
+            scraper: Scraper whose fetching, parsing and storage are shared
+            queries: Search queries to crawl
+            min_interval: Shortest refresh interval in seconds (default: the scraper's update_interval)
+            max_interval: Longest refresh interval in seconds (default: 8 x min_interval)
+        """
+        self.scraper = scraper
+        self.min_interval = min_interval or scraper.update_interval
+        self.max_interval = max(max_interval or self.min_interval * 8, self.min_interval)
+        self.last_run_report: Dict[str, Dict] = {}
+
+        # Unique queries in their original order, all due right away
+        self._queries: Dict[str, Dict] = {}
+        for query in queries:
+            query = query.strip()
+            if query and query not in self._queries:
+                self._queries[query] = {'interval': self.min_interval, 'next_run_at': 0.0}
+        if not self._queries:
+            raise ValueError("At least one search query is required")
+
+    @property
+    def queries(self) -> List[str]:
+        return list(self._queries)
+
+    @property
+    def store(self):
+        return self.scraper.store
+
+    @property
+    def all_vacancies_file(self) -> str:
+        return self.scraper.all_vacancies_file
+
+    def save_new_vacancies(self, new_vacancies: List[Dict]) -> Optional[str]:
+        return self.scraper.save_new_vacancies(new_vacancies)
+
+    def due_queries(self, now: Optional[float] = None) -> List[str]:
+        """Get the queries whose refresh interval has passed"""
+        now = time.time() if now is None else now
+        return [query for query, state in self._queries.items() if state['next_run_at'] <= now]
+
+    def iter_pages(self, queries: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Crawl queries, yielding every page as soon as it's processed.
+
+        Args:
+            queries: Queries to crawl (default: the due ones)
+
+        Returns:
+            Iterator of dictionaries like HHScraper.iter_pages, whose 'vacancies'
+            carry a 'queries' list of every query that listed them in this run
+        """
+        queries = self.due_queries() if queries is None else queries
+        if not queries:
+            logging.info("No search query is due")
+            return
+
+        scraper = self.scraper
+        logging.info(f"Starting scraping run for {len(queries)} queries: {', '.join(queries)}")
+
+        # Vacancy ID -> the same vacancy dictionary, shared by all queries that list it
+        seen: Dict[str, Dict] = {}
+        crawls = {}
+        for query in queries:
+            interval = self._queries.get(query, {}).get('interval')
+            max_depth = scraper._plan_depth(query, interval) if scraper.incremental else scraper.pages_to_scrape
+            crawls[query] = {
+                'next_page': 0,
+                'max_depth': max_depth,
+                'known_streak': 0,
+                'stop': False,
+                'new': 0,
+                'report': {'pages_planned': max_depth, 'pages_fetched': 0, 'pages_failed': 0, 'pages_known': 0,
+                           'stopped_early': False}
+            }
+
+        while True:
+            # Fill the wave breadth first: always the next page of the active query that is least far along
+            wave = []
+            active = [query for query, crawl in crawls.items() if not crawl['stop'] and crawl['next_page'] < crawl['max_depth']]
+            while active and len(wave) < scraper.max_concurrency:
+                query = min(active, key=lambda query: crawls[query]['next_page'])
+                crawl = crawls[query]
+                wave.append((query, crawl['next_page'], None))
+                crawl['next_page'] += 1
+                if crawl['next_page'] >= crawl['max_depth']:
+                    active.remove(query)
+            if not wave:
+                break
+
+            for (query, page, _), (html, not_modified) in zip(wave, scraper.fetch_requests(wave)):
+                crawl = crawls[query]
+                report = crawl['report']
+                report['pages_fetched'] += 1
+                if not html:
+                    logging.warning(f"No HTML content received for page {page} of '{query}'")
+                    report['pages_failed'] += 1
+                    continue
+
+                page_vacancies = scraper.parse_page(page, html, not_modified, query)
+                logging.info(f"Found {len(page_vacancies)} vacancies on page {page} of '{query}'")
+
+                # Vacancies already handled under another query only get tagged with this one
+                fresh = []
+                listed = []
+                for vacancy in page_vacancies:
+                    known = seen.get(vacancy['id'])
+                    if known is None:
+                        vacancy['queries'] = [query]
+                        seen[vacancy['id']] = vacancy
+                        fresh.append(vacancy)
+                        known = vacancy
+                    elif query not in known['queries']:
+                        known['queries'].append(query)
+                    listed.append(known)
+
+                page_new, page_updated = scraper.store_page(fresh, set())
+                crawl['new'] += len(page_new)
+
+                # A short page is the last page of the search results
+                if len(page_vacancies) < ITEMS_ON_PAGE:
+                    crawl['stop'] = True
+
+                if page_vacancies and not page_new and not page_updated:
+                    report['pages_known'] += 1
+                    crawl['known_streak'] += 1
+                else:
+                    crawl['known_streak'] = 0
+                if scraper.incremental and crawl['known_streak'] >= scraper.stop_after_known_pages:
+                    report['stopped_early'] = True
+                    crawl['stop'] = True
+
+                yield {
+                    'query': query,
+                    'page': page,
+                    'vacancies': listed,
+                    'new': page_new,
+                    'updated': page_updated
+                }
+
+        now = time.time()
+        for query, crawl in crawls.items():
+            report = crawl['report']
+            report['new'] = crawl['new']
+            self.last_run_report[query] = report
+            if report['pages_failed'] < report['pages_fetched']:
+                scraper._save_crawl_state(query)
+
+            # Busy queries are refreshed more often, quiet ones less
+            state = self._queries.setdefault(query, {'interval': self.min_interval, 'next_run_at': 0.0})
+            if crawl['new']:
+                state['interval'] = max(self.min_interval, state['interval'] / 2)
+            else:
+                state['interval'] = min(self.max_interval, state['interval'] * 2)
+            state['next_run_at'] = now + state['interval']
+            logging.info(
+                f"Query '{query}': {report['pages_fetched']}/{report['pages_planned']} pages fetched, "
+                f"{crawl['new']} new vacancies, next run in {state['interval']:.0f}s"
+            )
+
+        scraper.store.maybe_compact()
+        logging.info(f"Scraping completed: {len(scraper.store)} total, {len(seen)} vacancies listed in this run")
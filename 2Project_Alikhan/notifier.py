@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+
+from rate_limiter import TokenBucket
+
+
+class NotificationFanout:
+    def __init__(self, bot: Bot, db=None, global_rate: float = 30.0, per_chat_rate: float = 1.0,
+                 max_concurrency: int = 50, max_retries: int = 3, lease_batch: int = 100,
+                 lease_seconds: int = 120, max_attempts: int = 5):
+        """
+        Sends notifications to many chats concurrently on the bot's event loop.
+
+        Telegram allows a bot about 30 messages per second overall and about
+        one message per second in a single chat, so every message waits for a
+        token from the global bucket and then from the chat's bucket. Chats are
+        served concurrently up to max_concurrency, and a 429 response is retried
+        after the retry_after the server asked for. Buckets of chats that have
+        been idle long enough to refill are dropped after every delivery.
+
+        Args:
+            bot: Bot used to send the messages
+            db: AsyncDatabaseManager holding the notification outbox (needed by drain_outbox)
+            global_rate: Maximum messages per second across all chats (default: 30)
+            per_chat_rate: Maximum messages per second to a single chat (default: 1)
+            max_concurrency: Maximum number of chats being served at the same time (default: 50)
+            max_retries: Maximum number of retries of a message after a 429 response (default: 3)
+            lease_batch: Number of chats leased from the outbox at a time (default: 100)
+            lease_seconds: Time a worker has to deliver leased notifications (default: 120)
+            max_attempts: Delivery attempts after which a notification is given up (default: 5)
+        """
+        self.bot = bot
+        self.db = db
+        self.per_chat_rate = per_chat_rate
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.lease_batch = lease_batch
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate)
+        return bucket
+
+    def _evict_idle_buckets(self):
+        """Drop the buckets of chats that have refilled; a new bucket would behave the same"""
+        for chat_id in [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.is_full()]:
+            del self._chat_buckets[chat_id]
+
+    async def _send(self, chat_id: int, text: str, **kwargs) -> str:
+        """Send one message like send; returns 'sent', 'blocked' if the chat blocked the bot, or 'failed'"""
+        for attempt in range(self.max_retries + 1):
+            # The chat's token comes last, so its messages are spaced by when they're sent, not by
+            # when they joined the global queue
+            await self._global_bucket.acquire()
+            await self._chat_bucket(chat_id).acquire()
+            try:
+                await self.bot.send_message(chat_id, text, **kwargs)
+                return 'sent'
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    logging.error(f"Giving up on a message to chat {chat_id} after {attempt} retries")
+                    return 'failed'
+                logging.warning(f"Rate limited by Telegram, retrying chat {chat_id} in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+            except TelegramForbiddenError as e:
+                logging.info(f"Chat {chat_id} blocked the bot, skipping it: {e}")
+                return 'blocked'
+            except TelegramAPIError as e:
+                logging.error(f"Error sending message to chat {chat_id}: {e}")
+                return 'failed'
+        return 'failed'
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> bool:
+        """
+        Send one message, respecting the rate limits and retrying after 429 responses.
+
+        Args:
+            chat_id: Chat to send the message to
+            text: Message text
+            **kwargs: Extra arguments for Bot.send_message
+
+        Returns:
+            True if the message was delivered
+        """
+        return await self._send(chat_id, text, **kwargs) == 'sent'
+
+    async def _deliver_chat(self, chat_id: int, messages: List[Dict], semaphore: asyncio.Semaphore,
+                            on_sent: Optional[Callable[[Dict], Awaitable]] = None) -> str:
+        """
+        Send the messages of one chat in order, stopping at the first failure.
+
+        on_sent is awaited with every message right after it was delivered.
+        Returns 'sent' if all messages were delivered, otherwise the result of the failed one.
+        """
+        async with semaphore:
+            for message in messages:
+                kwargs = {key: value for key, value in message.items() if key not in ('text', 'ids')}
+                result = await self._send(chat_id, message['text'], **kwargs)
+                if result != 'sent':
+                    return result
+                if on_sent is not None:
+                    await on_sent(message)
+            return 'sent'
+
+    async def deliver(self, deliveries: Dict[int, List[Dict]]) -> Dict[int, bool]:
+        """
+        Send a list of messages to each chat.
+
+        Every message is a dictionary with the 'text' to send and any extra
+        Bot.send_message arguments such as 'parse_mode'.
+
+        Args:
+            deliveries: Dictionary of chat ID -> messages for that chat
+
+        Returns:
+            Dictionary of chat ID -> whether all of its messages were delivered
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        chat_ids = list(deliveries)
+        results = await asyncio.gather(*(
+            self._deliver_chat(chat_id, deliveries[chat_id], semaphore) for chat_id in chat_ids
+        ))
+        self._evict_idle_buckets()
+        return {chat_id: result == 'sent' for chat_id, result in zip(chat_ids, results)}
+
+    async def _drain_chat(self, owner: str, chat_id: int, items: List[Dict],
+                          build_messages: Callable[[List[Dict]], List[Dict]],
+                          semaphore: asyncio.Semaphore, stats: Dict[str, int]):
+        """Deliver the leased outbox items of one chat, acknowledging them as they're sent, and release the rest"""
+        pending = [item['id'] for item in items]
+
+        # A message's items are acknowledged as soon as it's sent, so a failure later on doesn't send it again
+        async def acknowledge(message):
+            ids = [id for id in message.get('ids') or [] if id in pending]
+            if ids:
+                await self.db.complete_notifications(owner, ids)
+                stats['notifications'] += len(ids)
+                for id in ids:
+                    pending.remove(id)
+
+        try:
+            result = await self._deliver_chat(chat_id, build_messages(items), semaphore, on_sent=acknowledge)
+        except Exception as e:
+            logging.error(f"Error delivering notifications to chat {chat_id}: {e}")
+            result = 'failed'
+
+        if result == 'sent':
+            # Items that no message carried were covered by the chat's messages as a whole
+            await acknowledge({'ids': list(pending)})
+            stats['chats'] += 1
+        elif result == 'blocked':
+            # Retrying can't reach a chat that blocked the bot, so its subscription ends
+            await self.db.remove_subscription(chat_id)
+            await self.db.drop_notifications(chat_id, error="bot blocked by the user")
+            stats['blocked'] += 1
+        else:
+            await self.db.retry_notifications(owner, pending, error="delivery failed", max_attempts=self.max_attempts)
+            stats['failed'] += 1
+
+    async def drain_outbox(self, build_messages: Callable[[List[Dict]], List[Dict]]) -> Dict[str, int]:
+        """
+        Deliver every ready notification queued in the outbox.
+
+        Notifications are leased a batch of chats at a time and all of a
+        chat's notifications are sent together, using build_messages to turn
+        them into the messages for that chat. A message may list the outbox
+        item IDs it delivers under 'ids'; those items are removed from the
+        outbox as soon as it's sent, the others once all of the chat's
+        messages are. Items of a failed delivery are released for a later
+        retry, and a chat that blocked the bot is unsubscribed and its items
+        marked failed.
+
+        Args:
+            build_messages: Callable turning a chat's outbox items into message dictionaries
+
+        Returns:
+            Dictionary with the number of chats served, notifications delivered, chats that
+            failed and chats that blocked the bot
+        """
+        owner = uuid.uuid4().hex
+        stats = {'chats': 0, 'notifications': 0, 'failed': 0, 'blocked': 0}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        while True:
+            items = await self.db.lease_notifications(owner, max_users=self.lease_batch, lease_seconds=self.lease_seconds,
+                                                      max_attempts=self.max_attempts)
+            if not items:
+                break
+            by_chat = defaultdict(list)
+            for item in items:
+                by_chat[item['user_id']].append(item)
+            await asyncio.gather(*(
+                self._drain_chat(owner, chat_id, chat_items, build_messages, semaphore, stats)
+                for chat_id, chat_items in by_chat.items()
+            ))
+
+        self._evict_idle_buckets()
+        logging.info(
+            f"Outbox drained: {stats['notifications']} notifications delivered to {stats['chats']} chats, "
+            f"{stats['failed']} chats failed, {stats['blocked']} blocked the bot"
+        )
+        return stats
@@ -0,0 +1,148 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from web_hh_scrapping import HHScraper
+from db_manager import DatabaseManager
+from vacancy_enricher import VacancyEnricher
+
+
+class CrawlOrchestrator:
+    def __init__(self, scraper: HHScraper, db: DatabaseManager, notify: bool = True,
+                 on_ingested: Optional[Callable[[Dict], None]] = None, enricher: Optional[VacancyEnricher] = None):
+        """
+        Single pipeline from a crawl of hh.kz to the database and the notification outbox.
+
+        Every run streams the crawl page by page: each page's new and changed
+        vacancies are appended to the scraper's vacancy store, written to the
+        database with notifications queued for the new ones, and announced
+        through on_ingested, so the first notifications can go out while the
+        rest of the crawl is still running. The store and the database are
+        reconciled before the first run and after a failed database write, so
+        vacancies that reached the store but not the database (e.g. after a
+        crash in between) aren't lost. With an enricher, the detail pages of
+        each page's new and changed vacancies are fetched once they're in the
+        database and their details stored next to them, and after the crawl
+        the oldest details are checked against their pages again.
+
+        Args:
+            scraper: HHScraper, MultiQueryCrawler or CrawlPlanner doing the crawl
+            db: Database the vacancies are written to
+            notify: Queue notifications of new vacancies to subscribers (default: True)
+            on_ingested: Called from the crawl thread with the upsert result of every page
+                that added new vacancies, e.g. to start delivering their notifications
+            enricher: Fetches the details of new and changed vacancies from their pages (default: none)
+        """
+        self.scraper = scraper
+        self.db = db
+        self.notify = notify
+        self.on_ingested = on_ingested
+        self.enricher = enricher
+        self._needs_sync = True
+
+    def sync_store(self) -> int:
+        """
+        Write vacancies that are missing or outdated in the database from the vacancy store.
+
+        Returns:
+            Number of vacancies written, or -1 if the database couldn't be read or written
+        """
+        fingerprints = self.db.get_vacancy_fingerprints()
+        if fingerprints is None:
+            return -1
+
+        store = self.scraper.store
+        vacancy_ids = [vacancy_id for vacancy_id in store.ids()
+                       if fingerprints.get(vacancy_id) != store.fingerprint(vacancy_id)]
+        if not vacancy_ids:
+            self._needs_sync = False
+            return 0
+
+        # Vacancies only found now are old news, so they don't notify anyone
+        vacancies = [store.get(vacancy_id) for vacancy_id in vacancy_ids]
+        if self.db.bulk_upsert_vacancies(vacancies) is None:
+            return -1
+        self._needs_sync = False
+        logging.info(f"Synced {len(vacancies)} vacancies from the vacancy store to the database")
+        return len(vacancies)
+
+    def _ingest(self, batch: Dict, changed: List[Dict]) -> Optional[Dict]:
+        """Write a page's new and changed vacancies to the database; returns the upsert result"""
+        result = self.db.bulk_upsert_vacancies(changed, notify=self.notify)
+        if result is None:
+            # The store already has these vacancies, so they can only reach the database through a sync
+            logging.error(f"Couldn't write the vacancies of page {batch['page']} to the database, syncing on the next run")
+            self._needs_sync = True
+            return None
+
+        if result['inserted'] and self.on_ingested is not None:
+            try:
+                self.on_ingested(result)
+            except Exception as e:
+                logging.error(f"Error announcing ingested vacancies: {e}")
+        return result
+
+    def _enrich(self, changed: List[Dict]) -> int:
+        """Fetch and store the details of a page's new and changed vacancies; returns the number stored"""
+        try:
+            stored = self.db.add_vacancy_details(self.enricher.enrich(changed))
+        except Exception as e:
+            logging.error(f"Error enriching vacancies: {e}")
+            return 0
+        return stored or 0
+
+    def _revalidate_details(self) -> int:
+        """Check the details older than the enricher's max_age against their pages; returns the number stored"""
+        fetched_before = (datetime.now() - timedelta(seconds=self.enricher.max_age)).strftime("%Y-%m-%d %H:%M:%S")
+        stale = self.db.get_stale_vacancy_details(fetched_before, self.enricher.revalidate_batch)
+        return self._enrich(stale) if stale else 0
+
+    def run_once(self) -> Dict:
+        """
+        Crawl once, ingesting the new and changed vacancies of every page as it arrives.
+
+        Blocking; meant to run on a worker thread.
+
+        Returns:
+            Dictionary with the number of 'new', 'updated', 'added' (to the database) and 'enriched' vacancies,
+            the 'all_vacancies_file' and the 'new_vacancies_file' written by the scraper
+        """
+        started = time.monotonic()
+        if self._needs_sync:
+            self.sync_store()
+
+        report = {'new': 0, 'updated': 0, 'added': 0, 'enriched': 0}
+        first_added_after = None
+        new_vacancies = []
+        for batch in self.scraper.iter_pages():
+            changed = batch['new'] + batch['updated']
+            if changed:
+                report['new'] += len(batch['new'])
+                report['updated'] += len(batch['updated'])
+                new_vacancies.extend(batch['new'])
+                result = self._ingest(batch, changed)
+                if result and result['inserted']:
+                    report['added'] += len(result['inserted'])
+                    if first_added_after is None:
+                        first_added_after = time.monotonic() - started
+
+                # Details come after the notifications were queued, so they don't delay them
+                if result is not None and self.enricher is not None:
+                    report['enriched'] += self._enrich(changed)
+
+            # Remember which queries list each vacancy, also for unchanged ones found by another query
+            self.db.add_vacancy_queries([(vacancy['id'], batch['query']) for vacancy in batch['vacancies']])
+
+        # Vacancy pages can change while their search results don't
+        if self.enricher is not None:
+            report['enriched'] += self._revalidate_details()
+
+        report['all_vacancies_file'] = self.scraper.all_vacancies_file
+        report['new_vacancies_file'] = self.scraper.save_new_vacancies(new_vacancies)
+        logging.info(
+            f"Crawl ingested in {time.monotonic() - started:.1f}s: {report['new']} new, "
+            f"{report['updated']} updated, {report['added']} added to the database, {report['enriched']} enriched"
+            + (f", first ones after {first_added_after:.1f}s" if first_added_after is not None else "")
+        )
+        return report
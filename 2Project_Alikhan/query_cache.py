@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class GenerationCache:
+    def __init__(self, generation: int = 0, max_entries: int = 1024):
+        """
+        In-memory cache of query results and rendered responses, invalidated by a generation counter.
+
+        The cache holds the data generation its entries were computed from and
+        never reads it itself: the owner passes every new generation it learns
+        about (e.g. after an ingestion wrote new vacancies) to update_generation,
+        which drops all entries. Lookups therefore never touch the database.
+        Entries can also expire after a TTL for data that changes between
+        generations. The least recently used entries are evicted beyond max_entries.
+
+        Args:
+            generation: Data generation the cache starts at (default: 0)
+            max_entries: Maximum number of cached entries (default: 1024)
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.generation = generation
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update_generation(self, generation: Optional[int]):
+        """
+        Move the cache to the current data generation, dropping all entries if it changed.
+
+        Args:
+            generation: Current data generation, or None if it couldn't be read (keeps the entries)
+        """
+        if generation is not None and generation != self.generation:
+            self._entries.clear()
+            self.generation = generation
+
+    def _lookup(self, key: Hashable, default: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            self._entries.pop(key, None)
+            return default
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+            default: Value returned when the key isn't cached or is stale
+
+        Returns:
+            Cached value or default
+        """
+        sentinel = object()
+        value = self._lookup(key, sentinel)
+        if value is sentinel:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Cache a value for the current generation.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds after which the value expires even within the generation (default: never)
+        """
+        self._entries[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                             ttl: Optional[float] = None) -> Any:
+        """
+        Get a cached value, computing and caching it on a miss.
+
+        Concurrent misses for the same key share one computation, so a burst
+        of identical requests runs the query once.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function producing the value
+            ttl: Seconds after which the value expires even within the generation (default: never)
+
+        Returns:
+            Cached or freshly computed value
+        """
+        sentinel = object()
+        value = self._lookup(key, sentinel)
+        if value is not sentinel:
+            self.hits += 1
+            return value
+
+        # Waiting for a computation already in flight doesn't touch the database either
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        generation = self.generation
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await compute()
+            # A value computed while the data changed may already be stale
+            if self.generation == generation:
+                self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve the exception so it isn't reported when nobody else waits on it
+            future.exception()
+            raise
+        finally:
+            # Waiters of a cancelled computation are cancelled too
+            if not future.done():
+                future.cancel()
+            del self._pending[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dictionary with 'hits', 'misses', 'entries' and the current 'generation'
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'generation': self.generation
+        }
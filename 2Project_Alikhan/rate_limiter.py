@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        Token bucket rate limiter usable from both asyncio code and plain threads.
+
+        Args:
+            rate: Tokens added per second (sustained request rate)
+            capacity: Maximum number of tokens the bucket can hold (burst size)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, going into debt if necessary.
+
+        Returns:
+            Number of seconds the caller has to wait before using the tokens
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def is_full(self) -> bool:
+        """Whether the bucket has refilled to capacity, i.e. it behaves like a new one"""
+        with self._lock:
+            return self._tokens + (time.monotonic() - self._updated_at) * self.rate >= self.capacity
+
+    async def acquire(self, tokens: float = 1):
+        """Wait asynchronously until the requested tokens are available"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self, tokens: float = 1):
+        """Block the calling thread until the requested tokens are available"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
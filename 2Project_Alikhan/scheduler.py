@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Scheduler:
+    def __init__(self, max_workers: int = 2):
+        """
+        Runs periodic and on-demand jobs on one asyncio event loop.
+
+        Every job is single-flight: triggering a job that is already running
+        doesn't start a second run, the caller waits for the running one and
+        gets its result, so a manual run and a periodic run never overlap.
+        Coroutine jobs run on the loop; plain functions run on a bounded thread
+        pool so blocking work such as scraping never stalls the loop.
+
+        Args:
+            max_workers: Maximum number of threads running blocking jobs (default: 2)
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scheduler')
+        self._jobs: Dict[str, Dict] = {}
+        self._loops: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add_job(self, name: str, func: Callable, interval: Optional[float] = None,
+                jitter: float = 0.0, run_at_start: bool = False):
+        """
+        Register a job.
+
+        Args:
+            name: Name used to trigger the job
+            func: Coroutine function, or plain function run on the thread pool
+            interval: Seconds between the end of a run and the next one (default: only run when triggered)
+            jitter: Maximum random number of seconds added to every interval (default: 0)
+            run_at_start: Run the job as soon as the scheduler starts (default: False)
+        """
+        self._jobs[name] = {
+            'name': name,
+            'func': func,
+            'interval': interval,
+            'jitter': jitter,
+            'run_at_start': run_at_start,
+            'task': None,
+            'rerun': False
+        }
+
+    def is_running(self, name: str) -> bool:
+        """Check whether a job is running right now"""
+        task = self._jobs[name]['task']
+        return task is not None and not task.done()
+
+    async def run_blocking(self, func: Callable, *args) -> Any:
+        """Run a blocking function on the scheduler's thread pool and wait for its result"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _run(self, job: Dict) -> Any:
+        # Runs again as long as request() asked for it while running
+        while True:
+            job['rerun'] = False
+            started = time.monotonic()
+            logging.info(f"Running job '{job['name']}'")
+            if asyncio.iscoroutinefunction(job['func']):
+                result = await job['func']()
+            else:
+                result = await self.run_blocking(job['func'])
+            logging.info(f"Job '{job['name']}' finished in {time.monotonic() - started:.1f}s")
+            if not job['rerun']:
+                return result
+
+    async def trigger(self, name: str) -> Any:
+        """
+        Run a job now, or join its current run if it's already running.
+
+        Args:
+            name: Name of the job
+
+        Returns:
+            Result of the run
+
+        Raises:
+            Exception: Whatever the job raised
+        """
+        job = self._jobs[name]
+        if not self.is_running(name):
+            job['task'] = asyncio.create_task(self._run(job))
+        else:
+            logging.info(f"Job '{name}' is already running, waiting for the current run")
+        # Shielded so a cancelled caller doesn't cancel a run others may be waiting for
+        return await asyncio.shield(job['task'])
+
+    def request(self, name: str):
+        """
+        Ask for a job to run without waiting for it; may be called from any thread.
+
+        Starts a run if the job is idle; if it's running, one more run follows
+        the current one, so work submitted during a run isn't missed.
+
+        Args:
+            name: Name of the job
+        """
+        if self._loop is None:
+            raise RuntimeError("The scheduler hasn't been started")
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if not on_loop:
+            self._loop.call_soon_threadsafe(self.request, name)
+            return
+
+        job = self._jobs[name]
+        if self.is_running(name):
+            job['rerun'] = True
+        else:
+            self._loops = [task for task in self._loops if not task.done()]
+            self._loops.append(asyncio.create_task(self._run_once(job)))
+
+    async def _run_periodically(self, job: Dict):
+        delay = 0 if job['run_at_start'] else job['interval'] + random.uniform(0, job['jitter'])
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.trigger(job['name'])
+            except Exception as e:
+                logging.error(f"Error in job '{job['name']}': {e}")
+            delay = job['interval'] + random.uniform(0, job['jitter'])
+
+    async def _run_once(self, job: Dict):
+        try:
+            await self.trigger(job['name'])
+        except Exception as e:
+            logging.error(f"Error in job '{job['name']}': {e}")
+
+    def start(self):
+        """Start the periodic jobs and the ones that run at start; must be called on the event loop"""
+        self._loop = asyncio.get_running_loop()
+        for job in self._jobs.values():
+            if job['interval'] is not None:
+                self._loops.append(asyncio.create_task(self._run_periodically(job)))
+            elif job['run_at_start']:
+                self._loops.append(asyncio.create_task(self._run_once(job)))
+        logging.info(f"Scheduler started with {len(self._jobs)} jobs")
+
+    async def stop(self):
+        """Stop scheduling jobs, cancel the running ones and shut down the thread pool"""
+        tasks = self._loops + [job['task'] for job in self._jobs.values() if job['task'] is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops = []
+        # Blocking jobs already running in a thread can't be interrupted; they finish in the background
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logging.info("Scheduler stopped")
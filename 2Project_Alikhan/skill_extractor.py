@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from aho_corasick import AhoCorasick
+from vacancy_utils import normalize_text
+
+# Bumped whenever the dictionary or the matching changes enough that stored skills should be extracted again
+EXTRACTOR_VERSION = 1
+
+# Canonical skill -> aliases it's written as in vacancies (the canonical name itself always matches).
+# Aliases are matched as whole words, case-insensitively and with ё read as е
+SKILL_DICTIONARY: Dict[str, List[str]] = {
+    'Python': ['питон', 'python3'],
+    'Django': ['django rest framework', 'drf', 'джанго'],
+    'Flask': [],
+    'FastAPI': ['fast api'],
+    'aiohttp': [],
+    'asyncio': [],
+    'Celery': [],
+    'SQLAlchemy': ['sql alchemy'],
+    'Pandas': [],
+    'NumPy': [],
+    'SciPy': [],
+    'scikit-learn': ['sklearn', 'scikit learn'],
+    'PyTorch': ['torch'],
+    'TensorFlow': ['keras'],
+    'Airflow': ['apache airflow'],
+    'Spark': ['apache spark', 'pyspark'],
+    'Kafka': ['apache kafka'],
+    'RabbitMQ': ['rabbit mq'],
+    'SQL': ['sql запросы', 'sql-запросы'],
+    'PostgreSQL': ['postgres', 'postgre', 'postgresql', 'psql', 'постгрес'],
+    'MySQL': [],
+    'SQLite': [],
+    'MS SQL Server': ['mssql', 'ms sql', 'sql server'],
+    'Oracle': ['oracle db', 'pl/sql'],
+    'ClickHouse': ['click house'],
+    'MongoDB': ['mongo'],
+    'Redis': [],
+    'Elasticsearch': ['elastic', 'elastic search'],
+    'NoSQL': [],
+    'Docker': ['docker compose', 'docker-compose', 'докер'],
+    'Kubernetes': ['k8s', 'кубернетес'],
+    'Terraform': [],
+    'Ansible': [],
+    'Nginx': [],
+    'Linux': ['unix', 'линукс'],
+    'Git': ['github', 'gitlab'],
+    'CI/CD': ['ci cd', 'github actions', 'gitlab ci', 'jenkins'],
+    'AWS': ['amazon web services'],
+    'GCP': ['google cloud'],
+    'Azure': ['microsoft azure'],
+    'REST API': ['restful', 'rest api', 'restful api', 'rest-api'],
+    'GraphQL': [],
+    'gRPC': [],
+    'Microservices': ['микросервисы', 'микросервисная архитектура', 'microservice'],
+    'OOP': ['ооп'],
+    'Design Patterns': ['паттерны проектирования', 'шаблоны проектирования'],
+    'Algorithms': ['алгоритмы', 'алгоритмы и структуры данных'],
+    'Unit Testing': ['unit tests', 'unit-тесты', 'юнит-тесты', 'pytest', 'unittest'],
+    'JavaScript': ['js'],
+    'TypeScript': [],
+    'React': ['react.js', 'reactjs'],
+    'Vue.js': ['vue', 'vuejs'],
+    'HTML': ['html5'],
+    'CSS': ['css3'],
+    'Golang': ['go lang'],
+    'Java': [],
+    'Kotlin': [],
+    'C++': [],
+    'C#': ['c sharp'],
+    '.NET': ['dotnet', '.net core', 'asp.net', 'asp.net core'],
+    '1C': ['1с'],
+    'Machine Learning': ['ml', 'машинное обучение'],
+    'Data Analysis': ['анализ данных'],
+    'Power BI': ['powerbi'],
+    'Excel': ['ms excel'],
+    'Jira': [],
+    'Agile': ['scrum', 'kanban'],
+    'English': ['английский', 'английский язык']
+}
+
+
+class SkillExtractor:
+    def __init__(self, dictionary: Optional[Dict[str, List[str]]] = None):
+        """
+        Finds the skills mentioned in vacancy text using a dictionary of canonical skills and their aliases.
+
+        Every alias is compiled into one Aho-Corasick automaton, so a snippet
+        is scanned once however large the dictionary is. Matches must be whole
+        words, and where matches overlap the leftmost longest one wins, so
+        'MS SQL Server' isn't also reported as 'SQL'.
+
+        Args:
+            dictionary: Canonical skill -> aliases (default: SKILL_DICTIONARY)
+        """
+        self._aliases: Dict[str, str] = {}
+        self._automaton: Optional[AhoCorasick[str]] = None
+        self.add_skills(SKILL_DICTIONARY if dictionary is None else dictionary)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def add_skills(self, dictionary: Dict[str, List[str]]):
+        """
+        Add canonical skills and their aliases; an alias that's already known is remapped.
+
+        Args:
+            dictionary: Canonical skill -> aliases
+        """
+        for canonical, aliases in dictionary.items():
+            for alias in [canonical] + list(aliases or []):
+                alias = normalize_text(alias)
+                if alias:
+                    self._aliases[alias] = canonical
+        # Recompiled on the next extraction
+        self._automaton = None
+
+    def load(self, path: str) -> bool:
+        """
+        Add the skills of a JSON file of canonical skill -> aliases.
+
+        Args:
+            path: Path to the JSON file
+
+        Returns:
+            True if the file was loaded
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.add_skills(json.load(f))
+            logging.info(f"Loaded skill dictionary from {path}")
+            return True
+        except Exception as e:
+            logging.error(f"Error loading skill dictionary: {e}")
+            return False
+
+    def _build(self) -> AhoCorasick:
+        automaton = AhoCorasick()
+        for alias, canonical in self._aliases.items():
+            automaton.add(alias, canonical)
+        automaton.build()
+        self._automaton = automaton
+        return automaton
+
+    def canonical(self, skill: str) -> str:
+        """Get the canonical name of a skill, or the skill itself if it isn't in the dictionary"""
+        return self._aliases.get(normalize_text(skill), skill.strip())
+
+    def extract(self, text: str) -> List[str]:
+        """
+        Find the skills mentioned in a text.
+
+        Args:
+            text: Text such as a vacancy's requirement snippet
+
+        Returns:
+            Canonical names of the skills found, in order of first mention
+        """
+        text = normalize_text(text)
+        if not text:
+            return []
+        automaton = self._automaton or self._build()
+
+        # Whole-word matches, leftmost longest first
+        matches = sorted(
+            (match for match in automaton.search(text)
+             if (match[0] == 0 or not text[match[0] - 1].isalnum())
+             and (match[1] == len(text) or not text[match[1]].isalnum())),
+            key=lambda match: (match[0], -match[1])
+        )
+        skills = []
+        covered = 0
+        for start, end, canonical in matches:
+            if start < covered:
+                continue
+            covered = end
+            if canonical not in skills:
+                skills.append(canonical)
+        return skills
+
+
+# Shared extractor with the built-in dictionary and the optional data/skills.json next to this module
+default_extractor = SkillExtractor()
+_custom_dictionary = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.json")
+if os.path.exists(_custom_dictionary):
+    default_extractor.load(_custom_dictionary)
+
+
+def extract_skills(text: str) -> List[str]:
+    """Find the canonical skills mentioned in a text with the default extractor"""
+    return default_extractor.extract(text)
+
+
+def reextract_skills(vacancy: Dict) -> List[str]:
+    """
+    Find the canonical skills of a vacancy stored by an older extractor.
+
+    The title and the old skills (sentence fragments before the dictionary
+    existed) are searched again, so the result doesn't change when it's
+    extracted once more.
+    """
+    return extract_skills('\n'.join([vacancy.get('title') or ''] + list(vacancy.get('skills') or [])))
+
+
+if __name__ == "__main__":
+    # Throughput benchmark on requirement snippets shaped like hh.kz search results
+    snippets = [
+        "Опыт работы с Python от 3 лет, Django, postgres, REST API. Знание Docker",
+        "Уверенное знание SQL, опыт работы с MS SQL Server и ClickHouse. Английский язык на уровне чтения",
+        "Experience with FastAPI, asyncio, Redis, Kafka and k8s. Understanding of CI/CD",
+        "Знание ООП, паттерны проектирования, Git. Будет плюсом: Celery, RabbitMQ, Linux",
+        "Pandas, NumPy, scikit-learn, машинное обучение, Airflow, Spark. Опыт с AWS или GCP"
+    ] * 2000
+    extractor = SkillExtractor()
+    # Compile the automaton before timing
+    extractor.extract("Python")
+    started = time.perf_counter()
+    for snippet in snippets:
+        extractor.extract(snippet)
+    elapsed = time.perf_counter() - started
+    print(f"{len(extractor)} aliases, {len(snippets)} snippets in {elapsed:.2f}s: {len(snippets) / elapsed:,.0f} snippets/sec")
+    print(f"Example: {snippets[0]!r} -> {extractor.extract(snippets[0])}")
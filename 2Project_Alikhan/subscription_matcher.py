@@ -0,0 +1,189 @@
+import bisect
+import re
+import shlex
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from aho_corasick import AhoCorasick
+from skill_extractor import default_extractor
+from vacancy_utils import SALARY_FILTER_CURRENCY, normalize_text, parse_salary
+
+# Prefixes of the /subscribe arguments that set a filter other than keywords
+FILTER_PREFIXES = {
+    'skill': 'skills',
+    'salary': 'min_salary',
+    'location': 'locations',
+    'city': 'locations'
+}
+
+
+def normalize_location(location: str) -> str:
+    """Reduce a location such as 'Алматы, Бостандыкский район' to its normalized city"""
+    return normalize_text((location or '').split(',')[0])
+
+
+def _split_arguments(text: str) -> List[str]:
+    """Split arguments on whitespace, keeping double-quoted values together; apostrophes are plain text"""
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.quotes = '"'
+    lexer.commenters = ''
+    try:
+        return list(lexer)
+    except ValueError:
+        # An unclosed quote is taken literally
+        return text.split()
+
+
+def parse_subscription_filters(text: str) -> Dict:
+    """
+    Parse the arguments of the /subscribe command.
+
+    Arguments prefixed with 'skill:', 'salary:' or 'location:' set those
+    filters, anything else is a keyword; comma-separated keywords are
+    alternatives and double-quoted values may contain spaces, e.g.
+    python, "data engineer" skill:django salary:500000 location:Алматы
+
+    Args:
+        text: Command arguments
+
+    Returns:
+        Dictionary with 'keywords', 'skills', 'min_salary' and 'locations' (empty ones omitted)
+
+    Raises:
+        ValueError: If a salary filter has no amount
+    """
+    filters = {'keywords': [], 'skills': [], 'min_salary': None, 'locations': []}
+    words = []
+    for token in _split_arguments(text or ''):
+        prefix, _, value = token.partition(':')
+        field = FILTER_PREFIXES.get(prefix.lower()) if value else None
+        if field == 'min_salary':
+            amount = re.sub(r'\D', '', value)
+            if not amount:
+                raise ValueError(f"Invalid salary: {value}")
+            filters['min_salary'] = int(amount)
+        elif field:
+            filters[field].append(value.strip())
+        else:
+            words.append(token)
+
+    filters['keywords'] = [keyword.strip() for keyword in ' '.join(words).split(',') if keyword.strip()]
+    return {key: value for key, value in filters.items() if value}
+
+
+class SubscriptionMatcher:
+    def __init__(self, subscriptions: List[Dict]):
+        """
+        Matches vacancies against many subscriptions at once.
+
+        Subscriptions with identical filters are grouped, and every group is
+        indexed by one of its filters: keywords in an Aho-Corasick automaton
+        over the vacancy title and skills, skills and locations in inverted
+        indexes, minimum salaries in a sorted list. A vacancy therefore only
+        has to check the groups whose indexed filter it satisfies instead of
+        every subscription.
+
+        A vacancy matches a subscription when it contains any of its keywords,
+        has all of its skills, is in one of its locations and its salary can
+        reach the minimum, which is in tenge; filters that aren't set always pass.
+
+        Args:
+            subscriptions: Subscriber dictionaries as returned by DatabaseManager.get_all_active_subscribers
+        """
+        groups: Dict[tuple, Dict] = {}
+        for subscription in subscriptions:
+            group = self._normalize(subscription)
+            signature = (group['keywords'], group['skills'], group['min_salary'], group['locations'])
+            groups.setdefault(signature, dict(group, user_ids=[]))['user_ids'].append(subscription['user_id'])
+        self._groups = list(groups.values())
+
+        self._keywords = AhoCorasick()
+        self._by_skill = defaultdict(list)
+        self._by_location = defaultdict(list)
+        self._by_salary = []
+        self._unfiltered = []
+        for group_id, group in enumerate(self._groups):
+            if group['keywords']:
+                for keyword in group['keywords']:
+                    self._keywords.add(keyword, group_id)
+            elif group['skills']:
+                self._by_skill[group['skills'][0]].append(group_id)
+            elif group['locations']:
+                for location in group['locations']:
+                    self._by_location[location].append(group_id)
+            elif group['min_salary'] is not None:
+                self._by_salary.append((group['min_salary'], group_id))
+            else:
+                self._unfiltered.append(group_id)
+        self._keywords.build()
+        self._by_salary.sort()
+        self._salary_thresholds = [threshold for threshold, _ in self._by_salary]
+
+    def __len__(self) -> int:
+        return sum(len(group['user_ids']) for group in self._groups)
+
+    @staticmethod
+    def _normalize_skill(skill: str) -> str:
+        """Normalize a skill under its canonical name, so 'postgres' and 'PostgreSQL' are the same skill"""
+        return normalize_text(default_extractor.canonical(skill))
+
+    @classmethod
+    def _normalize(cls, subscription: Dict) -> Dict:
+        keywords = [keyword for keyword in subscription.get('keywords') or [] if keyword.strip()]
+        return {
+            # A keyword that names a skill also matches the canonical skill of a vacancy
+            'keywords': tuple(sorted({normalize_text(keyword) for keyword in keywords}
+                                     | {cls._normalize_skill(keyword) for keyword in keywords})),
+            'skills': tuple(sorted({cls._normalize_skill(skill) for skill in subscription.get('skills') or [] if skill.strip()})),
+            'min_salary': subscription.get('min_salary'),
+            'locations': tuple(sorted({normalize_location(location) for location in subscription.get('locations') or [] if location.strip()}))
+        }
+
+    @staticmethod
+    def _salary_ceiling(vacancy: Dict) -> Optional[int]:
+        """Highest pay of a vacancy in tenge, None if it isn't given or is in another currency"""
+        salary = parse_salary(vacancy.get('salary'))
+        if salary['salary_currency'] not in (None, SALARY_FILTER_CURRENCY):
+            return None
+        return salary['salary_max'] if salary['salary_max'] is not None else salary['salary_min']
+
+    def match(self, vacancy: Dict) -> List[int]:
+        """
+        Find the subscribers a vacancy should be sent to.
+
+        Args:
+            vacancy: Vacancy dictionary
+
+        Returns:
+            List of matching user IDs
+        """
+        skills = {self._normalize_skill(skill) for skill in vacancy.get('skills') or []}
+        location = normalize_location(vacancy.get('location'))
+        salary = self._salary_ceiling(vacancy)
+
+        candidates = set(self._unfiltered)
+        if len(self._keywords):
+            # Title and skills are separated by newlines so a keyword can't match across them
+            text = '\n'.join([normalize_text(vacancy.get('title'))] + sorted(skills))
+            for start, end, group_id in self._keywords.search(text):
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    candidates.add(group_id)
+        for skill in skills:
+            candidates.update(self._by_skill.get(skill, ()))
+        candidates.update(self._by_location.get(location, ()))
+        if salary is not None:
+            count = bisect.bisect_right(self._salary_thresholds, salary)
+            candidates.update(group_id for _, group_id in self._by_salary[:count])
+
+        user_ids = []
+        for group_id in candidates:
+            group = self._groups[group_id]
+            if group['skills'] and not skills.issuperset(group['skills']):
+                continue
+            if group['locations'] and location not in group['locations']:
+                continue
+            if group['min_salary'] is not None and (salary is None or salary < group['min_salary']):
+                continue
+            user_ids.extend(group['user_ids'])
+        return user_ids
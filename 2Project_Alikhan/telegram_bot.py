@@ -1,381 +1,547 @@
-import logging
-import asyncio
-import aiogram
-from aiogram import Bot, Dispatcher, types
-from aiogram.filters.command import Command
-from aiogram.utils.markdown import hbold, hlink, hitalic, hcode
-from datetime import datetime
-import threading
-import time
-import schedule
-import os
-import json
-
-from web_hh_scrapping import HHScraper
-from db_manager import DatabaseManager
-
-# Setup logging
-logging.basicConfig(
-    filename='bot.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-# Initialize bot with token
-BOT_TOKEN = "8181311299:AAH7RECw8gnwE7vlgR-sZNMzeGjSkPdt2vM"
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
-
-# Initialize database manager
-db = DatabaseManager()
-
-# Initialize scraper
-scraper = HHScraper(search_query="Python")
-
-# Global variable to track if update is running
-is_updating = False
-
-# Function to format vacancy for display in Telegram
-def format_vacancy(vacancy):
-    skills_text = ""
-    if vacancy.get('skills'):
-        skills_list = vacancy.get('skills', [])
-        if skills_list:
-            skills_text = f"\n{hbold('Skills:')} {', '.join(skills_list)}"
-    
-    # Add salary information
-    salary_text = ""
-    if vacancy.get('salary') and vacancy.get('salary') != "Not specified":
-        salary_text = f"\n{hbold('Salary:')} {vacancy['salary']}"
-    
-    # Add experience information
-    exp_text = ""
-    if vacancy.get('experience') and vacancy.get('experience') != "Not specified":
-        exp_text = f"\n{hbold('Experience:')} {vacancy['experience']}"
-    
-    # Add location information
-    location_text = ""
-    if vacancy.get('location') and vacancy.get('location') != "Not specified":
-        location_text = f"\n{hbold('Location:')} {vacancy['location']}"
-    
-    return (
-        f"{hbold('Vacancy:')} {vacancy['title']}\n"
-        f"{hbold('Company:')} {vacancy['company']}"
-        f"{salary_text}"
-        f"{exp_text}"
-        f"{location_text}"
-        f"{skills_text}\n"
-        f"{hbold('Link:')} {hlink('Open vacancy', vacancy['link'])}\n"
-        f"{hitalic('Added:')} {vacancy['created_at']}\n"
-    )
-
-# Command handler for /start
-@dp.message(Command("start"))
-async def cmd_start(message: types.Message):
-    logging.info(f"User {message.from_user.id} started the bot")
-    await message.answer(
-        f"Hello, {message.from_user.first_name}!\n\n"
-        f"I'm a bot that helps you find Python vacancies on hh.kz.\n\n"
-        f"Available commands:\n"
-        f"/find [query] - Search for vacancies with a specific query\n"
-        f"/search [keyword] - Search for vacancies with a specific keyword\n"
-        f"/latest - Show the latest 5 vacancies\n"
-        f"/update - Manually update the vacancy database\n"
-        f"/subscribe - Subscribe to new vacancy notifications\n"
-        f"/unsubscribe - Unsubscribe from notifications\n"
-        f"/stats - Show detailed database statistics\n"
-        f"/help - Display this help message"
-    )
-
-# Command handler for /help
-@dp.message(Command("help"))
-async def cmd_help(message: types.Message):
-    logging.info(f"User {message.from_user.id} requested help")
-    await message.answer(
-        f"{hbold('Available Commands:')}\n\n"
-        f"{hbold('/find [query]')} - Search for vacancies containing the specified query\n"
-        f"Example: {hcode('/find Python Django')}\n\n"
-        f"{hbold('/search [keyword]')} - Search for vacancies with a specific keyword in title or skills\n"
-        f"Example: {hcode('/search Django')}\n\n"
-        f"{hbold('/latest')} - Show the 5 most recently added vacancies\n\n"
-        f"{hbold('/update')} - Manually trigger an update to fetch new vacancies\n\n"
-        f"{hbold('/subscribe')} - Subscribe to receive notifications about new vacancies\n\n"
-        f"{hbold('/unsubscribe')} - Unsubscribe from vacancy notifications\n\n"
-        f"{hbold('/stats')} - Show detailed statistics about the vacancy database\n\n"
-        f"{hbold('/help')} - Display this help message"
-    )
-
-# Command handler for /find
-@dp.message(Command("find"))
-async def cmd_find(message: types.Message):
-    # Extract the search query from the message
-    command_parts = message.text.split(maxsplit=1)
-    
-    if len(command_parts) < 2:
-        await message.answer("Please provide a search term. Example: /find Python Django")
-        return
-    
-    search_term = command_parts[1]
-    logging.info(f"User {message.from_user.id} searching for '{search_term}'")
-    await message.answer(f"Searching for vacancies with '{search_term}'...")
-    
-    # Search for vacancies in the database
-    vacancies = db.get_vacancies_by_keyword(search_term, limit=10)
-    
-    if not vacancies:
-        await message.answer(f"No vacancies found for '{search_term}'.")
-        return
-    
-    # Send the results
-    await message.answer(f"Found {len(vacancies)} vacancies for '{search_term}':")
-    
-    for vacancy in vacancies:
-        await message.answer(format_vacancy(vacancy), parse_mode="HTML", disable_web_page_preview=False)
-
-# Command handler for /search (similar to find but this explicitly mentions it searches skills too)
-@dp.message(Command("search"))
-async def cmd_search(message: types.Message):
-    # Extract the search query from the message
-    command_parts = message.text.split(maxsplit=1)
-    
-    if len(command_parts) < 2:
-        await message.answer("Please provide a keyword to search in titles and skills. Example: /search Django")
-        return
-    
-    search_term = command_parts[1]
-    logging.info(f"User {message.from_user.id} searching for keyword '{search_term}'")
-    await message.answer(f"Searching for vacancies with keyword '{search_term}' in title or skills...")
-    
-    # Search for vacancies in the database
-    vacancies = db.get_vacancies_by_keyword(search_term, limit=10)
-    
-    if not vacancies:
-        await message.answer(f"No vacancies found with keyword '{search_term}'.")
-        return
-    
-    # Send the results
-    await message.answer(f"Found {len(vacancies)} vacancies with keyword '{search_term}':")
-    
-    for vacancy in vacancies:
-        await message.answer(format_vacancy(vacancy), parse_mode="HTML", disable_web_page_preview=False)
-
-# Command handler for /latest
-@dp.message(Command("latest"))
-async def cmd_latest(message: types.Message):
-    logging.info(f"User {message.from_user.id} requested latest vacancies")
-    await message.answer("Getting the latest vacancies...")
-    
-    # Get the latest vacancies from the database
-    latest_vacancies = db.get_latest_vacancies(limit=5)
-    
-    if not latest_vacancies:
-        await message.answer("No vacancies found in the database.")
-        return
-    
-    # Send the results
-    await message.answer(f"Latest {len(latest_vacancies)} vacancies:")
-    
-    for vacancy in latest_vacancies:
-        await message.answer(format_vacancy(vacancy), parse_mode="HTML", disable_web_page_preview=False)
-
-# Command handler for /update
-@dp.message(Command("update"))
-async def cmd_update(message: types.Message):
-    global is_updating
-    
-    if is_updating:
-        await message.answer("Update is already in progress. Please wait...")
-        return
-    
-    logging.info(f"User {message.from_user.id} triggered manual update")
-    await message.answer("Starting manual update of vacancies...")
-    
-    # Run the update in a separate thread to avoid blocking the bot
-    update_thread = threading.Thread(target=update_vacancies, args=(message.chat.id,))
-    update_thread.start()
-
-# Command handler for /subscribe
-@dp.message(Command("subscribe"))
-async def cmd_subscribe(message: types.Message):
-    user_id = message.from_user.id
-    logging.info(f"User {user_id} subscribing to vacancy updates")
-    
-    # Add user to subscribers
-    if db.add_subscription(user_id):
-        await message.answer(
-            "You have successfully subscribed to Python vacancy updates!\n\n"
-            "You will receive notifications when new vacancies are found.\n\n"
-            "To unsubscribe, use the /unsubscribe command."
-        )
-    else:
-        await message.answer("Failed to subscribe. Please try again later.")
-
-# Command handler for /unsubscribe
-@dp.message(Command("unsubscribe"))
-async def cmd_unsubscribe(message: types.Message):
-    user_id = message.from_user.id
-    logging.info(f"User {user_id} unsubscribing from vacancy updates")
-    
-    # Remove user from subscribers
-    if db.remove_subscription(user_id):
-        await message.answer(
-            "You have been unsubscribed from vacancy updates.\n\n"
-            "You will no longer receive notifications about new vacancies.\n\n"
-            "To subscribe again, use the /subscribe command."
-        )
-    else:
-        await message.answer("Failed to unsubscribe. Please try again later.")
-
-# Command handler for /stats
-@dp.message(Command("stats"))
-async def cmd_stats(message: types.Message):
-    logging.info(f"User {message.from_user.id} requested statistics")
-    await message.answer("Gathering database statistics...")
-    
-    # Get detailed statistics
-    stats = db.get_stats()
-    
-    if 'error' in stats:
-        await message.answer(f"Error retrieving statistics: {stats['error']}")
-        return
-    
-    # Format top companies
-    companies_text = ""
-    if 'companies' in stats and stats['companies']:
-        companies_text = "\n\nTop Companies:\n"
-        for i, company in enumerate(stats['companies'], 1):
-            companies_text += f"{i}. {company['name']} - {company['count']} vacancies\n"
-    
-    # Format top skills
-    skills_text = ""
-    if 'skills' in stats and stats['skills']:
-        skills_text = "\n\nTop Skills in Demand:\n"
-        for i, skill in enumerate(stats['skills'], 1):
-            skills_text += f"{i}. {skill['name']} - {skill['count']} occurrences\n"
-    
-    # Send statistics
-    await message.answer(
-        f"Database Statistics\n\n"
-        f"Total Python vacancies: {stats.get('total_vacancies', 0)}\n"
-        f"Active subscribers: {stats.get('active_subscribers', 0)}"
-        f"{companies_text}"
-        f"{skills_text}\n\n"
-        f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    )
-
-# Function to update vacancies and notify the chat
-def update_vacancies(chat_id=None):
-    global is_updating
-    
-    try:
-        is_updating = True
-        logging.info("Starting vacancy update")
-        
-        # Run the scraper once
-        _, new_vacancies, _, all_vacancies_file, new_vacancies_file = scraper.run_once()
-        
-        # Add new vacancies to the database
-        added_count = db.add_multiple_vacancies(new_vacancies)
-        
-        # Notify the chat if a chat_id is provided
-        if chat_id and added_count > 0:
-            asyncio.run(bot.send_message(
-                chat_id,
-                f" Update completed!\n\n"
-                f"Added {added_count} new Python vacancies to the database.\n"
-                f"All vacancies saved to: {os.path.basename(all_vacancies_file)}\n"
-                f"New vacancies saved to: {os.path.basename(new_vacancies_file) if new_vacancies_file else 'None'}"
-            ))
-        elif chat_id:
-            asyncio.run(bot.send_message(
-                chat_id,
-                " Update completed! No new vacancies found."
-            ))
-        
-        # Notify subscribers about new vacancies
-        if added_count > 0:
-            notify_subscribers(new_vacancies)
-            
-        logging.info(f"Update completed. Added {added_count} new vacancies.")
-        
-    except Exception as e:
-        logging.error(f"Error during update: {e}")
-        if chat_id:
-            asyncio.run(bot.send_message(
-                chat_id,
-                f"Error during update: {str(e)}"
-            ))
-    finally:
-        is_updating = False
-
-# Function to notify subscribers about new vacancies
-def notify_subscribers(new_vacancies):
-    if not new_vacancies:
-        return
-    
-    subscribers = db.get_all_active_subscribers()
-    logging.info(f"Notifying {len(subscribers)} subscribers about {len(new_vacancies)} new vacancies")
-    
-    for subscriber in subscribers:
-        user_id = subscriber['user_id']
-        
-        try:
-            # Send notification about new vacancies
-            asyncio.run(bot.send_message(
-                user_id,
-                f"Found {len(new_vacancies)} new Python vacancies!\n\n"
-                f"Here are some of the latest openings:"
-            ))
-            
-            # Send up to 3 newest vacancies
-            for i, vacancy in enumerate(new_vacancies[:3]):
-                asyncio.run(bot.send_message(
-                    user_id,
-                    format_vacancy(vacancy),
-                    parse_mode="HTML",
-                    disable_web_page_preview=False
-                ))
-                
-                # Record that we sent this notification
-                db.add_notification(user_id, vacancy['id'])
-                
-            # If there are more than 3 vacancies, suggest using /latest
-            if len(new_vacancies) > 3:
-                asyncio.run(bot.send_message(
-                    user_id,
-                    f"There are {len(new_vacancies) - 3} more new vacancies. "
-                    f"Use /latest to see the most recent ones, or /search to find specific vacancies."
-                ))
-                
-            logging.info(f"Sent vacancy notifications to user {user_id}")
-                
-        except Exception as e:
-            logging.error(f"Error sending notifications to user {user_id}: {e}")
-
-# Schedule regular updates
-def schedule_updates():
-    schedule.every(10).minutes.do(update_vacancies)
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
-
-# Main function to start the bot
-async def main():
-    # Start the scheduler in a separate thread
-    scheduler_thread = threading.Thread(target=schedule_updates)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
-    
-    # Start the bot
-    logging.info("Bot started")
-    await dp.start_polling(bot)
-
-if __name__ == "__main__":
-    # Run the initial update to populate the database
-    logging.info("Running initial update to populate the database...")
-    update_vacancies()
-    
-    # Start the bot
-    logging.info("Starting the bot...")
-    asyncio.run(main()) 
+import logging
+import asyncio
+import html
+import aiogram
+from aiogram import Bot, Dispatcher, F, types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters.command import Command
+from aiogram.utils.markdown import hbold, hlink, hitalic, hcode
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from collections import OrderedDict
+from datetime import datetime
+import os
+import json
+import uuid
+
+from web_hh_scrapping import HHScraper
+from db_manager import DatabaseManager
+from async_db import AsyncDatabaseManager
+from notifier import NotificationFanout
+from subscription_matcher import parse_subscription_filters
+from vacancy_utils import parse_range_filters
+from query_cache import GenerationCache
+from scheduler import Scheduler
+from orchestrator import CrawlOrchestrator
+
+# Setup logging
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Initialize bot with token
+BOT_TOKEN = "8181311299:AAH7RECw8gnwE7vlgR-sZNMzeGjSkPdt2vM"
+bot = Bot(token=BOT_TOKEN)
+dp = Dispatcher()
+
+# Initialize database manager
+db = DatabaseManager()
+
+# Handlers query the database through a thread pool so they never block the event loop
+async_db = AsyncDatabaseManager(db)
+
+# Pipeline feeding crawl results into the database, built by main() so importing the bot starts no scraper
+orchestrator = None
+
+# Caches query results and rendered responses until the next ingestion changes the vacancies
+response_cache = GenerationCache()
+
+# Seconds between checks of the data generation, which catch ingestions by a separate scraper process
+GENERATION_INTERVAL = 30
+
+# Subscriber and outbox counts in /stats change between ingestions, so they are only cached briefly
+STATS_CACHE_TTL = 30
+
+# Sends subscriber notifications within Telegram's rate limits
+fanout = NotificationFanout(bot, async_db)
+
+# Runs the periodic and manual updates and the notification fan-out on the bot's event loop
+scheduler = Scheduler(max_workers=2)
+
+# Seconds between vacancy updates, plus up to UPDATE_JITTER random seconds
+UPDATE_INTERVAL = 600
+UPDATE_JITTER = 30
+
+# Seconds between outbox drains, which deliver notifications whose retry delay has passed
+NOTIFY_INTERVAL = 60
+
+# Paginated result lists, by the token in their buttons' callback data
+PAGE_SIZE = 5
+MAX_RESULT_SESSIONS = 1000
+MESSAGE_LIMIT = 4096
+result_sessions = OrderedDict()
+
+# Function to format vacancy for display in Telegram; every field is escaped, since the message is sent as HTML
+def format_vacancy(vacancy):
+    skills_text = ""
+    if vacancy.get('skills'):
+        skills_list = vacancy.get('skills', [])
+        if skills_list:
+            skills_text = f"\n{hbold('Skills:')} {html.escape(', '.join(skills_list))}"
+    
+    # Add salary information
+    salary_text = ""
+    if vacancy.get('salary') and vacancy.get('salary') != "Not specified":
+        salary_text = f"\n{hbold('Salary:')} {html.escape(vacancy['salary'])}"
+    
+    # Add experience information
+    exp_text = ""
+    if vacancy.get('experience') and vacancy.get('experience') != "Not specified":
+        exp_text = f"\n{hbold('Experience:')} {html.escape(vacancy['experience'])}"
+    
+    # Add location information
+    location_text = ""
+    if vacancy.get('location') and vacancy.get('location') != "Not specified":
+        location_text = f"\n{hbold('Location:')} {html.escape(vacancy['location'])}"
+    
+    return (
+        f"{hbold('Vacancy:')} {html.escape(vacancy['title'])}\n"
+        f"{hbold('Company:')} {html.escape(vacancy['company'])}"
+        f"{salary_text}"
+        f"{exp_text}"
+        f"{location_text}"
+        f"{skills_text}\n"
+        f"{hbold('Link:')} {hlink('Open vacancy', html.escape(vacancy['link']))}\n"
+        f"{hitalic('Added:')} {html.escape(str(vacancy['created_at']))}\n"
+    )
+
+# Function to format a vacancy, reusing the HTML rendered for the same vacancy content
+def format_vacancy_cached(vacancy):
+    key = ('vacancy', vacancy['id'], vacancy.get('fingerprint'))
+    text = response_cache.get(key)
+    if text is None:
+        text = format_vacancy(vacancy)
+        response_cache.set(key, text)
+    return text
+
+# Command handler for /start
+@dp.message(Command("start"))
+async def cmd_start(message: types.Message):
+    logging.info(f"User {message.from_user.id} started the bot")
+    await message.answer(
+        f"Hello, {message.from_user.first_name}!\n\n"
+        f"I'm a bot that helps you find Python vacancies on hh.kz.\n\n"
+        f"Available commands:\n"
+        f"/find [query] - Search for vacancies with a specific query, salary>= and exp<= filters\n"
+        f"/search [keyword] - Search for vacancies with a specific keyword\n"
+        f"/latest - Show the latest 5 vacancies\n"
+        f"/update - Manually update the vacancy database\n"
+        f"/subscribe [filters] - Subscribe to new vacancy notifications\n"
+        f"/unsubscribe - Unsubscribe from notifications\n"
+        f"/stats - Show detailed database statistics\n"
+        f"/help - Display this help message"
+    )
+
+# Command handler for /help
+@dp.message(Command("help"))
+async def cmd_help(message: types.Message):
+    logging.info(f"User {message.from_user.id} requested help")
+    await message.answer(
+        f"{hbold('Available Commands:')}\n\n"
+        f"{hbold('/find [query]')} - Search for vacancies containing the specified query\n"
+        f"Example: {hcode('/find Python Django')}\n"
+        f"Add salary>=, salary<=, exp>= or exp<= to filter by salary (also 600k) and years of experience\n"
+        f"Example: {hcode('/find Python salary>=600000 exp<=3')}\n\n"
+        f"{hbold('/search [keyword]')} - Search for vacancies with a specific keyword in title or skills\n"
+        f"Example: {hcode('/search Django')}\n\n"
+        f"{hbold('/latest')} - Show the 5 most recently added vacancies\n\n"
+        f"Results are shown 5 per page, use the Newer and Older buttons to page through them\n\n"
+        f"{hbold('/update')} - Manually trigger an update to fetch new vacancies\n\n"
+        f"{hbold('/subscribe [filters]')} - Subscribe to receive notifications about new vacancies, "
+        f"optionally only those matching any of the keywords and the skill:, salary: and location: filters\n"
+        f"Example: {hcode('/subscribe python, data engineer skill:Django salary:500000 location:Алматы')}\n\n"
+        f"{hbold('/unsubscribe')} - Unsubscribe from vacancy notifications\n\n"
+        f"{hbold('/stats')} - Show detailed statistics about the vacancy database\n\n"
+        f"{hbold('/help')} - Display this help message"
+    )
+
+# Command handler for /find
+@dp.message(Command("find"))
+async def cmd_find(message: types.Message):
+    # Extract the search query from the message
+    command_parts = message.text.split(maxsplit=1)
+    
+    if len(command_parts) < 2:
+        await message.answer("Please provide a search term. Example: /find Python Django salary>=600000 exp<=3")
+        return
+    
+    search_term = command_parts[1]
+    logging.info(f"User {message.from_user.id} searching for '{search_term}'")
+    
+    # Salary and experience filters run as range scans, the rest is the full-text query
+    keyword, ranges = parse_range_filters(search_term)
+    
+    # Send the first page of results, the buttons page through the rest
+    await send_results(
+        message,
+        keyword=keyword or None,
+        ranges=ranges,
+        title=f"Vacancies for '{search_term}'",
+        empty_text=f"No vacancies found for '{search_term}'."
+    )
+
+# Command handler for /search (similar to find but this explicitly mentions it searches skills too)
+@dp.message(Command("search"))
+async def cmd_search(message: types.Message):
+    # Extract the search query from the message
+    command_parts = message.text.split(maxsplit=1)
+    
+    if len(command_parts) < 2:
+        await message.answer("Please provide a keyword to search in titles and skills. Example: /search Django")
+        return
+    
+    search_term = command_parts[1]
+    logging.info(f"User {message.from_user.id} searching for keyword '{search_term}'")
+    
+    # Send the first page of results, the buttons page through the rest
+    await send_results(
+        message,
+        keyword=search_term,
+        title=f"Vacancies with keyword '{search_term}' in title or skills",
+        empty_text=f"No vacancies found with keyword '{search_term}'."
+    )
+
+# Command handler for /latest
+@dp.message(Command("latest"))
+async def cmd_latest(message: types.Message):
+    logging.info(f"User {message.from_user.id} requested latest vacancies")
+    
+    # Send the latest vacancies, the buttons page back to older ones
+    await send_results(
+        message,
+        title="Latest vacancies",
+        empty_text="No vacancies found in the database."
+    )
+
+# Function to render a page of results as one message, newest vacancy first
+def render_page(session, page):
+    header = f"{hbold(session['title'])} (page {session['page']})\n\n"
+    entries = [format_vacancy_cached(vacancy) for vacancy in page['vacancies']]
+    
+    # Drop vacancies that don't fit in one message; the ones next to the page we came from
+    # are kept, so the dropped ones start the next page in the same direction
+    while len(entries) > 1 and len(header) + len("\n".join(entries)) > MESSAGE_LIMIT:
+        if session.get('backward'):
+            entries.pop(0)
+            page['vacancies'].pop(0)
+            page['has_prev'] = True
+        else:
+            entries.pop()
+            page['vacancies'].pop()
+            page['has_next'] = True
+    
+    # Cutting the text could split an HTML tag, so a lone vacancy that's still too long loses its skills list
+    if len(header) + len("\n".join(entries)) > MESSAGE_LIMIT:
+        entries = [format_vacancy(dict(page['vacancies'][0], skills=[]))]
+    return header + "\n".join(entries)
+
+# Function to build the previous/next buttons of a page
+def page_keyboard(token, page):
+    keyboard = InlineKeyboardBuilder()
+    if page['has_prev']:
+        keyboard.button(text="« Newer", callback_data=f"p:{token}:prev")
+    if page['has_next']:
+        keyboard.button(text="Older »", callback_data=f"p:{token}:next")
+    return keyboard.as_markup() if page['has_prev'] or page['has_next'] else None
+
+# Function to remember the first and last vacancy of the page a session shows
+def store_page(session, page):
+    first, last = page['vacancies'][0], page['vacancies'][-1]
+    session['first'] = (first['created_at'], first['id'])
+    session['last'] = (last['created_at'], last['id'])
+
+# Function to load and render the first page of a result list
+async def load_first_page(title, keyword=None, ranges=None):
+    page = await async_db.get_vacancies_page(keyword, limit=PAGE_SIZE, ranges=ranges)
+    if not page['vacancies']:
+        return None
+    
+    text = render_page({'title': title, 'page': 1}, page)
+    return text, page
+
+# Function to send the first page of a result list and start its session
+async def send_results(message, title, empty_text, keyword=None, ranges=None):
+    # The first page is the same for everyone until the next ingestion, so bursts are served from memory
+    first_page = await response_cache.get_or_compute(
+        ('results', title, keyword, tuple(ranges or ())), lambda: load_first_page(title, keyword, ranges)
+    )
+    
+    if first_page is None:
+        await message.answer(empty_text)
+        return
+    
+    text, page = first_page
+    session = {'keyword': keyword, 'ranges': ranges, 'title': title, 'page': 1}
+    store_page(session, page)
+    
+    # Keep the most recent sessions only; older result lists stop paging
+    token = uuid.uuid4().hex[:12]
+    result_sessions[token] = session
+    while len(result_sessions) > MAX_RESULT_SESSIONS:
+        result_sessions.popitem(last=False)
+    
+    await message.answer(text, parse_mode="HTML", disable_web_page_preview=True,
+                         reply_markup=page_keyboard(token, page))
+
+# Callback handler for the previous/next buttons of result lists
+@dp.callback_query(F.data.startswith("p:"))
+async def on_results_page(callback: types.CallbackQuery):
+    _, token, direction = callback.data.split(":")
+    session = result_sessions.get(token)
+    
+    if session is None:
+        await callback.answer("These results have expired, please run the command again.", show_alert=True)
+        return
+    
+    backward = direction == "prev"
+    key = session['first'] if backward else session['last']
+    page = await async_db.get_vacancies_page(session['keyword'], key, backward=backward, limit=PAGE_SIZE,
+                                             ranges=session['ranges'])
+    
+    if not page['vacancies']:
+        await callback.answer("No more vacancies.")
+        return
+    
+    session['page'] += -1 if backward else 1
+    session['backward'] = backward
+    text = render_page(session, page)
+    store_page(session, page)
+    result_sessions.move_to_end(token)
+    
+    # Show the new page in place of the old one
+    try:
+        await callback.message.edit_text(text, parse_mode="HTML", disable_web_page_preview=True,
+                                         reply_markup=page_keyboard(token, page))
+    except TelegramBadRequest as e:
+        logging.warning(f"Couldn't show the results page: {e}")
+    await callback.answer()
+
+# Command handler for /update
+@dp.message(Command("update"))
+async def cmd_update(message: types.Message):
+    if scheduler.is_running('update'):
+        await message.answer("Update is already in progress. I'll report when it finishes...")
+    else:
+        logging.info(f"User {message.from_user.id} triggered manual update")
+        await message.answer("Starting manual update of vacancies...")
+    
+    # A run already in progress is joined instead of starting another one
+    try:
+        report = await scheduler.trigger('update')
+    except Exception as e:
+        await message.answer(f"Error during update: {str(e)}")
+        return
+    
+    if report['added'] > 0:
+        await message.answer(
+            f" Update completed!\n\n"
+            f"Added {report['added']} new Python vacancies to the database.\n"
+            f"All vacancies saved to: {os.path.basename(report['all_vacancies_file'])}\n"
+            f"New vacancies saved to: {os.path.basename(report['new_vacancies_file']) if report['new_vacancies_file'] else 'None'}"
+        )
+    else:
+        await message.answer(" Update completed! No new vacancies found.")
+
+# Command handler for /subscribe
+@dp.message(Command("subscribe"))
+async def cmd_subscribe(message: types.Message):
+    user_id = message.from_user.id
+    logging.info(f"User {user_id} subscribing to vacancy updates")
+    
+    # Parse the optional keyword, skill, salary and location filters
+    command_parts = message.text.split(maxsplit=1)
+    try:
+        filters = parse_subscription_filters(command_parts[1] if len(command_parts) > 1 else "")
+    except ValueError as e:
+        await message.answer(
+            f"Couldn't read the filters: {e}\n\n"
+            f"Example: /subscribe python, data engineer skill:Django salary:500000 location:Алматы"
+        )
+        return
+    
+    # Add user to subscribers
+    if await async_db.add_subscription(user_id, **filters):
+        await message.answer(
+            "You have successfully subscribed to Python vacancy updates!\n\n"
+            f"{describe_filters(filters)}\n\n"
+            "You will receive notifications when new vacancies are found.\n\n"
+            "To unsubscribe, use the /unsubscribe command."
+        )
+    else:
+        await message.answer("Failed to subscribe. Please try again later.")
+
+# Function to describe subscription filters to the user
+def describe_filters(filters):
+    if not filters:
+        return "Filters: none, you will be notified about every new vacancy."
+    
+    lines = ["Filters:"]
+    if filters.get('keywords'):
+        lines.append(f"Keywords (any): {', '.join(filters['keywords'])}")
+    if filters.get('skills'):
+        lines.append(f"Skills (all): {', '.join(filters['skills'])}")
+    if filters.get('min_salary'):
+        lines.append(f"Salary from: {filters['min_salary']}")
+    if filters.get('locations'):
+        lines.append(f"Locations: {', '.join(filters['locations'])}")
+    return "\n".join(lines)
+
+# Command handler for /unsubscribe
+@dp.message(Command("unsubscribe"))
+async def cmd_unsubscribe(message: types.Message):
+    user_id = message.from_user.id
+    logging.info(f"User {user_id} unsubscribing from vacancy updates")
+    
+    # Remove user from subscribers
+    if await async_db.remove_subscription(user_id):
+        await message.answer(
+            "You have been unsubscribed from vacancy updates.\n\n"
+            "You will no longer receive notifications about new vacancies.\n\n"
+            "To subscribe again, use the /subscribe command."
+        )
+    else:
+        await message.answer("Failed to unsubscribe. Please try again later.")
+
+# Command handler for /stats
+@dp.message(Command("stats"))
+async def cmd_stats(message: types.Message):
+    logging.info(f"User {message.from_user.id} requested statistics")
+    
+    # Get detailed statistics, cached until the next ingestion or for STATS_CACHE_TTL seconds
+    try:
+        stats_text = await response_cache.get_or_compute('stats', build_stats_text, ttl=STATS_CACHE_TTL)
+    except RuntimeError as e:
+        await message.answer(f"Error retrieving statistics: {e}")
+        return
+    
+    # Send statistics
+    cache_stats = response_cache.stats()
+    await message.answer(
+        f"{stats_text}\n"
+        f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"
+    )
+
+# Function to gather database statistics and format them for /stats
+async def build_stats_text():
+    stats = await async_db.get_stats()
+    
+    if 'error' in stats:
+        raise RuntimeError(stats['error'])
+    
+    # Format top companies
+    companies_text = ""
+    if 'companies' in stats and stats['companies']:
+        companies_text = "\n\nTop Companies:\n"
+        for i, company in enumerate(stats['companies'], 1):
+            companies_text += f"{i}. {company['name']} - {company['count']} vacancies\n"
+    
+    # Format top skills
+    skills_text = ""
+    if 'skills' in stats and stats['skills']:
+        skills_text = "\n\nTop Skills in Demand:\n"
+        for i, skill in enumerate(stats['skills'], 1):
+            skills_text += f"{i}. {skill['name']} - {skill['count']} occurrences\n"
+    
+    return (
+        f"Database Statistics\n\n"
+        f"Total Python vacancies: {stats.get('total_vacancies', 0)}\n"
+        f"Active subscribers: {stats.get('active_subscribers', 0)}\n"
+        f"Pending notifications: {stats.get('outbox', {}).get('pending', 0)}"
+        f"{companies_text}"
+        f"{skills_text}\n\n"
+        f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+
+# Function to read the data generation off the event loop, so cache lookups never touch the database
+async def refresh_generation():
+    generation = await async_db.run(lambda: db.generation)
+    response_cache.update_generation(generation)
+    return generation
+
+# Function to update vacancies and notify subscribers, run by the scheduler
+async def update_vacancies():
+    # Crawl and write the results to the database on the scheduler's thread pool
+    report = await scheduler.run_blocking(orchestrator.run_once)
+    
+    # Drop the cached results the crawl made stale
+    try:
+        await scheduler.trigger('generation')
+    except Exception as e:
+        logging.error(f"Error refreshing the data generation: {e}")
+    
+    # Deliver the queued notifications, joining a drain that is already running
+    try:
+        await scheduler.trigger('notify')
+    except Exception as e:
+        logging.error(f"Error notifying subscribers: {e}")
+    return report
+
+# Build the messages announcing a subscriber's queued vacancies
+def build_notification_messages(items):
+    vacancies = [item['payload'] for item in items]
+    
+    # Announce the new vacancies, show up to 3 of them and suggest /latest for the rest
+    messages = [{
+        'text': f"Found {len(vacancies)} new Python vacancies!\n\n"
+                f"Here are some of the latest openings:"
+    }]
+    # Each vacancy's outbox item is acknowledged once the message showing it is sent
+    for item in items[:3]:
+        messages.append({
+            'text': format_vacancy(item['payload']),
+            'parse_mode': "HTML",
+            'disable_web_page_preview': False,
+            'ids': [item['id']]
+        })
+    if len(vacancies) > 3:
+        messages.append({
+            'text': f"There are {len(vacancies) - 3} more new vacancies. "
+                    f"Use /latest to see the most recent ones, or /search to find specific vacancies.",
+            'ids': [item['id'] for item in items[3:]]
+        })
+    return messages
+
+# Function to start delivering notifications as soon as a crawled page queued some, called from the crawl thread
+def request_notifications(result):
+    scheduler.request('generation')
+    scheduler.request('notify')
+
+# Function to deliver the notifications queued in the outbox to subscribers
+async def notify_subscribers():
+    depth = await async_db.get_outbox_depth()
+    logging.info(f"Delivering {depth['pending']} queued notifications")
+    return await fanout.drain_outbox(build_notification_messages)
+
+# Main function to start the bot
+async def main(initial_update=False, update_interval=UPDATE_INTERVAL, update_jitter=UPDATE_JITTER,
+               crawl_orchestrator=None):
+    global orchestrator
+    if crawl_orchestrator is not None:
+        orchestrator = crawl_orchestrator
+    else:
+        orchestrator = CrawlOrchestrator(HHScraper(search_query="Python"), db)
+    orchestrator.on_ingested = request_notifications
+    
+    # Periodic updates (None for manual ones only), starting right away to populate the database if requested
+    scheduler.add_job('update', update_vacancies, interval=update_interval, jitter=update_jitter,
+                      run_at_start=initial_update)
+    
+    # Follow the data generation, also of ingestions by a separate scraper process
+    scheduler.add_job('generation', refresh_generation, interval=GENERATION_INTERVAL, run_at_start=True)
+    
+    # Resume delivering notifications left in the outbox by a previous run, then retry failed ones periodically
+    scheduler.add_job('notify', notify_subscribers, interval=NOTIFY_INTERVAL, run_at_start=True)
+    scheduler.start()
+    
+    # Start the bot
+    logging.info("Bot started")
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await scheduler.stop()
+
+if __name__ == "__main__":
+    # Start the bot
+    logging.info("Starting the bot...")
+    asyncio.run(main(initial_update=True)) 
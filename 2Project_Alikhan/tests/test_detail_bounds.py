@@ -0,0 +1,49 @@
+from db_manager import DatabaseManager
+
+CARD = {
+    'id': '1001',
+    'title': 'Python Developer',
+    'company': 'Company',
+    'link': 'https://hh.kz/vacancy/1001',
+    'skills': ['Python'],
+    'salary': 'от 300 000 ₸',
+    'experience': '1-3 года',
+    'location': 'Алматы'
+}
+
+
+def bounds(db):
+    cursor = db._read_cursor()
+    cursor.execute('''
+    SELECT salary_min, salary_max, salary_currency, experience_min, experience_max FROM vacancies WHERE id = ?
+    ''', ('1001',))
+    return cursor.fetchone()
+
+
+def test_card_update_keeps_the_bounds_of_the_vacancy_page(tmp_path):
+    db = DatabaseManager(str(tmp_path / "vacancies.db"))
+    try:
+        db.bulk_upsert_vacancies([CARD])
+        db.add_vacancy_details([dict(CARD, details={
+            'salary': 'от 500 000 до 800 000 ₸ на руки',
+            'experience': '3–6 лет',
+            'key_skills': ['Python'],
+            'fetched_at': '2026-01-01 10:00:00'
+        })])
+        details_bounds = bounds(db)
+        assert details_bounds[:2] == (500000, 800000)
+
+        db.bulk_upsert_vacancies([dict(CARD, title='Senior Python Developer')])
+        assert bounds(db) == details_bounds
+    finally:
+        db.close()
+
+
+def test_card_update_without_details_replaces_the_bounds(tmp_path):
+    db = DatabaseManager(str(tmp_path / "vacancies.db"))
+    try:
+        db.bulk_upsert_vacancies([CARD])
+        db.bulk_upsert_vacancies([dict(CARD, salary='от 400 000 ₸')])
+        assert bounds(db)[0] == 400000
+    finally:
+        db.close()
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from db_manager import DatabaseManager
+
+TITLES = ['Python Developer', 'Java Developer', 'Аналитик данных', 'Go Developer']
+
+
+def cards():
+    return [{
+        'id': str(1000 + i),
+        'title': title,
+        'company': f'Company {i}',
+        'link': f'https://hh.kz/vacancy/{1000 + i}',
+        'skills': [],
+        'salary': '',
+        'experience': '',
+        'location': 'Алматы'
+    } for i, title in enumerate(TITLES)]
+
+
+def titles(vacancies):
+    return sorted(vacancy['title'] for vacancy in vacancies)
+
+
+def test_search_survives_vacuum(tmp_path):
+    db = DatabaseManager(str(tmp_path / "vacancies.db"))
+    try:
+        if not db.fts_enabled:
+            pytest.skip('SQLite was built without FTS5')
+        db.bulk_upsert_vacancies(cards())
+        db.conn.execute("DELETE FROM vacancies WHERE id = '1000'")
+        db.conn.commit()
+        db.conn.execute('VACUUM')
+
+        expected = ['Go Developer', 'Java Developer']
+        assert titles(db.get_vacancies_by_keyword('developer')) == expected
+        assert titles(db.get_vacancies_page(keyword='developer')['vacancies']) == expected
+    finally:
+        db.close()
+
+
+def test_table_keyed_on_id_is_rekeyed(tmp_path):
+    path = str(tmp_path / "vacancies.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''
+    CREATE TABLE vacancies (
+        id TEXT PRIMARY KEY, title TEXT NOT NULL, company TEXT NOT NULL, link TEXT NOT NULL,
+        skills TEXT, salary TEXT, experience TEXT, location TEXT, publication_date TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    conn.executemany(
+        'INSERT INTO vacancies (id, title, company, link, skills, location) VALUES (?, ?, ?, ?, ?, ?)',
+        [(card['id'], card['title'], card['company'], card['link'], '[]', card['location']) for card in cards()]
+    )
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    try:
+        columns = {row[1]: row[5] for row in db.conn.execute('PRAGMA table_info(vacancies)')}
+        assert columns['row_id'] == 1
+        assert db.conn.execute('SELECT COUNT(*) FROM vacancies').fetchone()[0] == len(TITLES)
+        if db.fts_enabled:
+            assert titles(db.get_vacancies_by_keyword('developer')) == ['Go Developer', 'Java Developer', 'Python Developer']
+    finally:
+        db.close()
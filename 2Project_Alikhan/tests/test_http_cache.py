@@ -0,0 +1,37 @@
+import time
+
+from http_cache import ResponseCache
+
+
+def cached_page(tmp_path, **kwargs):
+    cache = ResponseCache(str(tmp_path), **kwargs)
+    key = cache.make_key("https://hh.kz/search/vacancy", {'text': 'Python', 'page': 0})
+    cache.store(key, "https://hh.kz/search/vacancy", "<html></html>", etag='"v1"')
+    cache.store_parsed(key, [{'id': '1001'}], version='lxml:1:1')
+    return cache, key
+
+
+def test_not_modified_doesnt_extend_the_ttl(tmp_path):
+    cache, key = cached_page(tmp_path, ttl=60)
+    cache._index[key]['stored_at'] -= 61
+    cache.mark_not_modified(key)
+    assert cache.get(key) is None
+    assert cache.conditional_headers(key) == {}
+
+
+def test_parsed_vacancies_expire_and_are_versioned(tmp_path):
+    cache, key = cached_page(tmp_path, parsed_ttl=60)
+    assert cache.get_parsed(key, 'lxml:1:1') == [{'id': '1001'}]
+    assert cache.get_parsed(key, 'lxml:1:2') is None
+
+    cache._index[key]['parsed']['parsed_at'] = time.time() - 61
+    cache.mark_not_modified(key)
+    assert cache.get_parsed(key, 'lxml:1:1') is None
+
+
+def test_parsed_vacancies_count_towards_the_size_limit(tmp_path):
+    cache, key = cached_page(tmp_path)
+    entry = cache._index[key]
+    cache.max_size_bytes = entry['size'] + 10
+    cache.store_parsed(key, [{'id': str(i)} for i in range(100)], version='lxml:1:1')
+    assert cache.get(key) is None
@@ -0,0 +1,28 @@
+import asyncio
+
+from query_cache import GenerationCache
+
+
+def test_entries_live_until_the_generation_changes():
+    cache = GenerationCache(generation=3)
+    cache.set('latest', ['1001'])
+
+    # An unreadable generation keeps the entries
+    cache.update_generation(None)
+    cache.update_generation(3)
+    assert cache.get('latest') == ['1001']
+
+    cache.update_generation(4)
+    assert cache.get('latest') is None
+    assert cache.stats()['generation'] == 4
+
+
+def test_value_computed_across_a_generation_change_isnt_cached():
+    cache = GenerationCache()
+
+    async def compute():
+        cache.update_generation(1)
+        return 'stale'
+
+    assert asyncio.run(cache.get_or_compute('stats', compute)) == 'stale'
+    assert cache.get('stats') is None
@@ -0,0 +1,39 @@
+from db_manager import DatabaseManager
+from subscription_matcher import SubscriptionMatcher
+
+
+def vacancy(vacancy_id, salary):
+    return {
+        'id': vacancy_id,
+        'title': 'Python Developer',
+        'company': 'Company',
+        'link': f'https://hh.kz/vacancy/{vacancy_id}',
+        'skills': ['Python'],
+        'salary': salary
+    }
+
+
+VACANCIES = [
+    vacancy('tenge', 'от 500 000 ₸ на руки'),
+    vacancy('dollars', '1 000 $ на руки'),
+    vacancy('roubles', 'от 300 000 ₽ до вычета налогов')
+]
+
+
+def test_salary_filter_only_matches_tenge(tmp_path):
+    db = DatabaseManager(str(tmp_path / "vacancies.db"))
+    try:
+        db.bulk_upsert_vacancies(VACANCIES)
+        page = db.get_vacancies_page(ranges=[('salary', '>=', 300000)])
+        assert [found['id'] for found in page['vacancies']] == ['tenge']
+        page = db.get_vacancies_page(ranges=[('salary', '<=', 2000)])
+        assert page['vacancies'] == []
+    finally:
+        db.close()
+
+
+def test_subscription_salary_only_matches_tenge():
+    matcher = SubscriptionMatcher([{'user_id': 1, 'min_salary': 300000}, {'user_id': 2, 'min_salary': 500}])
+    assert sorted(matcher.match(VACANCIES[0])) == [1, 2]
+    assert matcher.match(VACANCIES[1]) == []
+    assert matcher.match(VACANCIES[2]) == []
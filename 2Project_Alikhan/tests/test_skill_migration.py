@@ -0,0 +1,66 @@
+import json
+import os
+from types import SimpleNamespace
+
+from db_manager import DatabaseManager
+from orchestrator import CrawlOrchestrator
+from vacancy_store import VacancyStore
+from vacancy_utils import vacancy_fingerprint
+
+# A vacancy as stored before the dictionary-backed skill extractor, with sentence fragments as skills
+OLD_VACANCY = {
+    'id': '1001',
+    'title': 'Python Developer',
+    'company': 'Company',
+    'link': 'https://hh.kz/vacancy/1001',
+    'skills': ['Опыт работы с Python от 3 лет', 'знание PostgreSQL'],
+    'salary': 'от 500 000 ₸',
+    'experience': '1-3 года',
+    'location': 'Алматы',
+    'publication_date': '1 day ago',
+    'created_at': '2026-01-01 10:00:00'
+}
+
+
+def old_database(path):
+    """Database holding OLD_VACANCY whose skills migration hasn't run yet"""
+    db = DatabaseManager(path)
+    db.bulk_upsert_vacancies([OLD_VACANCY])
+    with db._write_transaction() as cursor:
+        cursor.execute("UPDATE meta SET value = 0 WHERE key = 'skills_version'")
+    db.close()
+
+
+def old_store(log_file):
+    """Vacancy log written before the store migrated skills, without an index"""
+    record = dict(OLD_VACANCY, fingerprint=vacancy_fingerprint(OLD_VACANCY))
+    with open(log_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def test_sync_store_keeps_migrated_skills(tmp_path):
+    old_database(str(tmp_path / "vacancies.db"))
+    old_store(str(tmp_path / "all_vacancies.jsonl"))
+
+    db = DatabaseManager(str(tmp_path / "vacancies.db"))
+    store = VacancyStore(str(tmp_path / "all_vacancies.jsonl"))
+    try:
+        assert db.get_vacancy_by_id('1001')['skills'] == ['Python', 'PostgreSQL']
+        assert store.get('1001')['skills'] == ['Python', 'PostgreSQL']
+
+        orchestrator = CrawlOrchestrator(SimpleNamespace(store=store), db)
+        assert orchestrator.sync_store() == 0
+        assert db.get_vacancy_by_id('1001')['skills'] == ['Python', 'PostgreSQL']
+        assert db.get_vacancy_changes('1001') == []
+    finally:
+        db.close()
+
+
+def test_store_migration_is_stable(tmp_path):
+    log_file = str(tmp_path / "all_vacancies.jsonl")
+    old_store(log_file)
+    migrated = VacancyStore(log_file).get('1001')
+
+    # An index rebuilt from the log can't tell the version, so the skills are extracted once more
+    os.remove(str(tmp_path / "all_vacancies.idx.json"))
+    assert VacancyStore(log_file).get('1001') == migrated
@@ -0,0 +1,55 @@
+import importlib
+from html.parser import HTMLParser
+
+VACANCY = {
+    'id': '1001',
+    'title': 'C++ & Python <Senior> Developer',
+    'company': 'R&D "Lab"',
+    'link': 'https://hh.kz/vacancy/1001?from=search&query=python',
+    'skills': ['C++', '<b>Python'],
+    'salary': 'от 500 000 ₸',
+    'experience': '3–6 лет',
+    'location': 'Алматы',
+    'created_at': '2026-01-01 10:00:00',
+    'fingerprint': 'abc'
+}
+
+
+def load_bot(tmp_path, monkeypatch):
+    # The bot module opens its database in the working directory
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('telegram_bot')
+
+
+class TagCollector(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append(tag)
+
+
+def assert_only_formatting_tags(text):
+    # Telegram rejects the whole message if a field's text reads as an unsupported tag
+    parser = TagCollector()
+    parser.feed(text)
+    assert set(parser.tags) <= {'b', 'i', 'a'}
+
+
+def test_page_escapes_vacancy_fields(tmp_path, monkeypatch):
+    telegram_bot = load_bot(tmp_path, monkeypatch)
+    page = {'vacancies': [VACANCY], 'has_prev': False, 'has_next': False}
+    text = telegram_bot.render_page({'title': 'Results for <python>', 'page': 1}, page)
+    assert 'C++ &amp; Python &lt;Senior&gt; Developer' in text
+    assert 'R&amp;D &quot;Lab&quot;' in text
+    assert_only_formatting_tags(text)
+
+
+def test_notifications_escape_vacancy_fields(tmp_path, monkeypatch):
+    telegram_bot = load_bot(tmp_path, monkeypatch)
+    messages = telegram_bot.build_notification_messages([{'id': 1, 'payload': VACANCY}])
+    text = messages[1]['text']
+    assert messages[1]['parse_mode'] == "HTML"
+    assert '&lt;b&gt;Python' in text
+    assert_only_formatting_tags(text)
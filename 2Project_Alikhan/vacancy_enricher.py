@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import lxml.html
+import requests
+from lxml import etree
+
+from web_hh_scrapping import HHScraper
+from vacancy_store import VacancyStore
+from vacancy_utils import salary_bounds
+from skill_extractor import default_extractor
+
+# Fields of a vacancy detail page, compiled once
+DETAIL_XPATHS = {
+    field: etree.XPath(f"//*[@data-qa='{qa}']")
+    for field, qa in (
+        ('key_skills', 'skills-element'),
+        ('description', 'vacancy-description'),
+        ('employment', 'vacancy-view-employment-mode'),
+        ('experience', 'vacancy-experience'),
+        ('salary', 'vacancy-salary')
+    )
+}
+
+
+def _clean_text(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class VacancyEnricher:
+    def __init__(self, scraper: HHScraper, max_workers: int = 4, cache_file: Optional[str] = None,
+                 max_age: int = 86400, revalidate_batch: int = 20):
+        """
+        Adds the details only shown on a vacancy's own page to vacancies found in search results.
+
+        The search results only have snippets, so the skills and experience of
+        a vacancy are guesses. The enricher fetches the detail page of every
+        vacancy it's given, with up to max_workers requests in flight through
+        the scraper's session and rate limiter, and attaches the key skills,
+        full description, employment type, experience and salary range as
+        vacancy['details'].
+
+        Details are cached by vacancy ID with the ETag and Last-Modified of the
+        page they were parsed from. They are reused without a request while the
+        vacancy's search result is unchanged and they were checked less than
+        max_age seconds ago; otherwise the page is requested conditionally and
+        only parsed again if hh answers with a new version.
+
+        Args:
+            scraper: Scraper whose session, rate limiter and fetch mode are shared
+            max_workers: Maximum number of detail pages fetched at once (default: 4)
+            cache_file: JSON Lines file of cached details (default: vacancy_details.jsonl
+                next to the scraper's vacancy store)
+            max_age: Seconds after which cached details are checked against the page again (default: 1 day)
+            revalidate_batch: Maximum number of stored vacancies whose details are checked
+                again after a crawl (default: 20)
+        """
+        self.scraper = scraper
+        self.max_workers = max(1, max_workers)
+        self.vacancy_url = "https://hh.kz/vacancy/{}"
+        self.cache = VacancyStore(cache_file or os.path.join(scraper.output_dir, "vacancy_details.jsonl"))
+        self.max_age = max_age
+        self.revalidate_batch = revalidate_batch
+        self.last_run_report: Dict = {}
+
+    def cached_details(self, vacancy: Dict) -> Optional[Dict]:
+        """Get the cached details of a vacancy, or None if they're missing, from an older version of it or due a check"""
+        fingerprint = self.cache.fingerprint(vacancy['id'])
+        if fingerprint is None or fingerprint != vacancy.get('fingerprint'):
+            return None
+        record = self.cache.get(vacancy['id'])
+        if record is None or time.time() - record.get('checked_at', 0) > self.max_age:
+            return None
+        return record['details']
+
+    @staticmethod
+    def _conditional_headers(record: Optional[Dict]) -> Dict[str, str]:
+        """Build the headers revalidating the page a cached record was parsed from"""
+        headers = {}
+        if record and record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record and record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    @staticmethod
+    def parse_details(html: str) -> Optional[Dict]:
+        """
+        Parse a vacancy detail page.
+
+        Args:
+            html: HTML content of the page
+
+        Returns:
+            Dictionary with the 'key_skills' list, the 'description', 'employment',
+            'experience' and 'salary' texts and the 'salary_min' and 'salary_max'
+            bounds (None where not given), or None if the page can't be parsed
+        """
+        try:
+            tree = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError) as e:
+            logging.error(f"Error parsing vacancy page with lxml: {e}")
+            return None
+
+        def text_of(field):
+            elements = DETAIL_XPATHS[field](tree)
+            return _clean_text(elements[0].text_content()) if elements else None
+
+        # Key skills are free text on hh, known ones are mapped to their canonical names
+        key_skills = []
+        for element in DETAIL_XPATHS['key_skills'](tree):
+            skill = default_extractor.canonical(_clean_text(element.text_content()))
+            if skill and skill not in key_skills:
+                key_skills.append(skill)
+
+        salary = text_of('salary')
+        salary_min, salary_max = salary_bounds(salary)
+        return {
+            'key_skills': key_skills,
+            'description': text_of('description'),
+            'employment': text_of('employment'),
+            'experience': text_of('experience'),
+            'salary': salary,
+            'salary_min': salary_min,
+            'salary_max': salary_max,
+            'fetched_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    async def _fetch_async(self, requests_headers: Dict[str, Dict[str, str]]) -> Dict[str, Tuple]:
+        """
+        Fetch detail pages with a pool of max_workers workers.
+
+        Returns:
+            Vacancy ID -> (HTML or None if not modified, ETag, Last-Modified) of the fetched ones
+        """
+        session = await self.scraper._get_session()
+        queue: asyncio.Queue = asyncio.Queue()
+        for vacancy_id in requests_headers:
+            queue.put_nowait(vacancy_id)
+        pages = {}
+
+        async def worker():
+            while not queue.empty():
+                vacancy_id = queue.get_nowait()
+                await self.scraper.rate_limiter.acquire()
+                try:
+                    async with session.get(self.vacancy_url.format(vacancy_id), headers=requests_headers[vacancy_id]) as response:
+                        response.raise_for_status()
+                        html = await response.text() if response.status != 304 else None
+                        pages[vacancy_id] = (html, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.error(f"Error fetching vacancy {vacancy_id}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_workers, len(requests_headers)))))
+        return pages
+
+    def _fetch_sequential(self, requests_headers: Dict[str, Dict[str, str]]) -> Dict[str, Tuple]:
+        """Fetch detail pages one by one over the scraper's keep-alive session; returns like _fetch_async"""
+        pages = {}
+        for i, (vacancy_id, headers) in enumerate(requests_headers.items()):
+            # Add a small delay between pages to be respectful to the server
+            if i > 0:
+                time.sleep(self.scraper.page_delay)
+            try:
+                response = self.scraper.session.get(self.vacancy_url.format(vacancy_id), headers=headers,
+                                                    timeout=self.scraper.request_timeout)
+                response.raise_for_status()
+                html = response.text if response.status_code != 304 else None
+                pages[vacancy_id] = (html, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error fetching vacancy {vacancy_id}: {e}")
+        return pages
+
+    def enrich(self, vacancies: List[Dict]) -> List[Dict]:
+        """
+        Attach the details of every vacancy, requesting the pages of those without fresh cached details.
+
+        Blocking; meant to run on the crawl thread.
+
+        Args:
+            vacancies: Vacancies to enrich, changed in place; only their 'id' and 'fingerprint' are needed
+
+        Returns:
+            The vacancies that got details; vacancies whose page couldn't be fetched are left without
+        """
+        started = time.monotonic()
+        enriched = []
+        missing = {}
+        for vacancy in vacancies:
+            details = self.cached_details(vacancy)
+            if details is None:
+                missing[vacancy['id']] = vacancy
+            else:
+                vacancy['details'] = details
+                enriched.append(vacancy)
+        cached = len(enriched)
+
+        not_modified = 0
+        if missing:
+            # Pages whose details are cached are only downloaded again if they changed
+            records = {vacancy_id: self.cache.get(vacancy_id) for vacancy_id in missing}
+            requests_headers = {vacancy_id: self._conditional_headers(record) for vacancy_id, record in records.items()}
+            if self.scraper.fetch_mode == 'async':
+                pages = self.scraper._run_async(self._fetch_async(requests_headers))
+            else:
+                pages = self._fetch_sequential(requests_headers)
+
+            new_records = []
+            for vacancy_id, (html, etag, last_modified) in pages.items():
+                record = records[vacancy_id]
+                if html is None and record:
+                    not_modified += 1
+                    details = dict(record['details'], fetched_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                else:
+                    details = self.parse_details(html or '')
+                if details is None:
+                    continue
+                vacancy = missing[vacancy_id]
+                vacancy['details'] = details
+                enriched.append(vacancy)
+                new_records.append({
+                    'id': vacancy_id,
+                    'fingerprint': vacancy.get('fingerprint'),
+                    'etag': etag or (record or {}).get('etag'),
+                    'last_modified': last_modified or (record or {}).get('last_modified'),
+                    'checked_at': time.time(),
+                    'details': details
+                })
+            self.cache.append(new_records)
+            self.cache.maybe_compact()
+
+        self.last_run_report = {
+            'cached': cached,
+            'not_modified': not_modified,
+            'fetched': len(enriched) - cached - not_modified,
+            'failed': len(vacancies) - len(enriched)
+        }
+        logging.info(
+            f"Enriched {len(enriched)}/{len(vacancies)} vacancies in {time.monotonic() - started:.1f}s: "
+            f"{cached} from cache, {not_modified} not modified, {len(enriched) - cached - not_modified} fetched"
+        )
+        return enriched
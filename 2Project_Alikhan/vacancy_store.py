@@ -0,0 +1,364 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from skill_extractor import EXTRACTOR_VERSION, reextract_skills
+from vacancy_utils import vacancy_fingerprint
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (Windows): only writers within one process are serialized
+    fcntl = None
+
+# Bumped whenever the layout of the index sidecar changes
+INDEX_VERSION = 3
+
+
+class VacancyStore:
+    def __init__(self, log_file: str, legacy_json_file: Optional[str] = None,
+                 compact_ratio: float = 0.5, min_compact_records: int = 1000):
+        """
+        Append-only vacancy store backed by a JSON Lines log.
+
+        Each write appends the new or changed records to the log and a compact
+        sidecar index maps every vacancy ID to the byte offset and content
+        fingerprint of its latest record, so a run never has to load or
+        rewrite the whole history.
+        Superseded records are dropped by compaction.
+
+        Several processes (e.g. the bot and a separate scraper) may share a
+        log: writes hold an exclusive lock on a .lock file next to it and
+        first pick up whatever the other processes appended or compacted.
+
+        When the skill extractor changed since the records were written, their
+        skills and fingerprints are extracted again on opening, the same way
+        the database migrates its rows, so the two still agree.
+
+        Args:
+            log_file: Path to the JSON Lines log
+            legacy_json_file: Path to an old all_vacancies.json to import when the log doesn't exist yet
+            compact_ratio: Share of superseded records above which maybe_compact rewrites the log (default: 0.5)
+            min_compact_records: Minimum log size in records before compaction is considered (default: 1000)
+        """
+        self.log_file = log_file
+        self.index_file = os.path.splitext(log_file)[0] + ".idx.json"
+        self.lock_file = log_file + ".lock"
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+        self._lock = threading.Lock()
+
+        # vacancy ID -> [offset, length, fingerprint] of its latest record in the log
+        self._offsets: Dict[str, list] = {}
+        self._records = 0
+        self._log_size = 0
+        # Inode of the log the index refers to; compaction replaces the file
+        self._inode = None
+        # Whether records were appended since the sidecar index was saved
+        self._dirty = False
+        # EXTRACTOR_VERSION the skills of the records were extracted with
+        self.skills_version = EXTRACTOR_VERSION
+
+        with self._locked():
+            if not os.path.exists(self.log_file) and legacy_json_file and os.path.exists(legacy_json_file):
+                self.skills_version = 0
+                self._import_legacy(legacy_json_file)
+            self._load_index()
+            if self.skills_version < EXTRACTOR_VERSION:
+                self._migrate_skills()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, vacancy_id: str) -> bool:
+        return vacancy_id in self._offsets
+
+    @contextmanager
+    def _locked(self):
+        """Hold the store's thread lock and, where supported, the exclusive lock shared with other processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _stat(self) -> tuple:
+        """Get the (inode, size) of the log, (None, 0) if it doesn't exist"""
+        try:
+            stat = os.stat(self.log_file)
+            return stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    def _sync(self):
+        """Catch up with the log as other processes left it; called with the lock held"""
+        inode, size = self._stat()
+        if inode != self._inode or size < self._log_size:
+            # Compacted by another process
+            self._load_index()
+        elif size > self._log_size:
+            self._scan()
+
+    def refresh(self):
+        """Pick up records written to the log by other processes since the last write or refresh"""
+        if self._stat() != (self._inode, self._log_size):
+            with self._locked():
+                self._sync()
+
+    def _load_index(self):
+        """Load the sidecar index and catch up with records appended since it was saved, rebuilding it if it's unusable"""
+        self._inode, log_size = self._stat()
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                # The log only grows between compactions, so an older index is a valid prefix of it
+                if index.get('version') == INDEX_VERSION and index.get('inode') == self._inode \
+                        and index.get('log_size', log_size + 1) <= log_size:
+                    self._offsets = index['offsets']
+                    self._records = index['records']
+                    self._log_size = index['log_size']
+                    self.skills_version = index.get('skills_version', 0)
+                    self._dirty = False
+                    if self._log_size < log_size:
+                        self._scan()
+                    return
+                logging.warning("Vacancy index is out of date, rebuilding it from the log")
+        except Exception as e:
+            logging.error(f"Error loading vacancy index, rebuilding it from the log: {e}")
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Scan the whole log and rebuild the index"""
+        self._offsets = {}
+        self._records = 0
+        self._log_size = 0
+        if not os.path.exists(self.log_file):
+            self.skills_version = EXTRACTOR_VERSION
+            return
+        # Extracting the skills again doesn't change current ones, so an unknown version is treated as outdated
+        self.skills_version = 0
+        self._scan()
+        self._save_index()
+
+    def _scan(self):
+        """
+        Index the records of the log from _log_size on.
+
+        A malformed line is skipped and logged, only a partially written last
+        line is truncated.
+        """
+        offset = self._log_size
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                    self._offsets[record['id']] = [offset, len(line), self._fingerprint(record)]
+                    self._records += 1
+                except (ValueError, KeyError, TypeError) as e:
+                    logging.warning(f"Skipping malformed record at offset {offset} of {self.log_file}: {e}")
+                offset += len(line)
+
+        if offset != os.path.getsize(self.log_file):
+            logging.warning(f"Truncating incomplete record at the end of {self.log_file}")
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(offset)
+        if offset != self._log_size:
+            self._log_size = offset
+            self._dirty = True
+
+    def _save_index(self):
+        """Atomically write the sidecar index"""
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'inode': self._inode,
+                'log_size': self._log_size,
+                'records': self._records,
+                'skills_version': self.skills_version,
+                'offsets': self._offsets
+            }, f, separators=(',', ':'))
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def flush(self):
+        """
+        Write the sidecar index if records were appended since it was last saved.
+
+        Appends don't rewrite the index, it's saved once per crawl; records
+        missing from a saved index are picked up from the log on the next load.
+        """
+        with self._locked():
+            self._sync()
+            if self._dirty:
+                self._save_index()
+
+    def _import_legacy(self, legacy_json_file: str):
+        """Convert an all_vacancies.json file into the log format"""
+        try:
+            with open(legacy_json_file, 'r', encoding='utf-8') as f:
+                vacancies = json.load(f)
+            self._write_log(vacancies)
+            logging.info(f"Imported {len(vacancies)} vacancies from {legacy_json_file}")
+        except Exception as e:
+            logging.error(f"Error importing legacy vacancies file: {e}")
+
+    @staticmethod
+    def _fingerprint(vacancy: Dict) -> str:
+        return vacancy.get('fingerprint') or vacancy_fingerprint(vacancy)
+
+    @staticmethod
+    def _encode(vacancy: Dict) -> bytes:
+        return (json.dumps(vacancy, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+    def _write_log(self, vacancies: Iterable[Dict]):
+        """Atomically replace the log with the given records and rebuild the index"""
+        tmp_file = self.log_file + ".tmp"
+        offsets = {}
+        size = 0
+        with open(tmp_file, 'wb') as f:
+            for vacancy in vacancies:
+                line = self._encode(vacancy)
+                f.write(line)
+                offsets[vacancy['id']] = [size, len(line), self._fingerprint(vacancy)]
+                size += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.log_file)
+
+        self._inode = self._stat()[0]
+        self._offsets = offsets
+        self._records = len(offsets)
+        self._log_size = size
+        self._save_index()
+
+    def _migrate_skills(self):
+        """Extract the skills of every record again and rewrite the log; called with the lock held"""
+        vacancies = []
+        for vacancy in self:
+            vacancy['skills'] = reextract_skills(vacancy)
+            vacancy['fingerprint'] = vacancy_fingerprint(vacancy)
+            vacancies.append(vacancy)
+        self.skills_version = EXTRACTOR_VERSION
+        if vacancies:
+            self._write_log(vacancies)
+            logging.info(f"Extracted the skills of {len(vacancies)} stored vacancies again")
+
+    def get(self, vacancy_id: str) -> Optional[Dict]:
+        """
+        Read the latest record of a vacancy.
+
+        Args:
+            vacancy_id: Vacancy ID
+
+        Returns:
+            Vacancy dictionary, or None if the vacancy isn't stored
+        """
+        position = self._offsets.get(vacancy_id)
+        if position is None:
+            return None
+        offset, length = position[:2]
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def fingerprint(self, vacancy_id: str) -> Optional[str]:
+        """
+        Get the content fingerprint of the latest record of a vacancy without reading the log.
+
+        Args:
+            vacancy_id: Vacancy ID
+
+        Returns:
+            Fingerprint, or None if the vacancy isn't stored
+        """
+        position = self._offsets.get(vacancy_id)
+        return position[2] if position else None
+
+    def ids(self) -> List[str]:
+        """Get the IDs of all stored vacancies"""
+        return list(self._offsets)
+
+    def append(self, vacancies: List[Dict]) -> int:
+        """
+        Append new or changed vacancies to the log.
+
+        Args:
+            vacancies: Vacancies to write
+
+        Returns:
+            Number of records written
+        """
+        if not vacancies:
+            return 0
+
+        with self._locked():
+            # Other processes may have appended since, the records go after theirs
+            self._sync()
+            offset = self._log_size
+            positions = []
+            with open(self.log_file, 'ab') as f:
+                for vacancy in vacancies:
+                    line = self._encode(vacancy)
+                    f.write(line)
+                    positions.append((vacancy['id'], [offset, len(line), self._fingerprint(vacancy)]))
+                    offset += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+                if self._inode is None:
+                    self._inode = os.fstat(f.fileno()).st_ino
+
+            # The index is only updated once the records are safely on disk
+            for vacancy_id, position in positions:
+                self._offsets[vacancy_id] = position
+            self._records += len(positions)
+            self._log_size = offset
+            self._dirty = True
+        return len(positions)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over the latest record of every stored vacancy"""
+        if not self._offsets:
+            return
+        with open(self.log_file, 'rb') as f:
+            for offset, length, _ in sorted(self._offsets.values()):
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+    def compact(self):
+        """
+        Rewrite the log keeping only the latest record of every vacancy.
+        """
+        with self._locked():
+            self._sync()
+            superseded = self._records - len(self._offsets)
+            self._write_log(list(self))
+            logging.info(f"Compacted vacancy log, removed {superseded} superseded records")
+
+    def maybe_compact(self) -> bool:
+        """
+        Compact the log if enough of it is made of superseded records, otherwise save the index.
+
+        Called once at the end of every crawl.
+
+        Returns:
+            True if the log was compacted
+        """
+        if self._records < self.min_compact_records or \
+                (self._records - len(self._offsets)) / self._records < self.compact_ratio:
+            self.flush()
+            return False
+        self.compact()
+        return True
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Fields that make up the content of a vacancy, with the value used when a field is missing
+FINGERPRINT_FIELDS = (
+    ('title', ''),
+    ('company', ''),
+    ('salary', 'Not specified'),
+    ('experience', 'Not specified'),
+    ('location', 'Not specified'),
+    ('skills', [])
+)
+
+# Amounts in salary texts, with regular, non-breaking or narrow spaces between digit groups
+SALARY_AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+')
+
+# 'от' and 'до' only bound a salary when an amount follows them, unlike in 'до вычета налогов'
+SALARY_FROM_PATTERN = re.compile(r'(?:\bот|\bfrom)\s+(' + SALARY_AMOUNT_PATTERN.pattern + ')', re.IGNORECASE)
+SALARY_TO_PATTERN = re.compile(r'(?:\bдо|\bup to|\bto)\s+(' + SALARY_AMOUNT_PATTERN.pattern + ')', re.IGNORECASE)
+
+# hh currency codes by the symbols and abbreviations used in salary texts
+CURRENCY_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), code) for pattern, code in (
+        (r'₸|\bтг\b|\bтенге\b|\bKZT\b', 'KZT'),
+        (r'₽|\bруб|\bRU[BR]\b', 'RUR'),
+        (r'\$|\bUSD\b', 'USD'),
+        (r'€|\bEUR\b', 'EUR'),
+        (r'\bсум\b|\bUZS\b', 'UZS'),
+        (r'\bсом\b|\bKGS\b', 'KGS')
+    )
+]
+
+# Experience texts such as '1–3 года', 'от 3 лет', 'более 6 лет', 'не требуется' or '1-3 years'
+EXPERIENCE_RANGE_PATTERN = re.compile(r'(\d+)\s*[-–—]\s*(\d+)')
+EXPERIENCE_FROM_PATTERN = re.compile(r'(?:от|более|больше|свыше|from|more than|over)\s+(\d+)', re.IGNORECASE)
+EXPERIENCE_YEARS_PATTERN = re.compile(r'(\d+)\s+(?:год|года|лет|year)', re.IGNORECASE)
+EXPERIENCE_NONE_PATTERN = re.compile(r'не требуется|без опыта|нет опыта|no experience|not required', re.IGNORECASE)
+
+# Operators and fields of range filters such as 'salary>=600000' or 'exp<=3'
+RANGE_FILTER_PATTERN = re.compile(r'^(salary|зп|exp|experience|опыт)(>=|<=|>|<|=)(\d+)(k|к)?$', re.IGNORECASE)
+RANGE_FILTER_FIELDS = {'salary': 'salary', 'зп': 'salary', 'exp': 'experience', 'experience': 'experience', 'опыт': 'experience'}
+
+# Currency of the amounts in salary filters; salaries in other currencies never match them
+SALARY_FILTER_CURRENCY = 'KZT'
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text, treat ё as е and collapse whitespace so keywords match regardless of spelling"""
+    return re.sub(r'\s+', ' ', (text or '').lower().replace('ё', 'е')).strip()
+
+
+def vacancy_fingerprint(vacancy: Dict) -> str:
+    """
+    Compute a stable fingerprint of the content of a vacancy.
+
+    Two versions of a vacancy have the same fingerprint exactly when all of
+    the fields in FINGERPRINT_FIELDS are equal, so change detection is a
+    single string comparison.
+
+    Args:
+        vacancy: Vacancy dictionary
+
+    Returns:
+        Hex digest of the vacancy content
+    """
+    values = [vacancy.get(field, default) for field, default in FINGERPRINT_FIELDS]
+    payload = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def changed_fields(old: Dict, new: Dict) -> Dict[str, list]:
+    """
+    List the content fields that differ between two versions of a vacancy.
+
+    Args:
+        old: Previous version of the vacancy
+        new: Current version of the vacancy
+
+    Returns:
+        Dictionary of field name -> [old value, new value]
+    """
+    changes = {}
+    for field, default in FINGERPRINT_FIELDS:
+        old_value = old.get(field, default)
+        new_value = new.get(field, default)
+        if old_value != new_value:
+            changes[field] = [old_value, new_value]
+    return changes
+
+
+def _amount(text: str) -> int:
+    return int(re.sub(r'\D', '', text))
+
+
+def salary_bounds(salary: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Extract the lower and upper bound of a salary as shown on hh.kz.
+
+    Handles 'от 500 000 ₸', 'до 800 000 ₸' and '500 000 – 800 000 ₸'; a
+    single figure without 'от' or 'до' is an exact salary. The currency and
+    tax notes are ignored, so the 'до' of 'до вычета налогов' isn't a bound.
+
+    >>> salary_bounds('от 500 000 до 800 000 ₸ на руки')
+    (500000, 800000)
+    >>> salary_bounds('500 000 – 800 000 ₸ до вычета налогов')
+    (500000, 800000)
+    >>> salary_bounds('от 500 000 ₸ до вычета налогов')
+    (500000, None)
+    >>> salary_bounds('до 800 000 ₸ на руки')
+    (None, 800000)
+    >>> salary_bounds('500 000 ₸ до вычета налогов')
+    (500000, 500000)
+    >>> salary_bounds('1 000 $ на руки')
+    (1000, 1000)
+    >>> salary_bounds('з/п не указана')
+    (None, None)
+
+    Args:
+        salary: Salary text
+
+    Returns:
+        (minimum, maximum) tuple, with None for a bound that isn't given
+    """
+    if not salary:
+        return None, None
+    amounts = [_amount(amount) for amount in SALARY_AMOUNT_PATTERN.findall(salary)]
+    if not amounts:
+        return None, None
+    lower = SALARY_FROM_PATTERN.search(salary)
+    upper = SALARY_TO_PATTERN.search(salary)
+    if lower or upper:
+        return (_amount(lower.group(1)) if lower else None,
+                _amount(upper.group(1)) if upper else None)
+    if len(amounts) >= 2:
+        return amounts[0], amounts[1]
+    return amounts[0], amounts[0]
+
+
+def parse_salary(salary: str) -> Dict:
+    """
+    Normalize a salary as shown on hh.kz into numbers.
+
+    Args:
+        salary: Salary text, e.g. 'от 500 000 ₸ до вычета налогов'
+
+    Returns:
+        Dictionary with 'salary_min' and 'salary_max' (None for a bound that isn't given),
+        the hh 'salary_currency' code and 'salary_gross': True before tax, False after tax
+        and None when the text doesn't say (all None if the salary isn't specified)
+    """
+    salary_min, salary_max = salary_bounds(salary)
+    currency = gross = None
+    if salary_min is not None or salary_max is not None:
+        currency = next((code for pattern, code in CURRENCY_PATTERNS if pattern.search(salary)), None)
+        if re.search(r'до вычета|\bgross\b', salary, re.IGNORECASE):
+            gross = True
+        elif re.search(r'на руки|\bnet\b', salary, re.IGNORECASE):
+            gross = False
+    return {'salary_min': salary_min, 'salary_max': salary_max, 'salary_currency': currency, 'salary_gross': gross}
+
+
+def experience_bounds(experience: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Extract the required years of experience as shown on hh.kz.
+
+    Handles '1–3 года', 'от 3 лет', 'более 6 лет', 'опыт 2 года', 'не требуется'
+    and their English counterparts.
+
+    Args:
+        experience: Experience text
+
+    Returns:
+        (minimum, maximum) years tuple, with None for a bound that isn't given
+    """
+    if not experience:
+        return None, None
+    if EXPERIENCE_NONE_PATTERN.search(experience):
+        return 0, 0
+    match = EXPERIENCE_RANGE_PATTERN.search(experience)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    # 'от 3 лет' as well as a bare '3 года' is a lower bound
+    match = EXPERIENCE_FROM_PATTERN.search(experience) or EXPERIENCE_YEARS_PATTERN.search(experience)
+    if match:
+        return int(match.group(1)), None
+    return None, None
+
+
+def structured_fields(vacancy: Dict) -> Dict:
+    """
+    Compute the numeric salary and experience fields of a vacancy from its texts.
+
+    Args:
+        vacancy: Vacancy dictionary
+
+    Returns:
+        Dictionary with the parse_salary fields and 'experience_min' and 'experience_max'
+    """
+    fields = parse_salary(vacancy.get('salary'))
+    fields['experience_min'], fields['experience_max'] = experience_bounds(vacancy.get('experience'))
+    return fields
+
+
+def parse_range_filters(text: str) -> Tuple[str, List[Tuple[str, str, int]]]:
+    """
+    Split range filters such as 'salary>=600000' or 'exp<=3' off search text.
+
+    Salaries are in tenge (SALARY_FILTER_CURRENCY) and may be given in
+    thousands with a 'k' suffix, e.g. 'salary>=600k'.
+
+    Args:
+        text: Search text, e.g. 'python salary>=600000 exp<=3'
+
+    Returns:
+        Tuple of (remaining search text, list of (field, operator, value) filters)
+        where field is 'salary' or 'experience'
+    """
+    words = []
+    filters = []
+    for word in (text or '').split():
+        match = RANGE_FILTER_PATTERN.match(word)
+        if match is None:
+            words.append(word)
+            continue
+        name, operator, value, thousands = match.groups()
+        filters.append((RANGE_FILTER_FIELDS[name.lower()], operator, int(value) * (1000 if thousands else 1)))
+    return ' '.join(words), filters
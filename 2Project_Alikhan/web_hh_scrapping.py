@@ -1,319 +1,901 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
-import os
-import logging
-from datetime import datetime
-import re
-from typing import List, Dict, Tuple, Any, Optional
-
-# Setup logging
-logging.basicConfig(
-    filename='scraper.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-class HHScraper:
-    def __init__(self, search_query: str, pages_to_scrape: int = 3, update_interval: int = 600):
-        """
-        Initialize the scraper with the search query and configuration.
-        
-        Args:
-            search_query: The search term to look for vacancies
-            pages_to_scrape: Number of pages to scrape (default: 3)
-            update_interval: Time between updates in seconds (default: 600 = 10 minutes)
-        """
-        self.search_query = search_query
-        self.pages_to_scrape = pages_to_scrape
-        self.update_interval = update_interval
-        self.base_url = "https://hh.kz/search/vacancy"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        self.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-        self.all_vacancies_file = os.path.join(self.output_dir, "all_vacancies.json")
-        
-        # Create output directory if it doesn't exist
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            logging.info(f"Created output directory: {self.output_dir}")
-
-    def fetch_html(self, url: str, params: Dict = None) -> str:
-        """
-        Fetch HTML content from the URL.
-        
-        Args:
-            url: The URL to fetch
-            params: Query parameters to include in the request
-            
-        Returns:
-            HTML content as a string
-        """
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.text
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching HTML: {e}")
-            return ""
-
-    def parse_vacancies(self, html: str) -> List[Dict]:
-        """
-        Parse the HTML to extract vacancy information.
-        
-        Args:
-            html: HTML content to parse
-            
-        Returns:
-            List of vacancy dictionaries
-        """
-        vacancies = []
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Find all vacancy blocks
-        vacancy_blocks = soup.find_all('div', {'class': 'vacancy-serp-item-body'})
-        
-        for block in vacancy_blocks:
-            try:
-                # Extract basic information
-                title_element = block.find('a', {'class': 'serp-item__title'})
-                if not title_element:
-                    continue
-                
-                title = title_element.text.strip()
-                link = title_element['href'].split('?')[0]  # Remove query parameters
-                
-                # Extract company name
-                company_element = block.find('a', {'data-qa': 'vacancy-serp__vacancy-employer'})
-                company = company_element.text.strip() if company_element else "Company not specified"
-                
-                # Extract skills if available
-                skills = []
-                skills_block = block.find('div', {'data-qa': 'vacancy-serp__vacancy_snippet_requirement'})
-                if skills_block:
-                    skills_text = skills_block.text.strip()
-                    # Extract skills separated by commas, semicolons, or dots
-                    skills = [skill.strip() for skill in re.split(r'[,;.]', skills_text) if skill.strip()]
-                
-                # Extract salary information
-                salary = "Not specified"
-                salary_element = block.find('span', {'data-qa': 'vacancy-serp__vacancy-compensation'})
-                if salary_element:
-                    salary = salary_element.text.strip()
-                
-                # Extract experience requirements
-                experience = "Not specified"
-                exp_element = block.find('div', {'data-qa': 'vacancy-serp__vacancy_snippet_requirement'})
-                if exp_element:
-                    exp_text = exp_element.text.lower()
-                    # Look for experience patterns like "1-3 years", "from 3 years", etc.
-                    exp_patterns = [
-                        r'(\d+[-–]\d+\s+(?:year|years|год|года|лет))',
-                        r'(от\s+\d+\s+(?:year|years|год|года|лет))',
-                        r'(experience\s+\d+[-–]?\d*\s+(?:year|years|год|года|лет))',
-                        r'(опыт\s+\d+[-–]?\d*\s+(?:year|years|год|года|лет))'
-                    ]
-                    for pattern in exp_patterns:
-                        match = re.search(pattern, exp_text, re.IGNORECASE)
-                        if match:
-                            experience = match.group(1)
-                            break
-                
-                # Extract location
-                location = "Not specified"
-                location_element = block.find('div', {'data-qa': 'vacancy-serp__vacancy-address'})
-                if location_element:
-                    location = location_element.text.strip()
-                
-                # Extract publication date
-                publication_date = "Not specified"
-                date_element = block.find('span', {'data-qa': 'vacancy-serp__vacancy-date'})
-                if date_element:
-                    publication_date = date_element.text.strip()
-                
-                # Create vacancy object with unique ID (constructed from link)
-                vacancy_id = link.split('/')[-1]
-                
-                vacancy = {
-                    'id': vacancy_id,
-                    'title': title,
-                    'company': company,
-                    'skills': skills,
-                    'link': link,
-                    'salary': salary,
-                    'experience': experience,
-                    'location': location,
-                    'publication_date': publication_date,
-                    'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-                vacancies.append(vacancy)
-                
-            except Exception as e:
-                logging.error(f"Error parsing vacancy: {e}")
-                continue
-        
-        return vacancies
-
-    def save_to_json(self, data: List[Dict], filename: str) -> str:
-        """
-        Save data to a JSON file.
-        
-        Args:
-            data: The data to save
-            filename: The filename to save to
-            
-        Returns:
-            The full path to the saved file
-        """
-        filepath = os.path.join(self.output_dir, filename)
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logging.info(f"Saved data to {filepath}")
-            return filepath
-        except Exception as e:
-            logging.error(f"Error saving to JSON: {e}")
-            return ""
-
-    def load_from_json(self, filepath: str) -> List[Dict]:
-        """
-        Load data from a JSON file.
-        
-        Args:
-            filepath: Path to the JSON file
-            
-        Returns:
-            The loaded data
-        """
-        try:
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            logging.error(f"Error loading from JSON: {e}")
-            return []
-
-    def filter_new_vacancies(self, all_vacancies: List[Dict], new_vacancies: List[Dict]) -> List[Dict]:
-        """
-        Filter out vacancies that already exist in all_vacancies.
-        
-        Args:
-            all_vacancies: Existing vacancies
-            new_vacancies: New vacancies to filter
-            
-        Returns:
-            Filtered list of new vacancies
-        """
-        existing_ids = {vacancy['id'] for vacancy in all_vacancies}
-        return [vacancy for vacancy in new_vacancies if vacancy['id'] not in existing_ids]
-
-    def run_once(self) -> Tuple[List[Dict], List[Dict], List[Dict], str, Optional[str]]:
-        """
-        Run the scraper once.
-        
-        Returns:
-            Tuple of (all_vacancies, new_vacancies, updated_vacancies, all_vacancies_file, new_vacancies_file)
-        """
-        logging.info(f"Starting scraping run for query: {self.search_query}")
-        all_vacancies = self.load_from_json(self.all_vacancies_file)
-        
-        # Dictionary to track existing vacancy IDs and their indices
-        existing_vacancy_map = {vacancy['id']: idx for idx, vacancy in enumerate(all_vacancies)}
-        
-        # Track new and updated vacancies
-        new_vacancies = []
-        updated_vacancies = []
-        
-        # Scrape each page
-        for page in range(self.pages_to_scrape):
-            params = {
-                'text': self.search_query,
-                'page': page,
-                'items_on_page': 50
-            }
-            
-            html = self.fetch_html(self.base_url, params)
-            if not html:
-                logging.warning(f"No HTML content received for page {page}")
-                continue
-            
-            # Parse vacancies from the page
-            page_vacancies = self.parse_vacancies(html)
-            logging.info(f"Found {len(page_vacancies)} vacancies on page {page}")
-            
-            for vacancy in page_vacancies:
-                vacancy_id = vacancy['id']
-                
-                if vacancy_id in existing_vacancy_map:
-                    # Update existing vacancy
-                    idx = existing_vacancy_map[vacancy_id]
-                    
-                    # Check if the vacancy has new information
-                    existing_vacancy = all_vacancies[idx]
-                    if (vacancy['title'] != existing_vacancy['title'] or
-                        vacancy['company'] != existing_vacancy['company'] or
-                        vacancy['salary'] != existing_vacancy.get('salary', 'Not specified') or
-                        vacancy['experience'] != existing_vacancy.get('experience', 'Not specified') or
-                        vacancy['location'] != existing_vacancy.get('location', 'Not specified') or
-                        vacancy['skills'] != existing_vacancy.get('skills', [])):
-                        
-                        # Keep the original creation timestamp
-                        vacancy['created_at'] = existing_vacancy['created_at']
-                        # Update the vacancy
-                        all_vacancies[idx] = vacancy
-                        updated_vacancies.append(vacancy)
-                else:
-                    # Add as a new vacancy
-                    new_vacancies.append(vacancy)
-                    existing_vacancy_map[vacancy_id] = len(all_vacancies)
-                    all_vacancies.append(vacancy)
-            
-            # Add a small delay between pages to be respectful to the server
-            if page < self.pages_to_scrape - 1:
-                time.sleep(2)
-        
-        # Save all vacancies
-        all_vacancies_file = self.save_to_json(all_vacancies, "all_vacancies.json")
-        
-        # Save new vacancies if there are any
-        new_vacancies_file = None
-        if new_vacancies:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            new_vacancies_file = self.save_to_json(new_vacancies, f"new_vacancies_{timestamp}.json")
-        
-        # Log results
-        logging.info(f"Scraping completed: {len(all_vacancies)} total, {len(new_vacancies)} new, {len(updated_vacancies)} updated")
-        
-        return all_vacancies, new_vacancies, updated_vacancies, all_vacancies_file, new_vacancies_file
-
-    def run(self):
-        """
-        Run the scraper in a continuous loop.
-        """
-        logging.info(f"Starting continuous scraping every {self.update_interval} seconds")
-        
-        while True:
-            try:
-                # Run once
-                _, new_vacancies, updated_vacancies, _, _ = self.run_once()
-                
-                # Log results
-                logging.info(f"Found {len(new_vacancies)} new vacancies and {len(updated_vacancies)} updated vacancies")
-                
-                # Wait for the next update
-                logging.info(f"Waiting {self.update_interval} seconds until next update")
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                logging.error(f"Error in main scraper loop: {e}")
-                # Wait before retrying
-                time.sleep(60)
-
-if __name__ == "__main__":
-    # Example usage
-    scraper = HHScraper(search_query="Python", pages_to_scrape=3)
-    scraper.run()
+import requests
+import aiohttp
+import asyncio
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
+import json
+import time
+import os
+import logging
+from datetime import datetime
+import re
+from typing import List, Dict, Tuple, Any, Optional, Iterator
+
+from rate_limiter import TokenBucket
+from http_cache import ResponseCache
+from vacancy_store import VacancyStore
+from vacancy_utils import vacancy_fingerprint, structured_fields
+from skill_extractor import EXTRACTOR_VERSION, extract_skills
+
+# Advertise brotli only when a decoder is installed, requests/aiohttp can't decode it otherwise
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# Number of vacancies requested per search result page
+ITEMS_ON_PAGE = 50
+
+# hh shows at most this many results of a search, however many pages are requested
+RESULT_CAP = 2000
+
+# Header of a search result page with the total number of results
+RESULT_COUNT_PATTERN = re.compile(r'data-qa="vacancies-search-header"[^>]*>(.*?)</h1>', re.DOTALL)
+
+# The count in that header, with regular, non-breaking or narrow spaces between digit groups
+RESULT_COUNT_NUMBER_PATTERN = re.compile(r'\d{1,3}(?:(?:[ \u00a0\u202f]|&nbsp;|&#160;)\d{3})+|\d+')
+
+# Supported page fetching strategies
+FETCH_MODES = ('async', 'sequential')
+
+# Supported HTML parser backends
+PARSER_BACKENDS = ('lxml', 'strainer', 'html.parser')
+
+# Bumped whenever the vacancies built from a page change, so cached parses of older versions aren't reused
+PARSER_VERSION = 1
+
+# Only vacancy blocks are built into a tree in 'strainer' mode
+VACANCY_BLOCK_STRAINER = SoupStrainer('div', class_='vacancy-serp-item-body')
+
+# Selectors for the 'lxml' backend, compiled once
+def _class_xpath(tag: str, css_class: str) -> str:
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+LXML_BLOCK_XPATH = etree.XPath('//' + _class_xpath('div', 'vacancy-serp-item-body'))
+LXML_TITLE_XPATH = etree.XPath('.//' + _class_xpath('a', 'serp-item__title'))
+LXML_FIELD_XPATHS = {
+    field: etree.XPath(f".//{tag}[@data-qa='{qa}']")
+    for field, tag, qa in (
+        ('company', 'a', 'vacancy-serp__vacancy-employer'),
+        ('requirement', 'div', 'vacancy-serp__vacancy_snippet_requirement'),
+        ('salary', 'span', 'vacancy-serp__vacancy-compensation'),
+        ('location', 'div', 'vacancy-serp__vacancy-address'),
+        ('publication_date', 'span', 'vacancy-serp__vacancy-date')
+    )
+}
+
+# Experience patterns like "1-3 years", "from 3 years", etc.
+EXPERIENCE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'(\d+[-–]\d+\s+(?:year|years|год|года|лет))',
+        r'(от\s+\d+\s+(?:year|years|год|года|лет))',
+        r'(experience\s+\d+[-–]?\d*\s+(?:year|years|год|года|лет))',
+        r'(опыт\s+\d+[-–]?\d*\s+(?:year|years|год|года|лет))'
+    )
+]
+
+class HHScraper:
+    def __init__(self, search_query: str, pages_to_scrape: int = 3, update_interval: int = 600,
+                 fetch_mode: str = 'async', max_concurrency: int = 4,
+                 requests_per_second: float = 2.0, burst: int = 4, request_timeout: float = 30,
+                 use_cache: bool = True, cache_ttl: int = 86400, cache_max_bytes: int = 50 * 1024 * 1024,
+                 parser_backend: str = 'lxml', incremental: bool = True,
+                 stop_after_known_pages: int = 1, max_pages: Optional[int] = None):
+        """
+        Initialize the scraper with the search query and configuration.
+        
+        Args:
+            search_query: The search term to look for vacancies
+            pages_to_scrape: Number of pages to scrape (default: 3)
+            update_interval: Time between updates in seconds (default: 600 = 10 minutes)
+            fetch_mode: 'async' to fetch pages concurrently with aiohttp, or
+                'sequential' to fetch them one by one with a fixed delay (default: 'async')
+            max_concurrency: Maximum number of page requests in flight (default: 4)
+            requests_per_second: Sustained request rate allowed towards hh.kz (default: 2.0)
+            burst: Number of requests that may be sent at once before rate limiting kicks in (default: 4)
+            request_timeout: Total timeout for a single request in seconds (default: 30)
+            use_cache: Revalidate pages with conditional GET against an on-disk cache (default: True)
+            cache_ttl: Time in seconds a cached response is kept (default: 86400 = 1 day)
+            cache_max_bytes: Maximum size of the response cache (default: 50 MB)
+            parser_backend: 'lxml' for lxml with precompiled XPath selectors, 'strainer' for
+                BeautifulSoup restricted to vacancy blocks, or 'html.parser' for a full
+                BeautifulSoup tree (default: 'lxml')
+            incremental: Stop paginating once pages contain only known, unchanged vacancies (default: True)
+            stop_after_known_pages: Number of consecutive fully known pages after which an
+                incremental crawl stops (default: 1)
+            max_pages: Deepest the crawl may go when catching up after a gap between runs
+                (default: 4 x pages_to_scrape)
+        """
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{fetch_mode}', expected one of {FETCH_MODES}")
+        if parser_backend not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend '{parser_backend}', expected one of {PARSER_BACKENDS}")
+        
+        self.search_query = search_query
+        self.pages_to_scrape = pages_to_scrape
+        self.update_interval = update_interval
+        self.fetch_mode = fetch_mode
+        self.parser_backend = parser_backend
+        # Parsed vacancies cached by a different backend, parser or skill extractor aren't reused
+        self.parsed_version = f"{parser_backend}:{PARSER_VERSION}:{EXTRACTOR_VERSION}"
+        self.incremental = incremental
+        self.stop_after_known_pages = max(1, stop_after_known_pages)
+        self.max_pages = max(max_pages or pages_to_scrape * 4, pages_to_scrape)
+        self.last_run_report = {}
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
+        self.page_delay = 2
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        
+        # Event loop and aiohttp session reused between runs in async mode
+        self._loop = None
+        self._session = None
+        self.base_url = "https://hh.kz/search/vacancy"
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Encoding': ACCEPT_ENCODING
+        }
+        self.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+        self.all_vacancies_file = os.path.join(self.output_dir, "all_vacancies.jsonl")
+        self.crawl_state_file = os.path.join(self.output_dir, "crawl_state.json")
+        
+        # Create output directory if it doesn't exist
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+            logging.info(f"Created output directory: {self.output_dir}")
+        
+        # Append-only store of every vacancy seen so far (imports the old JSON file once)
+        self.store = VacancyStore(
+            self.all_vacancies_file,
+            legacy_json_file=os.path.join(self.output_dir, "all_vacancies.json")
+        )
+        
+        # Keep-alive session reused by the sequential fetch path
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Cache of page bodies and validators for conditional requests
+        self.http_cache = None
+        if use_cache:
+            self.http_cache = ResponseCache(
+                os.path.join(self.output_dir, "http_cache"),
+                ttl=cache_ttl,
+                max_size_bytes=cache_max_bytes
+            )
+    
+    def fetch_html(self, url: str, params: Dict = None) -> str:
+        """
+        Fetch HTML content from the URL.
+        
+        Args:
+            url: The URL to fetch
+            params: Query parameters to include in the request
+            
+        Returns:
+            HTML content as a string
+        """
+        return self._fetch_html(url, params)[0]
+    
+    def _fetch_html(self, url: str, params: Dict = None) -> Tuple[str, bool]:
+        """
+        Fetch HTML content over the keep-alive session, revalidating cached copies.
+        
+        Args:
+            url: The URL to fetch
+            params: Query parameters to include in the request
+            
+        Returns:
+            Tuple of (HTML content, whether the server answered 304 Not Modified)
+        """
+        cache_key, headers = self._conditional_request(url, params)
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=self.request_timeout)
+            response.raise_for_status()
+            return self._handle_response(
+                cache_key, url, response.status_code, response.text,
+                response.headers.get('ETag'), response.headers.get('Last-Modified')
+            )
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching HTML: {e}")
+            return "", False
+    
+    def _conditional_request(self, url: str, params: Dict = None) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Look up the response cache for a request.
+        
+        Args:
+            url: The URL to fetch
+            params: Query parameters to include in the request
+            
+        Returns:
+            Tuple of (cache key or None when caching is disabled, conditional request headers)
+        """
+        if self.http_cache is None:
+            return None, {}
+        cache_key = self.http_cache.make_key(url, params)
+        return cache_key, self.http_cache.conditional_headers(cache_key)
+    
+    def _handle_response(self, cache_key: Optional[str], url: str, status: int, body: str,
+                         etag: Optional[str], last_modified: Optional[str]) -> Tuple[str, bool]:
+        """
+        Resolve a response against the cache.
+        
+        Returns:
+            Tuple of (HTML content, whether the server answered 304 Not Modified)
+        """
+        if cache_key is None:
+            return body, False
+        if status == 304:
+            self.http_cache.mark_not_modified(cache_key)
+            return self.http_cache.read_body(cache_key), True
+        self.http_cache.store(cache_key, url, body, etag, last_modified)
+        return body, False
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared aiohttp session, creating it on first use.
+        
+        Returns:
+            The aiohttp client session
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self._session
+    
+    async def fetch_html_async(self, url: str, params: Dict = None) -> str:
+        """
+        Fetch HTML content from the URL without blocking the event loop.
+        
+        Args:
+            url: The URL to fetch
+            params: Query parameters to include in the request
+            
+        Returns:
+            HTML content as a string
+        """
+        return (await self._fetch_html_async(url, params))[0]
+    
+    async def _fetch_html_async(self, url: str, params: Dict = None) -> Tuple[str, bool]:
+        """
+        Asynchronous counterpart of _fetch_html.
+        
+        Returns:
+            Tuple of (HTML content, whether the server answered 304 Not Modified)
+        """
+        session = await self._get_session()
+        cache_key, headers = self._conditional_request(url, params)
+        await self.rate_limiter.acquire()
+        try:
+            async with session.get(url, params=params, headers=headers) as response:
+                response.raise_for_status()
+                body = await response.text() if response.status != 304 else ""
+                return self._handle_response(
+                    cache_key, url, response.status, body,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified')
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Error fetching HTML: {e}")
+            return "", False
+    
+    async def _fetch_requests_async(self, page_requests: List[Tuple[str, int, Optional[Dict]]]) -> List[Tuple[str, bool]]:
+        """
+        Fetch several search result pages concurrently.
+        
+        Args:
+            page_requests: (search query, page number, extra search filters or None) tuples to fetch
+            
+        Returns:
+            (HTML content, not modified) tuples, in the same order as page_requests
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch_page(query, page, filters):
+            async with semaphore:
+                return await self._fetch_html_async(self.base_url, self._page_params(page, query, filters))
+        
+        return await asyncio.gather(*(fetch_page(query, page, filters) for query, page, filters in page_requests))
+    
+    def _run_async(self, coro):
+        """
+        Run a coroutine on the scraper's private event loop.
+        
+        The loop is kept between calls so the aiohttp session and its
+        keep-alive connections survive from one run to the next.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+    
+    def _page_params(self, page: int, query: Optional[str] = None, filters: Optional[Dict] = None) -> Dict:
+        """
+        Build the query parameters for a search result page.
+        
+        Args:
+            page: Page number (zero based)
+            query: Search query (default: the scraper's search_query)
+            filters: Extra search filters such as {'area': '160'} (default: none)
+            
+        Returns:
+            Query parameters dictionary
+        """
+        params = {
+            'text': query or self.search_query,
+            'page': page,
+            'items_on_page': ITEMS_ON_PAGE
+        }
+        params.update(filters or {})
+        return params
+    
+    def fetch_pages(self, pages: List[int]) -> List[Tuple[str, bool]]:
+        """
+        Fetch search result pages using the configured fetch mode.
+        
+        Args:
+            pages: Page numbers to fetch
+            
+        Returns:
+            (HTML content, not modified) tuples, in the same order as pages
+        """
+        return self.fetch_requests([(self.search_query, page, None) for page in pages])
+    
+    def fetch_requests(self, page_requests: List[Tuple[str, int, Optional[Dict]]]) -> List[Tuple[str, bool]]:
+        """
+        Fetch search result pages of any queries through the scraper's session and rate limiter.
+        
+        Args:
+            page_requests: (search query, page number, extra search filters or None) tuples to fetch
+            
+        Returns:
+            (HTML content, not modified) tuples, in the same order as page_requests
+        """
+        if self.fetch_mode == 'async':
+            return self._run_async(self._fetch_requests_async(page_requests))
+        
+        results = []
+        for i, (query, page, filters) in enumerate(page_requests):
+            # Add a small delay between pages to be respectful to the server
+            if i > 0:
+                time.sleep(self.page_delay)
+            results.append(self._fetch_html(self.base_url, self._page_params(page, query, filters)))
+        return results
+    
+    def parse_page(self, page: int, html: str, not_modified: bool = False, query: Optional[str] = None,
+                   filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Parse a search result page, reusing the cached result for unchanged pages.
+        
+        Args:
+            page: Page number the HTML belongs to
+            html: HTML content of the page
+            not_modified: Whether the server answered 304 Not Modified for the page
+            query: Search query of the page (default: the scraper's search_query)
+            filters: Extra search filters of the page (default: none)
+            
+        Returns:
+            List of vacancy dictionaries
+        """
+        cache_key = None
+        if self.http_cache is not None:
+            cache_key = self.http_cache.make_key(self.base_url, self._page_params(page, query, filters))
+            if not_modified:
+                cached = self.http_cache.get_parsed(cache_key, self.parsed_version)
+                if cached is not None:
+                    logging.info(f"Page {page} not modified, reusing parsed vacancies")
+                    return cached
+        
+        vacancies = self.parse_vacancies(html)
+        if cache_key is not None:
+            self.http_cache.store_parsed(cache_key, vacancies, self.parsed_version)
+        return vacancies
+    
+    @staticmethod
+    def parse_result_count(html: str) -> Optional[int]:
+        """
+        Read the total number of results from the header of a search result page.
+        
+        Args:
+            html: HTML content of the page
+            
+        Returns:
+            Number of vacancies found, or None if the page has no result header
+        """
+        match = RESULT_COUNT_PATTERN.search(html or '')
+        if not match:
+            return None
+        # The header is like 'Найдено 2 250 вакансий «Python 3»', possibly split over tags;
+        # only the first number is the count
+        number = RESULT_COUNT_NUMBER_PATTERN.search(re.sub(r'<[^>]+>', '', match.group(1)))
+        return int(re.sub(r'\D|&nbsp;|&#160;', '', number.group(0))) if number else 0
+    
+    def close(self):
+        """
+        Close the HTTP sessions and the private event loop.
+        """
+        self.session.close()
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._session is not None and not self._session.closed:
+            self._loop.run_until_complete(self._session.close())
+        self._loop.close()
+        self._session = None
+    
+    def parse_vacancies(self, html: str) -> List[Dict]:
+        """
+        Parse the HTML to extract vacancy information.
+        
+        Args:
+            html: HTML content to parse
+            
+        Returns:
+            List of vacancy dictionaries
+        """
+        if self.parser_backend == 'lxml':
+            blocks = self._extract_blocks_lxml(html)
+        else:
+            blocks = self._extract_blocks_bs4(html)
+        
+        vacancies = []
+        for fields in blocks:
+            try:
+                vacancy = self._build_vacancy(fields)
+                if vacancy:
+                    vacancies.append(vacancy)
+            except Exception as e:
+                logging.error(f"Error parsing vacancy: {e}")
+                continue
+        
+        return vacancies
+    
+    def _extract_blocks_bs4(self, html: str) -> List[Dict]:
+        """
+        Extract the raw fields of every vacancy block with BeautifulSoup.
+        
+        In 'strainer' mode only the vacancy blocks are turned into a tree,
+        the rest of the page is skipped by the parser.
+        
+        Args:
+            html: HTML content to parse
+            
+        Returns:
+            List of raw field dictionaries, one per vacancy block
+        """
+        if self.parser_backend == 'strainer':
+            soup = BeautifulSoup(html, 'lxml', parse_only=VACANCY_BLOCK_STRAINER)
+        else:
+            soup = BeautifulSoup(html, 'html.parser')
+        
+        def text_of(block, tag, qa):
+            element = block.find(tag, {'data-qa': qa})
+            return element.text if element else None
+        
+        blocks = []
+        for block in soup.find_all('div', {'class': 'vacancy-serp-item-body'}):
+            title_element = block.find('a', {'class': 'serp-item__title'})
+            blocks.append({
+                'title': title_element.text if title_element else None,
+                'href': title_element.get('href') if title_element else None,
+                'company': text_of(block, 'a', 'vacancy-serp__vacancy-employer'),
+                'requirement': text_of(block, 'div', 'vacancy-serp__vacancy_snippet_requirement'),
+                'salary': text_of(block, 'span', 'vacancy-serp__vacancy-compensation'),
+                'location': text_of(block, 'div', 'vacancy-serp__vacancy-address'),
+                'publication_date': text_of(block, 'span', 'vacancy-serp__vacancy-date')
+            })
+        return blocks
+    
+    def _extract_blocks_lxml(self, html: str) -> List[Dict]:
+        """
+        Extract the raw fields of every vacancy block with lxml and precompiled XPath.
+        
+        Args:
+            html: HTML content to parse
+            
+        Returns:
+            List of raw field dictionaries, one per vacancy block
+        """
+        try:
+            tree = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError) as e:
+            logging.error(f"Error parsing HTML with lxml: {e}")
+            return []
+        
+        def text_of(block, field):
+            elements = LXML_FIELD_XPATHS[field](block)
+            return elements[0].text_content() if elements else None
+        
+        blocks = []
+        for block in LXML_BLOCK_XPATH(tree):
+            title_elements = LXML_TITLE_XPATH(block)
+            title_element = title_elements[0] if title_elements else None
+            blocks.append({
+                'title': title_element.text_content() if title_element is not None else None,
+                'href': title_element.get('href') if title_element is not None else None,
+                'company': text_of(block, 'company'),
+                'requirement': text_of(block, 'requirement'),
+                'salary': text_of(block, 'salary'),
+                'location': text_of(block, 'location'),
+                'publication_date': text_of(block, 'publication_date')
+            })
+        return blocks
+    
+    def _build_vacancy(self, fields: Dict) -> Optional[Dict]:
+        """
+        Build a vacancy dictionary from the raw fields of a vacancy block.
+        
+        Args:
+            fields: Raw field texts extracted by one of the parser backends
+            
+        Returns:
+            Vacancy dictionary, or None if the block has no title link
+        """
+        if not fields['title'] or not fields['href']:
+            return None
+        
+        title = fields['title'].strip()
+        link = fields['href'].split('?')[0]  # Remove query parameters
+        company = fields['company'].strip() if fields['company'] else "Company not specified"
+        
+        # Canonical skills from the skill dictionary mentioned in the title or the requirement snippet
+        skills = extract_skills(title + "\n" + (fields['requirement'] or ""))
+        
+        # Experience comes from the requirement snippet
+        experience = "Not specified"
+        if fields['requirement']:
+            # Look for experience patterns like "1-3 years", "from 3 years", etc.
+            exp_text = fields['requirement'].lower()
+            for pattern in EXPERIENCE_PATTERNS:
+                match = pattern.search(exp_text)
+                if match:
+                    experience = match.group(1)
+                    break
+        
+        salary = fields['salary'].strip() if fields['salary'] else "Not specified"
+        location = fields['location'].strip() if fields['location'] else "Not specified"
+        publication_date = fields['publication_date'].strip() if fields['publication_date'] else "Not specified"
+        
+        # Create vacancy object with unique ID (constructed from link)
+        vacancy_id = link.split('/')[-1]
+        
+        vacancy = {
+            'id': vacancy_id,
+            'title': title,
+            'company': company,
+            'skills': skills,
+            'link': link,
+            'salary': salary,
+            'experience': experience,
+            'location': location,
+            'publication_date': publication_date,
+            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        # Numeric salary_min/max, salary_currency, salary_gross and experience_min/max
+        vacancy.update(structured_fields(vacancy))
+        vacancy['fingerprint'] = vacancy_fingerprint(vacancy)
+        return vacancy
+    
+    def _plan_depth(self, query: Optional[str] = None, interval: Optional[float] = None) -> int:
+        """
+        Decide how many pages an incremental run may fetch.
+        
+        Normally this is pages_to_scrape. If runs were missed (downtime, failed
+        runs), the depth grows with the number of missed intervals, up to
+        max_pages, so the vacancies published in the meantime aren't lost.
+        
+        Args:
+            query: Search query (default: the scraper's search_query)
+            interval: Expected seconds between runs of the query (default: update_interval)
+        
+        Returns:
+            Maximum number of pages to fetch
+        """
+        last_run_at = self.load_from_json(self.crawl_state_file) or {}
+        last_run_at = last_run_at.get(query or self.search_query)
+        if last_run_at is None:
+            return self.pages_to_scrape
+        
+        missed_runs = int((time.time() - last_run_at) // max(interval or self.update_interval, 1))
+        if missed_runs <= 1:
+            return self.pages_to_scrape
+        
+        depth = min(self.max_pages, self.pages_to_scrape * missed_runs)
+        logging.info(f"{missed_runs} update intervals since the last run, crawling up to {depth} pages")
+        return depth
+    
+    def _save_crawl_state(self, query: Optional[str] = None):
+        """
+        Remember when the last run for a search query (default: the scraper's search_query) finished.
+        """
+        state = self.load_from_json(self.crawl_state_file) or {}
+        state[query or self.search_query] = time.time()
+        self.save_to_json(state, os.path.basename(self.crawl_state_file))
+    
+    def save_to_json(self, data: List[Dict], filename: str) -> str:
+        """
+        Save data to a JSON file.
+        
+        Args:
+            data: The data to save
+            filename: The filename to save to
+            
+        Returns:
+            The full path to the saved file
+        """
+        filepath = os.path.join(self.output_dir, filename)
+        try:
+            # Write to a temporary file first so a crash can't leave a truncated file behind
+            tmp_filepath = filepath + ".tmp"
+            with open(tmp_filepath, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_filepath, filepath)
+            logging.info(f"Saved data to {filepath}")
+            return filepath
+        except Exception as e:
+            logging.error(f"Error saving to JSON: {e}")
+            return ""
+    
+    def load_from_json(self, filepath: str) -> List[Dict]:
+        """
+        Load data from a JSON file.
+        
+        Args:
+            filepath: Path to the JSON file
+            
+        Returns:
+            The loaded data
+        """
+        try:
+            if os.path.exists(filepath):
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            return []
+        except Exception as e:
+            logging.error(f"Error loading from JSON: {e}")
+            return []
+    
+    def filter_new_vacancies(self, all_vacancies: List[Dict], new_vacancies: List[Dict]) -> List[Dict]:
+        """
+        Filter out vacancies that already exist in all_vacancies.
+        
+        Args:
+            all_vacancies: Existing vacancies
+            new_vacancies: New vacancies to filter
+            
+        Returns:
+            Filtered list of new vacancies
+        """
+        existing_ids = {vacancy['id'] for vacancy in all_vacancies}
+        return [vacancy for vacancy in new_vacancies if vacancy['id'] not in existing_ids]
+    
+    def store_page(self, page_vacancies: List[Dict], seen_ids: set) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Find the new and changed vacancies of a page and append them to the vacancy store.
+        
+        Args:
+            page_vacancies: Vacancies parsed from the page
+            seen_ids: IDs already handled during the run; updated with the page's IDs
+            
+        Returns:
+            Tuple of (new_vacancies, updated_vacancies)
+        """
+        # Another process (the bot or a separate scraper) may have written to the store
+        self.store.refresh()
+        
+        new_vacancies = []
+        updated_vacancies = []
+        for vacancy in page_vacancies:
+            vacancy_id = vacancy['id']
+            
+            if vacancy_id in seen_ids:
+                # Listed twice (results shifted between pages)
+                continue
+            seen_ids.add(vacancy_id)
+            
+            # Pages parsed before fingerprints existed may come from the cache without one
+            if 'fingerprint' not in vacancy:
+                vacancy['fingerprint'] = vacancy_fingerprint(vacancy)
+            
+            if vacancy_id in self.store:
+                # Check if the vacancy has new information
+                if vacancy['fingerprint'] != self.store.fingerprint(vacancy_id):
+                    # Keep the original creation timestamp
+                    vacancy['created_at'] = self.store.get(vacancy_id)['created_at']
+                    updated_vacancies.append(vacancy)
+            else:
+                # Add as a new vacancy
+                new_vacancies.append(vacancy)
+        
+        # Append new and changed vacancies before handing them on
+        self.store.append(new_vacancies + updated_vacancies)
+        return new_vacancies, updated_vacancies
+    
+    def iter_pages(self) -> Iterator[Dict]:
+        """
+        Crawl the search results, yielding the vacancies of every page as soon as it's processed.
+        
+        New and changed vacancies are appended to the vacancy store page by
+        page. Pages are fetched in waves only when the consumer asks for more,
+        so a slow consumer holds back the crawl instead of piling up pages in
+        memory. The crawl report and crawl state are saved once the last page
+        has been consumed.
+        
+        Returns:
+            Iterator of dictionaries with the 'query', the 'page' number, its parsed
+            'vacancies' and the 'new' and 'updated' ones among them
+        """
+        logging.info(f"Starting scraping run for query: {self.search_query}")
+        
+        # IDs seen during this run, to skip vacancies listed on two pages
+        seen_ids = set()
+        new_count = 0
+        updated_count = 0
+        
+        # Decide how deep this run may go
+        max_depth = self._plan_depth() if self.incremental else self.pages_to_scrape
+        report = {
+            'pages_planned': max_depth,
+            'pages_fetched': 0,
+            'pages_failed': 0,
+            'pages_not_modified': 0,
+            'pages_known': 0,
+            'pages_skipped': 0,
+            'stopped_early': False
+        }
+        
+        # Pages are fetched in waves (concurrently in async mode) and processed in order,
+        # so the crawl can stop as soon as it reaches pages it already knows. The first
+        # wave is page 0 alone and every wave doubles up to max_concurrency, so a run
+        # with nothing new costs a single request
+        max_wave_size = self.max_concurrency if self.fetch_mode == 'async' else 1
+        wave_size = 1
+        known_streak = 0
+        page = 0
+        stop = False
+        while page < max_depth and not stop:
+            if self.fetch_mode == 'sequential' and page > 0:
+                # Add a small delay between pages to be respectful to the server
+                time.sleep(self.page_delay)
+            
+            wave = list(range(page, min(page + wave_size, max_depth)))
+            for wave_page, (html, not_modified) in zip(wave, self.fetch_pages(wave)):
+                report['pages_fetched'] += 1
+                if not html:
+                    logging.warning(f"No HTML content received for page {wave_page}")
+                    report['pages_failed'] += 1
+                    continue
+                if not_modified:
+                    report['pages_not_modified'] += 1
+                
+                # Parse vacancies from the page
+                page_vacancies = self.parse_page(wave_page, html, not_modified)
+                logging.info(f"Found {len(page_vacancies)} vacancies on page {wave_page}")
+                
+                page_new, page_updated = self.store_page(page_vacancies, seen_ids)
+                new_count += len(page_new)
+                updated_count += len(page_updated)
+                
+                # A short page is the last page of the search results
+                if len(page_vacancies) < ITEMS_ON_PAGE:
+                    stop = True
+                
+                if page_vacancies and not page_new and not page_updated:
+                    report['pages_known'] += 1
+                    known_streak += 1
+                else:
+                    known_streak = 0
+                if self.incremental and known_streak >= self.stop_after_known_pages:
+                    report['stopped_early'] = wave[-1] + 1 < max_depth
+                    stop = True
+                
+                yield {
+                    'query': self.search_query,
+                    'page': wave_page,
+                    'vacancies': page_vacancies,
+                    'new': page_new,
+                    'updated': page_updated
+                }
+            
+            page = wave[-1] + 1
+            wave_size = min(wave_size * 2, max_wave_size)
+        
+        # Pages of the plan that were never requested
+        report['pages_skipped'] = max_depth - page
+        self.last_run_report = report
+        # Only a run that actually reached hh.kz counts for the adaptive depth
+        if report['pages_failed'] < report['pages_fetched']:
+            self._save_crawl_state()
+        
+        # Compact the log from time to time and save its index
+        self.store.maybe_compact()
+        
+        # Log results
+        logging.info(f"Scraping completed: {len(self.store)} total, {new_count} new, {updated_count} updated")
+        logging.info(
+            f"Crawl report: {report['pages_fetched']}/{report['pages_planned']} pages fetched, "
+            f"{report['pages_skipped']} skipped, {report['pages_not_modified']} not modified, "
+            f"{report['pages_known']} fully known, stopped early: {report['stopped_early']}"
+        )
+    
+    def save_new_vacancies(self, new_vacancies: List[Dict]) -> Optional[str]:
+        """
+        Save the new vacancies of a run to a timestamped JSON file.
+        
+        Args:
+            new_vacancies: New vacancies found during the run
+            
+        Returns:
+            Path to the file, or None if there are no new vacancies
+        """
+        if not new_vacancies:
+            return None
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.save_to_json(new_vacancies, f"new_vacancies_{timestamp}.json")
+    
+    def run_once(self) -> Tuple[List[Dict], List[Dict], List[Dict], str, Optional[str]]:
+        """
+        Run the scraper once.
+        
+        Only new and changed vacancies are appended to the vacancy store, the
+        history is never loaded or rewritten as a whole. Use iter_pages to
+        process the vacancies page by page instead of after the whole crawl.
+        
+        Returns:
+            Tuple of (seen_vacancies, new_vacancies, updated_vacancies, all_vacancies_file, new_vacancies_file)
+            where seen_vacancies are all vacancies found during this run
+        """
+        seen_vacancies = {}
+        new_vacancies = []
+        updated_vacancies = []
+        for batch in self.iter_pages():
+            for vacancy in batch['vacancies']:
+                seen_vacancies.setdefault(vacancy['id'], vacancy)
+            new_vacancies.extend(batch['new'])
+            updated_vacancies.extend(batch['updated'])
+        
+        # Save new vacancies if there are any
+        new_vacancies_file = self.save_new_vacancies(new_vacancies)
+        
+        return list(seen_vacancies.values()), new_vacancies, updated_vacancies, self.all_vacancies_file, new_vacancies_file
+    
+    def run(self):
+        """
+        Run the scraper in a continuous loop.
+        """
+        logging.info(f"Starting continuous scraping every {self.update_interval} seconds")
+        
+        while True:
+            try:
+                # Run once
+                _, new_vacancies, updated_vacancies, _, _ = self.run_once()
+                
+                # Log results
+                logging.info(f"Found {len(new_vacancies)} new vacancies and {len(updated_vacancies)} updated vacancies")
+                
+                # Wait for the next update
+                logging.info(f"Waiting {self.update_interval} seconds until next update")
+                time.sleep(self.update_interval)
+                
+            except Exception as e:
+                logging.error(f"Error in main scraper loop: {e}")
+                # Wait before retrying
+                time.sleep(60)
+
+if __name__ == "__main__":
+    # Setup logging; only when run directly, so importing the scraper doesn't create scraper.log
+    logging.basicConfig(
+        filename='scraper.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    
+    # Example usage
+    scraper = HHScraper(search_query="Python", pages_to_scrape=3)
+    scraper.run()